@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# bench/dummy_game.py
+"""
+Processo falso de servidor de jogo para os benchmarks. Imprime no stdout (e no log
+do jogo) uma sequência de boot realista de Minecraft ou Factorio, espalhada ao longo
+de --boot-time segundos, fica "rodando" até receber SIGTERM/SIGINT e então imprime
+o desligamento e sai com código 0. Usa só a biblioteca padrão para iniciar rápido.
+
+    python bench/dummy_game.py minecraft --boot-time 2 --log-file logs/latest.log
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+MINECRAFT_BOOT = [
+    "[main/INFO]: Environment: Environment[sessionHost=https://sessionserver.mojang.com, servicesHost=https://api.minecraftservices.com, name=PROD]",
+    "[ServerMain/INFO]: Loaded 7 recipes",
+    "[Server thread/INFO]: Starting minecraft server version 1.20.4",
+    "[Server thread/INFO]: Loading properties",
+    "[Server thread/INFO]: Default game type: SURVIVAL",
+    "[Server thread/INFO]: Generating keypair",
+    "[Server thread/INFO]: Starting Minecraft server on *:25565",
+    "[Server thread/INFO]: Using epoll channel type",
+    "[Server thread/INFO]: Preparing level \"world\"",
+    "[Server thread/INFO]: Preparing start region for dimension minecraft:overworld",
+    "[Worker-Main-2/INFO]: Preparing spawn area: 0%",
+    "[Worker-Main-1/INFO]: Preparing spawn area: 18%",
+    "[Worker-Main-3/INFO]: Preparing spawn area: 51%",
+    "[Worker-Main-2/INFO]: Preparing spawn area: 83%",
+    "[Server thread/INFO]: Time elapsed: {elapsed_ms} ms",
+    "[Server thread/INFO]: Starting remote control listener",
+    "[Server thread/INFO]: RCON running on 0.0.0.0:25575",
+    "[Server thread/INFO]: Done ({elapsed:.3f}s)! For help, type \"help\"",
+]
+MINECRAFT_RUNNING = "[Server thread/INFO]: <Steve> bench message {n}"
+MINECRAFT_STOP = [
+    "[Server thread/INFO]: Stopping the server",
+    "[Server thread/INFO]: Stopping server",
+    "[Server thread/INFO]: Saving players",
+    "[Server thread/INFO]: Saving worlds",
+    "[Server thread/INFO]: Saving chunks for level 'ServerLevel[world]'/minecraft:overworld",
+    "[Server thread/INFO]: ThreadedAnvilChunkStorage: All dimensions are saved",
+]
+
+FACTORIO_BOOT = [
+    "Factorio 1.1.101 (build 62105, linux64, headless)",
+    "Operating system: Linux",
+    "Program arguments: \"bin/x64/factorio\" \"--start-server\" \"saves/bench.zip\"",
+    "Read data path: ./data",
+    "Write data path: ./",
+    "Loading mod core 0.0.0 (data.lua)",
+    "Loading mod base 1.1.101 (data.lua)",
+    "Checksum for core: 2387066203",
+    "Checksum of base: 1372722136",
+    "Loading sounds...",
+    "Info ServerMultiplayerManager.cpp:766: updateTick(0) changing state from(Ready) to(PreparedToHostGame)",
+    "Info ServerMultiplayerManager.cpp:766: updateTick(0) changing state from(PreparedToHostGame) to(CreatingGame)",
+    "Loading map ./saves/bench.zip: 4215381 bytes.",
+    "Loading level.dat finished: {elapsed_ms} ms",
+    "Info RemoteCommandProcessor.cpp:131: Starting RCON interface at IP ADDR:({{0.0.0.0:27015}})",
+    "Info ServerMultiplayerManager.cpp:766: updateTick(4231) changing state from(CreatingGame) to(InGame)",
+]
+FACTORIO_RUNNING = "[CHAT] alice: bench message {n}"
+FACTORIO_STOP = [
+    "Info ServerMultiplayerManager.cpp:814: Quitting: remote-quit.",
+    "Info ServerMultiplayerManager.cpp:766: updateTick(9000) changing state from(InGame) to(DisconnectingScheduled)",
+    "Info ServerMultiplayerManager.cpp:766: updateTick(9001) changing state from(DisconnectingScheduled) to(Disconnecting)",
+    "Info ServerMultiplayerManager.cpp:766: updateTick(9002) changing state from(Disconnecting) to(Disconnected)",
+    "Goodbye",
+]
+
+GAMES = {
+    "minecraft": (MINECRAFT_BOOT, MINECRAFT_RUNNING, MINECRAFT_STOP),
+    "factorio": (FACTORIO_BOOT, FACTORIO_RUNNING, FACTORIO_STOP),
+}
+
+class GameLog:
+    def __init__(self, game: str, log_file: str | None):
+        self.game = game
+        self.started = time.monotonic()
+        self._file = None
+        if log_file:
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            self._file = open(log_file, "w", encoding="utf-8")
+
+    def write(self, line: str):
+        if self.game == "minecraft":
+            line = f"[{time.strftime('%H:%M:%S')}] {line}"
+        else:
+            line = f"{time.monotonic() - self.started:8.3f} {line}"
+        print(line, flush=True)
+        if self._file:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("game", choices=sorted(GAMES))
+    parser.add_argument("--boot-time", type=float, default=2.0, help="Segundos até imprimir o marcador de pronto")
+    parser.add_argument("--stop-time", type=float, default=0.2, help="Segundos gastos no desligamento")
+    parser.add_argument("--chatter", type=float, default=0.0, help="Linhas por segundo impressas depois do boot")
+    parser.add_argument("--log-file", help="Log do jogo, relativo ao diretório atual")
+    args = parser.parse_args()
+
+    boot, running, stop = GAMES[args.game]
+    log = GameLog(args.game, args.log_file)
+    stopping = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stopping.set())
+
+    step = args.boot_time / len(boot)
+    for line in boot:
+        if stopping.wait(step):
+            break
+        elapsed = time.monotonic() - log.started
+        log.write(line.format(elapsed=elapsed, elapsed_ms=int(elapsed * 1000)))
+
+    n = 0
+    interval = 1.0 / args.chatter if args.chatter > 0 else None
+    while not stopping.wait(interval):
+        n += 1
+        log.write(running.format(n=n))
+
+    for line in stop:
+        time.sleep(args.stop_time / len(stop))
+        log.write(line)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# bench/fake_rcon.py
+import asyncio
+import random
+import struct
+from dataclasses import dataclass
+from typing import Callable
+
+# Tipos de pacote do protocolo Source RCON (o mesmo falado pelo aiomcrcon)
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_AUTH_RESPONSE = 2
+TYPE_AUTH = 3
+
+MAX_PACKET = 4096 + 10
+
+# Recebe o comando e devolve o texto da resposta
+CommandHandler = Callable[[str], str]
+
+@dataclass
+class RconBehavior:
+    """Como o servidor falso se comporta: atraso de cada resposta e falhas injetadas."""
+    latency: float = 0.0 # Atraso base (s) antes de cada resposta
+    jitter: float = 0.0 # Variação uniforme somada ao atraso, em [0, jitter)
+    failure_rate: float = 0.0 # Probabilidade de derrubar a conexão em vez de responder
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode("utf-8") + b"\0\0"
+    return struct.pack("<i", len(payload)) + payload
+
+class FakeRconServer:
+    """
+    Servidor Source RCON em processo, para os benchmarks. Autentica com `password`,
+    responde cada comando com `handler` depois do atraso configurado e, com a
+    probabilidade de `behavior.failure_rate`, fecha a conexão sem responder.
+    Enquanto `online` for False as conexões são recusadas (fechadas na hora), como
+    um servidor de jogo que ainda não abriu o RCON.
+    """
+    def __init__(self, password: str, handler: CommandHandler, behavior: RconBehavior | None = None,
+                 host: str = "127.0.0.1", port: int = 0, seed: int | None = None):
+        self.password = password
+        self.handler = handler
+        self.behavior = behavior or RconBehavior()
+        self.host = host
+        self.port = port
+        self.online = True
+        self.commands = 0
+        self.failures = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._server: asyncio.AbstractServer | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> int:
+        """Começa a aceitar conexões e retorna a porta escolhida."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        if self._server:
+            await self._server.wait_closed()
+            self._server = None
+
+    def disconnect_all(self):
+        """Derruba as conexões abertas, como um servidor que reiniciou."""
+        for writer in list(self._writers):
+            writer.close()
+
+    async def _delay(self):
+        delay = self.behavior.latency + (self._random.uniform(0, self.behavior.jitter) if self.behavior.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _read_packet(self, reader: asyncio.StreamReader) -> tuple[int, int, str]:
+        (length,) = struct.unpack("<i", await reader.readexactly(4))
+        if not 10 <= length <= MAX_PACKET:
+            raise ValueError(f"tamanho de pacote inválido: {length}")
+        data = await reader.readexactly(length)
+        request_id, packet_type = struct.unpack_from("<ii", data)
+        return request_id, packet_type, data[8:-2].decode("utf-8", errors="replace")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if not self.online:
+            writer.close()
+            return
+        self.connections += 1
+        self._writers.add(writer)
+        authenticated = False
+        try:
+            while True:
+                request_id, packet_type, body = await self._read_packet(reader)
+                await self._delay()
+                if self.behavior.failure_rate and self._random.random() < self.behavior.failure_rate:
+                    self.failures += 1
+                    break
+
+                if packet_type == TYPE_AUTH:
+                    authenticated = body == self.password
+                    # Como o Minecraft: um único pacote, com id -1 se a senha estiver errada
+                    writer.write(encode_packet(request_id if authenticated else -1, TYPE_AUTH_RESPONSE, ""))
+                elif packet_type == TYPE_COMMAND and authenticated:
+                    self.commands += 1
+                    writer.write(encode_packet(request_id, TYPE_RESPONSE, self.handler(body)))
+                else:
+                    writer.write(encode_packet(-1, TYPE_RESPONSE, ""))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
@@ -0,0 +1,98 @@
+# bench/mock_interaction.py
+import time
+from dataclasses import dataclass, field
+from typing import Any, List
+
+class MockMessage:
+    """Mensagem enviada por um handler; guarda as edições feitas nela."""
+
+    def __init__(self, content: str | None = None, **kwargs):
+        self.content = content
+        self.kwargs = kwargs
+        self.edits: List[dict] = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+        return self
+
+class MockResponse:
+    def __init__(self, interaction: "MockInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, ephemeral: bool = False, thinking: bool = False):
+        self._done = True
+        self._interaction.record("defer")
+
+    async def send_message(self, content: str | None = None, **kwargs):
+        self._done = True
+        self._interaction.record("response", MockMessage(content, **kwargs))
+
+class MockFollowup:
+    def __init__(self, interaction: "MockInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content: str | None = None, *, wait: bool = False, **kwargs) -> MockMessage:
+        message = MockMessage(content, **kwargs)
+        self._interaction.record("followup", message)
+        return message
+
+@dataclass
+class MockUser:
+    id: int = 1
+    name: str = "bench"
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+@dataclass
+class MockInteraction:
+    """
+    O mínimo de discord.Interaction usado pelos handlers do ManagementCog. Registra
+    cada resposta com o instante em que foi enviada, para medir o tempo até a
+    primeira resposta além do tempo total do handler.
+    """
+    user: MockUser = field(default_factory=MockUser)
+    command: Any = None
+    channel: Any = None
+    events: List[tuple[float, str, Any]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.created = time.perf_counter()
+        self.response = MockResponse(self)
+        self.followup = MockFollowup(self)
+
+    def record(self, kind: str, payload: Any = None):
+        self.events.append((time.perf_counter(), kind, payload))
+
+    @property
+    def messages(self) -> List[MockMessage]:
+        return [payload for _, kind, payload in self.events if isinstance(payload, MockMessage)]
+
+class MockNotifications:
+    """Substitui o NotificationDispatcher do bot, só contando os avisos."""
+
+    def __init__(self):
+        self.enqueued: List[Any] = []
+        self.sent = 0
+
+    def enqueue(self, notification) -> bool:
+        self.enqueued.append(notification)
+        return True
+
+    async def send(self, channel_id: int, **kwargs):
+        self.sent += 1
+
+class MockBot:
+    def __init__(self):
+        self.notifications = MockNotifications()
+
+    def get_channel(self, channel_id: int):
+        return None
+
+    def get_cog(self, name: str):
+        return None
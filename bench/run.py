@@ -0,0 +1,388 @@
+# bench/run.py
+"""
+Benchmark local do gerenciador: sobe N servidores falsos (processos bench/dummy_game.py
+com RCON falso em processo) e mede os handlers do ManagementCog e o ServerManager
+com uma interação simulada, para 1 a 100 servidores. Roda inteiro em uma máquina
+Linux, sem Discord nem jogos instalados. A partir da raiz do repositório:
+
+    python -m bench.run --servers 1,10,50,100 --latency 0.005 --jitter 0.01
+    python -m bench.run --json atual.json --baseline anterior.json # falha se p90 piorar
+    python -m bench.run --nodes 3 # servidores distribuídos entre 3 agentes de nó locais
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+from bench.fake_rcon import FakeRconServer, RconBehavior
+from bench.mock_interaction import MockBot, MockInteraction
+
+log = logging.getLogger("bench")
+
+DUMMY_GAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dummy_game.py")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "bench"
+NODE_TOKEN = "bench-node-token"
+GAMES = ("minecraft", "factorio")
+LOG_FILES = {"minecraft": "logs/latest.log", "factorio": "factorio-current.log"}
+STATUS_COMMANDS = {"minecraft": "list", "factorio": "/players online"}
+
+@dataclass
+class Result:
+    scenario: str
+    servers: int
+    samples: int
+    errors: int
+    p50: float # ms
+    p90: float
+    p99: float
+    max: float
+    throughput: float # operações por segundo
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil por posição mais próxima; `values` já ordenado."""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+def summarize(scenario: str, servers: int, latencies: List[float], errors: int, elapsed: float) -> Result:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return Result(
+        scenario=scenario,
+        servers=servers,
+        samples=len(ordered),
+        errors=errors,
+        p50=ms(percentile(ordered, 50)),
+        p90=ms(percentile(ordered, 90)),
+        p99=ms(percentile(ordered, 99)),
+        max=ms(ordered[-1]) if ordered else 0.0,
+        throughput=round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+    )
+
+def fake_response(game: str, command: str) -> str:
+    if command == "list":
+        return "There are 2 of a max of 20 players online: Steve, Alex"
+    if command == "/players online":
+        return "Online players (2):\n  alice (online)\n  bob (online)"
+    if command == "stop":
+        return "Stopping the server"
+    return ""
+
+class Harness:
+    """Monta a configuração, os RCONs falsos e o cog, e executa os cenários."""
+
+    def __init__(self, args: argparse.Namespace, workdir: str):
+        self.args = args
+        self.workdir = workdir
+        self.server_ids: List[str] = []
+        self.rcon: Dict[str, FakeRconServer] = {}
+        self.node_ports: List[int] = []
+        self.agents: List[subprocess.Popen] = []
+
+    def _start_agents(self):
+        """Sobe --nodes agentes de nó em portas livres de localhost, cada um com seu arquivo de estado."""
+        env = {**os.environ, "NODE_TOKEN": NODE_TOKEN}
+        for i in range(self.args.nodes):
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                port = probe.getsockname()[1]
+            output = open(os.path.join(self.workdir, f"agent-{i}.log"), "wb")
+            self.agents.append(subprocess.Popen(
+                [sys.executable, "-m", "services.node_agent", "--listen", "127.0.0.1", "--port", str(port),
+                 "--state-file", os.path.join(self.workdir, f"agent-{i}.json")],
+                cwd=REPO_ROOT, env=env, stdout=output, stderr=subprocess.STDOUT,
+            ))
+            output.close()
+            self.node_ports.append(port)
+
+    async def setup(self, count: int):
+        behavior = RconBehavior(self.args.latency, self.args.jitter, self.args.failure_rate)
+        for i in range(count):
+            game = GAMES[i % len(GAMES)]
+            server_id = f"{game}-{i:03d}"
+            fake = FakeRconServer(PASSWORD, functools.partial(self._handle_command, server_id, game), behavior, seed=i)
+            fake.online = False # Só abre o RCON depois do marcador de pronto, como o jogo real
+            await fake.start()
+            self.server_ids.append(server_id)
+            self.rcon[server_id] = fake
+
+        # A configuração precisa existir antes de importar os serviços (que a leem no import)
+        from core.config import update_config
+        self._start_agents()
+        update_config(self._build_config())
+
+        from discord import app_commands
+        from bot.cogs.management import ManagementCog
+        from services.server_manager import server_manager
+        self.choice = app_commands.Choice
+        self.manager = server_manager
+        self.cog = ManagementCog(MockBot())
+        self.manager.output_listeners.append(self._on_output)
+        self.manager.exit_listeners.append(self._on_exit)
+        if self.agents:
+            self.manager.start_nodes(NODE_TOKEN)
+            for node_id, node in self.manager.nodes.items():
+                if not await node.wait_connected(15):
+                    raise RuntimeError(f"O agente '{node_id}' não respondeu; veja {self.workdir}/agent-*.log")
+                await node.refresh_load()
+        if self.args.background:
+            await self.cog.cog_load()
+
+    def _build_config(self):
+        from core.config import BotConfig, HostConfig, MainConfig, NodeConfig, RconConfig, RestartPolicy, ServerConfig
+        nodes = {f"node-{i}": NodeConfig(host="127.0.0.1", port=port) for i, port in enumerate(self.node_ports)}
+        servers = {}
+        for server_id, fake in self.rcon.items():
+            game = server_id.split("-")[0]
+            path = os.path.join(self.workdir, server_id)
+            os.makedirs(path, exist_ok=True)
+            servers[server_id] = ServerConfig(
+                name=f"Bench {server_id}",
+                game_type=game,
+                path=path,
+                start_command=[
+                    sys.executable, DUMMY_GAME, game,
+                    "--boot-time", str(self.args.boot_time),
+                    "--chatter", str(self.args.chatter),
+                    "--log-file", LOG_FILES[game],
+                ],
+                mention_role_id=0,
+                rcon=RconConfig(host=fake.host, port=fake.port, password=PASSWORD),
+                restart=RestartPolicy(enabled=False),
+                # Com agentes, a escolha do nó é a do node: auto, só entre os agentes
+                node="auto" if nodes else "local",
+            )
+        return MainConfig(
+            bot=BotConfig(guild_id=0, notification_channel_id=0, admin_notification_channel_id=0, authorized_role_id=0),
+            servers=servers,
+            host=HostConfig(max_concurrent_boots=len(servers), boot_stagger=self.args.boot_stagger, auto_placement=not nodes),
+            nodes=nodes,
+            groups={"bench": list(servers)},
+            state_file=os.path.join(self.workdir, "state.json"),
+            command_fingerprint_file=os.path.join(self.workdir, "commands.sha256"),
+        )
+
+    def _running(self, server_id: str):
+        for server in self.manager.get_all_running_servers():
+            if server.server_id == server_id:
+                return server
+        return None
+
+    def _handle_command(self, server_id: str, game: str, command: str) -> str:
+        if command in ("stop", "/quit"):
+            # Responde primeiro e só então derruba o processo, como o jogo faz
+            asyncio.get_running_loop().call_soon(self._terminate, server_id)
+        return fake_response(game, command)
+
+    def _terminate(self, server_id: str):
+        server = self._running(server_id)
+        if server:
+            pid = server.process.pid if server.process else server.remote_pid
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _on_output(self, server, line: str):
+        from services.game_server import load_game_type
+        fake = self.rcon.get(server.server_id)
+        # Servidores remotos não têm o padrão de pronto; ele fica na classe do jogo, no agente
+        pattern = load_game_type(server.config.game_type).READY_PATTERN
+        if fake and not fake.online and pattern and pattern.search(line):
+            fake.online = True
+
+    def _on_exit(self, server, returncode, crashed):
+        fake = self.rcon.get(server.server_id)
+        if fake:
+            fake.online = False
+            fake.disconnect_all()
+
+    async def _call(self, handler, *args, **kwargs) -> tuple[float, MockInteraction, bool]:
+        interaction = MockInteraction()
+        started = time.perf_counter()
+        try:
+            await handler(self.cog, interaction, *args, **kwargs)
+            ok = not any((message.content or "").startswith(("❌", "⚠️")) for message in interaction.messages)
+        except Exception:
+            log.exception(f"Erro no handler {handler.__name__}")
+            ok = False
+        return time.perf_counter() - started, interaction, ok
+
+    async def _concurrently(self, scenario: str, ids: List[str], handler, **kwargs) -> Result:
+        started = time.perf_counter()
+        calls = await asyncio.gather(*(
+            self._call(handler, self.choice(name=sid, value=sid), **kwargs) for sid in ids
+        ))
+        elapsed = time.perf_counter() - started
+        return summarize(scenario, len(ids), [latency for latency, _, _ in calls], sum(not ok for _, _, ok in calls), elapsed)
+
+    async def scenario_start(self, ids: List[str]) -> Result:
+        return await self._concurrently("start", ids, self.cog.start.callback)
+
+    async def scenario_stop(self, ids: List[str]) -> Result:
+        return await self._concurrently("stop", ids, self.cog.stop.callback)
+
+    async def scenario_bulk(self, ids: List[str], handler, name: str) -> Result:
+        started = time.perf_counter()
+        latency, interaction, ok = await self._call(handler, ",".join(ids))
+        embeds = [edit.get("embed") for message in interaction.messages for edit in message.edits]
+        final = embeds[-1].description if embeds and embeds[-1] else ""
+        errors = final.count("❌") + final.count("⚠️") + (0 if ok else 1)
+        return summarize(name, len(ids), [latency], errors, time.perf_counter() - started)
+
+    async def scenario_rcon(self, ids: List[str]) -> Result:
+        from core.errors import RconConnectionError
+        latencies: List[float] = []
+        errors = 0
+
+        async def hammer(server_id: str):
+            nonlocal errors
+            pool = self.manager.get_server(server_id).rcon
+            command = STATUS_COMMANDS[server_id.split("-")[0]]
+            for _ in range(self.args.rcon_ops):
+                started = time.perf_counter()
+                try:
+                    await pool.send(command)
+                except RconConnectionError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(hammer(server_id) for server_id in ids))
+        return summarize("rcon", len(ids), latencies, errors, time.perf_counter() - started)
+
+    async def scenario_status(self, ids: List[str]) -> List[Result]:
+        cog_latencies, direct_latencies = [], []
+        cog_errors = direct_errors = 0
+        started = time.perf_counter()
+        for _ in range(self.args.rounds):
+            latency, interaction, ok = await self._call(self.cog.status.callback)
+            cog_latencies.append(latency)
+            embed = interaction.messages[-1].kwargs.get("embed") if interaction.messages else None
+            fields = embed.fields if embed else []
+            cog_errors += (0 if ok else 1) + sum(not field.value.startswith("🟢") for field in fields)
+        cog_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(self.args.rounds):
+            round_started = time.perf_counter()
+            statuses = await self.manager.collect_statuses(self.manager.get_all_running_servers())
+            direct_latencies.append(time.perf_counter() - round_started)
+            direct_errors += sum(not status.startswith("🟢") for _, status in statuses)
+        direct_elapsed = time.perf_counter() - started
+        return [
+            summarize("status (/status)", len(ids), cog_latencies, cog_errors, cog_elapsed),
+            summarize("status (direto)", len(ids), direct_latencies, direct_errors, direct_elapsed),
+        ]
+
+    async def run(self, counts: List[int]) -> List[Result]:
+        results: List[Result] = []
+        for count in counts:
+            ids = self.server_ids[:count]
+            print(f"→ {count} servidor(es)...", file=sys.stderr)
+            results.append(await self.scenario_start(ids))
+            results.append(await self.scenario_rcon(ids))
+            results.extend(await self.scenario_status(ids))
+            results.append(await self.scenario_stop(ids))
+            if self.args.bulk:
+                results.append(await self.scenario_bulk(ids, self.cog.start_many.callback, "start_many"))
+                results.append(await self.scenario_bulk(ids, self.cog.stop_many.callback, "stop_many"))
+            await self._stop_all()
+        return results
+
+    async def _stop_all(self):
+        for server in self.manager.get_all_running_servers():
+            if server.process is None:
+                await server.stop(force=True)
+                continue
+            server.stop_requested = True
+            await server.process.kill()
+
+    async def close(self):
+        await self._stop_all()
+        if self.args.background:
+            await self.cog.cog_unload()
+        await self.manager.close()
+        await asyncio.gather(*(fake.close() for fake in self.rcon.values()))
+        for agent in self.agents:
+            agent.terminate()
+        for agent in self.agents:
+            await asyncio.to_thread(agent.wait)
+
+def print_table(results: List[Result]):
+    header = f"{'servidores':>10}  {'cenário':<18} {'amostras':>8} {'erros':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'máx ms':>9} {'ops/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r.servers:>10}  {r.scenario:<18} {r.samples:>8} {r.errors:>6} {r.p50:>9.2f} {r.p90:>9.2f} {r.p99:>9.2f} {r.max:>9.2f} {r.throughput:>9.2f}")
+
+def compare(results: List[Result], baseline_path: str, tolerance: float, floor_ms: float) -> List[str]:
+    """Lista os cenários cujo p90 piorou mais que `tolerance` em relação à linha de base."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["scenario"], r["servers"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get((r.scenario, r.servers))
+        if base and r.p90 > base["p90"] * (1 + tolerance) and r.p90 - base["p90"] > floor_ms:
+            regressions.append(f"{r.scenario} com {r.servers} servidor(es): p90 {base['p90']:.2f} → {r.p90:.2f} ms")
+    return regressions
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark local do BSSM com servidores e RCON falsos.")
+    parser.add_argument("--servers", default="1,10,25,50,100", help="Quantidades de servidores, separadas por vírgula")
+    parser.add_argument("--latency", type=float, default=0.002, help="Atraso base de cada resposta RCON (s)")
+    parser.add_argument("--jitter", type=float, default=0.003, help="Variação máxima somada ao atraso RCON (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probabilidade de o RCON derrubar a conexão")
+    parser.add_argument("--boot-time", type=float, default=1.0, help="Tempo de boot dos servidores falsos (s)")
+    parser.add_argument("--boot-stagger", type=float, default=0.0, help="host.boot_stagger usado no benchmark (s)")
+    parser.add_argument("--chatter", type=float, default=0.0, help="Linhas de console por segundo de cada servidor")
+    parser.add_argument("--rcon-ops", type=int, default=50, help="Comandos RCON por servidor no cenário 'rcon'")
+    parser.add_argument("--rounds", type=int, default=20, help="Execuções do /status por quantidade de servidores")
+    parser.add_argument("--bulk", action="store_true", help="Mede também /start_many e /stop_many")
+    parser.add_argument("--nodes", type=int, default=0, help="Roda os servidores em N agentes de nó locais (node: auto)")
+    parser.add_argument("--background", action="store_true", help="Roda o poller e o coletor de métricas durante o benchmark")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    parser.add_argument("--baseline", help="Resultados anteriores (--json) para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Piora relativa de p90 tolerada contra a linha de base")
+    parser.add_argument("--floor-ms", type=float, default=2.0, help="Diferenças de p90 abaixo disso são tratadas como ruído")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+async def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    counts = sorted({int(value) for value in args.servers.split(",") if value.strip()})
+
+    with tempfile.TemporaryDirectory(prefix="bssm-bench-") as workdir:
+        harness = Harness(args, workdir)
+        await harness.setup(max(counts))
+        try:
+            results = await harness.run(counts)
+        finally:
+            await harness.close()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": [asdict(r) for r in results]}, f, indent=2)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance, args.floor_ms)
+        for regression in regressions:
+            print(f"REGRESSÃO: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
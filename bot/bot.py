@@ -1,21 +1,37 @@
 # bot/bot.py
+import time
+BOOT_STARTED = time.perf_counter() # Antes dos imports pesados, para medir o tempo de importação
+
 import discord
 from discord.ext import commands
 import asyncio
+import atexit
+import hashlib
+import json
 import logging
 import logging.handlers
+import queue
 
-from core.config import config, secrets
+from core.config import CONFIG_PATH, config, load_config, secrets
+from core.config_watcher import ConfigWatcher
 from core.errors import GameServerError
+from bot.notifications import NotificationDispatcher, Notification
+from services.server_manager import server_manager
+from services.crash_recovery import crash_recovery
+from services.diagnostics import diagnostics
 
-def setup_logging():
-    """Configura o sistema de logging."""
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Configura o sistema de logging. O event loop só enfileira os registros; a escrita
+    no console e no arquivo (inclusive a rotação) acontece na thread do QueueListener.
+    """
     log = logging.getLogger()
     log.setLevel(logging.INFO)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s: %(message)s')
 
     # Handler para o console
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s: %(message)s'))
+    console_handler.setFormatter(formatter)
     
     # Handler para arquivo (rotaciona o arquivo para não ficar gigante)
     file_handler = logging.handlers.RotatingFileHandler(
@@ -24,67 +40,182 @@ def setup_logging():
         maxBytes=32 * 1024 * 1024,  # 32 MiB
         backupCount=5,
     )
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s: %(message)s'))
-    
-    log.addHandler(console_handler)
-    log.addHandler(file_handler)
+    file_handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    # Garante que o que ainda está na fila seja escrito antes de o processo sair
+    atexit.register(listener.stop)
+    return listener
 
-setup_logging()
 log = logging.getLogger(__name__)
 
+class StartupTimer:
+    """Mede cada fase da inicialização e registra um resumo quando o bot fica pronto."""
+
+    def __init__(self, started: float):
+        self._started = self._last = started
+        self.phases: list[tuple[str, float]] = []
+        self.reported = False
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        self.reported = True
+        summary = ", ".join(f"{phase} {elapsed * 1000:.0f} ms" for phase, elapsed in self.phases)
+        log.info(f"Inicialização em {(self._last - self._started):.2f}s: {summary}")
+
 class GameServerBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
         super().__init__(command_prefix="!", intents=intents)
+        self.notifications = NotificationDispatcher(self)
+        self.config_watcher = ConfigWatcher(CONFIG_PATH, self.reload_config)
+        self.startup = StartupTimer(BOOT_STARTED)
+        self.startup.mark("imports e config")
+        # Erros dos slash commands passam pela árvore, não pelos eventos do Bot
+        self.tree.on_error = self.on_app_command_error
 
     async def setup_hook(self):
+        self.startup.mark("login")
+        # Readota servidores que continuaram rodando enquanto o bot estava fora
+        server_manager.rehydrate()
+        self.startup.mark("readoção de servidores")
+        # Servidores em nós remotos voltam a ser gerenciados quando cada agente conecta
+        server_manager.start_nodes(secrets.node_token)
+        self.notifications.start()
+        await diagnostics.start(config.diagnostics)
         log.info("Carregando extensões (Cogs)...")
         await self.load_extension("bot.cogs.management")
+        self.startup.mark("cogs")
+        await self.sync_commands()
+        self.startup.mark("sincronização de comandos")
+        self.config_watcher.start()
+
+    def command_fingerprint(self, guild: discord.Object) -> str:
+        """Hash estável da árvore de comandos registrada para a guild."""
+        payload = []
+        for command in self.tree.get_commands(guild=guild):
+            try:
+                payload.append(command.to_dict(self.tree))
+            except TypeError: # discord.py < 2.4 não recebe a árvore
+                payload.append(command.to_dict())
+        data = json.dumps({"application": self.application_id, "guild": guild.id, "commands": payload}, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    async def sync_commands(self, force: bool = False):
+        """Sincroniza os comandos com o Discord apenas se a árvore mudou desde a última vez."""
+        guild = discord.Object(id=config.bot.guild_id)
+        fingerprint = self.command_fingerprint(guild)
+        path = config.command_fingerprint_file
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                previous = f.read().strip()
+        except OSError:
+            previous = None
+
+        if not force and fingerprint == previous:
+            log.info("Árvore de comandos inalterada; sincronização com o Discord ignorada.")
+            return
+
         log.info("Sincronizando comandos com o Discord. Isso pode levar um minuto...")
-        await self.tree.sync(guild=discord.Object(id=config.bot.guild_id))
+        await self.tree.sync(guild=guild)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(fingerprint)
+        except OSError as e:
+            log.warning(f"Não foi possível gravar a impressão digital dos comandos: {e}")
         log.info("Sincronização concluída.")
 
+    async def reload_config(self):
+        """Revalida o config.yaml e aplica apenas o que mudou, sem reiniciar o bot."""
+        try:
+            new_config = await asyncio.to_thread(load_config)
+        except Exception as e:
+            log.error(f"config.yaml inválido; mantendo a configuração atual. Erro: {e}")
+            return
+
+        if new_config.bot != config.bot:
+            log.warning("Mudanças na seção 'bot' do config.yaml só valem após reiniciar o bot.")
+            new_config.bot = config.bot
+
+        diff = server_manager.apply_config(new_config)
+        log.info(f"Configuração recarregada: adicionados={diff.added} atualizados={diff.updated} removidos={diff.removed}")
+
+    async def close(self):
+        # Cancela reinícios pendentes e encerra as conexões RCON abertas antes de desconectar do Discord
+        await self.config_watcher.stop()
+        await crash_recovery.close()
+        await server_manager.close()
+        await self.notifications.close()
+        await diagnostics.stop()
+        await super().close()
+
     async def on_ready(self):
         log.info(f'Bot conectado como {self.user} (ID: {self.user.id})')
+        if not self.startup.reported:
+            self.startup.mark("conexão ao gateway")
+            self.startup.report()
 
     async def on_app_command_error(self, interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
         """Handler global para erros em comandos."""
         original_error = getattr(error, 'original', error)
+        if isinstance(error, discord.app_commands.TransformerError) and error.__cause__ is not None:
+            # Erros de conversão de parâmetro (p.ex. servidor inexistente) chegam embrulhados
+            original_error = error.__cause__
+        started = interaction.extras.get("started")
+        if started is not None and interaction.command is not None:
+            diagnostics.observe_command(interaction.command.qualified_name, time.perf_counter() - started, ok=False)
         
+        async def reply(message: str):
+            if interaction.response.is_done():
+                await interaction.followup.send(message, ephemeral=True)
+            else:
+                await interaction.response.send_message(message, ephemeral=True)
+
         if isinstance(original_error, discord.app_commands.CheckFailure):
-            await interaction.response.send_message("Você não tem permissão para usar este comando.", ephemeral=True)
+            await reply("Você não tem permissão para usar este comando.")
             return
 
         if isinstance(original_error, GameServerError):
-            await interaction.response.send_message(f"❌ {original_error}", ephemeral=True)
+            await reply(f"❌ {original_error}")
             log.warning(f"Erro de negócio tratado para o usuário {interaction.user}: {original_error}")
             return
 
         # Para todos os outros erros, logamos o traceback completo
         log.exception(f"Erro inesperado no comando /{interaction.command.name}", exc_info=original_error)
-
-        user_message = "Ocorreu um erro inesperado. A equipe de administração foi notificada."
-        if not interaction.response.is_done():
-            await interaction.response.send_message(user_message, ephemeral=True)
-        else:
-            await interaction.followup.send(user_message, ephemeral=True)
+        await reply("Ocorreu um erro inesperado. A equipe de administração foi notificada.")
         
-        admin_channel = self.get_channel(config.bot.admin_notification_channel_id)
-        if admin_channel:
-            embed = discord.Embed(
-                title="🚨 Erro Crítico no Bot",
-                description=f"Comando: `/{interaction.command.name}`\nUsuário: {interaction.user.mention}",
-                color=discord.Color.dark_red()
-            )
-            embed.add_field(name="Erro", value=f"```{type(original_error).__name__}: {original_error}```")
-            await admin_channel.send(embed=embed)
+        # Vai pela fila de avisos: uma rajada de erros vira uma mensagem só e não atrasa a resposta
+        self.notifications.enqueue(Notification(
+            channel_id=config.bot.admin_notification_channel_id,
+            kind="error",
+            title=f"🚨 Erro Crítico no Bot: /{interaction.command.name}",
+            description=f"Usuário: {interaction.user.mention}\n```{type(original_error).__name__}: {original_error}```",
+            color=discord.Color.dark_red(),
+            group_title="🚨 {count} erros críticos no bot",
+        ))
 
 async def main():
     bot = GameServerBot()
-    await bot.start(secrets.discord_bot_token)
+    # O context manager garante que bot.close() rode (e feche o pool RCON) mesmo em Ctrl+C
+    async with bot:
+        await bot.start(secrets.discord_bot_token)
 
-if __name__ == "__main__":
+def run():
+    """Configura o logging e roda o bot até ele ser desligado. Chamado por bssm.py."""
+    setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        log.info("Bot desligado pelo usuário.")
\ No newline at end of file
+        log.info("Bot desligado pelo usuário.")
+
+if __name__ == "__main__":
+    # Funciona, mas os processos do pool de backups (spawn) reimportariam este módulo
+    # inteiro; prefira `python bssm.py`
+    run()
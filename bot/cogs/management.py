@@ -2,96 +2,394 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import logging
 import asyncio
+import logging
+import time
 
 from core.config import config
-from core.errors import GameServerError
+from core.errors import GameServerError, ServerNotFoundError
+from bot.notifications import Notification
 from services.game_server import GameServer
 from services.server_manager import server_manager
+from services.status_poller import status_poller
+from services.crash_recovery import crash_recovery
+from services.idle_monitor import idle_monitor
+from services.console_relay import console_relay, pack_lines
+from services.resource_sampler import resource_sampler, sparkline
+from services.diagnostics import Histogram, diagnostics
+from services.backup_manager import backup_manager
 
 log = logging.getLogger(__name__)
 
-def get_server_choices():
-    return [
-        app_commands.Choice(name=server.name, value=server_id)
-        for server_id, server in config.servers.items()
-    ]
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+METRIC_LABELS = {
+    "cpu_percent": ("CPU", lambda v: f"{v:.1f}%"),
+    "rss_bytes": ("Memória (RSS)", format_bytes),
+    "threads": ("Threads", lambda v: f"{v:.0f}"),
+    "open_fds": ("FDs abertos", lambda v: f"{v:.0f}"),
+    "read_bps": ("Leitura de disco", lambda v: f"{format_bytes(v)}/s"),
+    "write_bps": ("Escrita em disco", lambda v: f"{format_bytes(v)}/s"),
+}
+METRIC_WINDOWS = [("1m", 60), ("15m", 900), ("1h", 3600)]
+
+def format_seconds(value: float) -> str:
+    return f"{value * 1000:.0f} ms" if value < 1 else f"{value:.1f} s"
+
+def format_histogram(histogram: Histogram) -> str:
+    """Resumo compacto de um histograma: p50 / p90 / p99 / máximo."""
+    return " / ".join(format_seconds(v) for v in (
+        histogram.quantile(0.5), histogram.quantile(0.9), histogram.quantile(0.99), histogram.max
+    ))
+
+def truncate_lines(lines: list[str], limit: int = 1024) -> str:
+    """Junta as linhas que couberem em um campo de embed."""
+    text = ""
+    for line in lines:
+        if len(text) + len(line) + 1 > limit:
+            break
+        text += line + "\n"
+    return text or "Sem dados ainda."
+
+def describe_backup(meta: dict) -> str:
+    """Resumo de um snapshot com as estatísticas de vazão, para os comandos de backup."""
+    stats = meta["stats"]
+    return (
+        f"{stats['files_read']}/{stats['files']} arquivos lidos • {format_bytes(stats['bytes_read'])} "
+        f"a {stats['read_mibps']:.1f} MiB/s\n"
+        f"Novos no repositório: {format_bytes(stats['bytes_stored'])} "
+        f"({format_bytes(stats['bytes_new'])} antes da compressão) de {format_bytes(stats['bytes_total'])}\n"
+        f"Duração: {format_seconds(stats['duration'])} • salvamentos pausados por {format_seconds(stats['paused_seconds'])}"
+    )
+
+class ServerChoice(app_commands.Transformer):
+    """
+    Parâmetro de servidor com sugestões tiradas da configuração atual. Ao contrário de
+    choices fixas no decorator, acompanha recarregamentos do config.yaml sem
+    re-registrar os comandos. Entrega um Choice (nome exibido e ID) ao comando.
+    """
+    async def transform(self, interaction: discord.Interaction, value: str) -> app_commands.Choice[str]:
+        server = config.servers.get(value)
+        if server is None:
+            raise ServerNotFoundError(f"Servidor '{value}' não encontrado na configuração.")
+        return app_commands.Choice(name=server.name, value=value)
+
+    async def autocomplete(self, interaction: discord.Interaction, value: str) -> list[app_commands.Choice[str]]:
+        needle = value.lower()
+        return [
+            app_commands.Choice(name=server.name, value=server_id)
+            for server_id, server in config.servers.items()
+            if needle in server_id.lower() or needle in server.name.lower()
+        ][:25]
+
+ServerParam = app_commands.Transform[app_commands.Choice[str], ServerChoice]
+
+async def targets_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Sugere grupos e servidores para o último item de uma lista separada por vírgulas."""
+    head, _, last = current.rpartition(",")
+    prefix = f"{head.strip()}, " if head.strip() else ""
+    chosen = {token.strip() for token in head.split(",")}
+    needle = last.strip().lower()
+
+    options = [(group, f"Grupo ({len(members)} servidores)") for group, members in config.groups.items()]
+    options += [(server_id, server.name) for server_id, server in config.servers.items()]
+    choices = []
+    for value, label in options:
+        if value in chosen or (needle not in value.lower() and needle not in label.lower()):
+            continue
+        choices.append(app_commands.Choice(name=f"{prefix}{value} — {label}"[:100], value=f"{prefix}{value}"[:100]))
+    return choices[:25]
+
+async def snapshot_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """Sugere os snapshots mais recentes do servidor escolhido no mesmo comando."""
+    server_id = getattr(interaction.namespace, "game", None)
+    if not server_id:
+        return []
+    snapshots = [s for s in reversed(backup_manager.snapshots(server_id)) if current in s]
+    return [app_commands.Choice(name=snapshot_id, value=snapshot_id) for snapshot_id in snapshots[:25]]
+
+class BulkProgress:
+    """
+    Um único embed que acompanha uma operação em lote e é editado conforme cada
+    servidor avança. As edições são agrupadas para não esbarrar no rate limit.
+    """
+    EDIT_INTERVAL = 1.5
+
+    def __init__(self, title: str, server_ids: list[str]):
+        self.title = title
+        self.states = {server_id: "⏳ Aguardando" for server_id in server_ids}
+        self.finished: set[str] = set()
+        self.message: discord.WebhookMessage | discord.Message | None = None
+        self._dirty = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def embed(self, done: bool = False) -> discord.Embed:
+        lines = [f"**{config.servers[sid].name if sid in config.servers else sid}**: {state}" for sid, state in self.states.items()]
+        failed = any(state.startswith("❌") for state in self.states.values())
+        color = discord.Color.blurple() if not done else (discord.Color.orange() if failed else discord.Color.green())
+        embed = discord.Embed(title=self.title, description="\n".join(lines)[:4096], color=color)
+        embed.set_footer(text=f"{len(self.finished)}/{len(self.states)} concluído(s)" + (" • finalizado" if done else ""))
+        return embed
+
+    async def begin(self, interaction: discord.Interaction):
+        self.message = await interaction.followup.send(embed=self.embed(), wait=True)
+        self._task = asyncio.create_task(self._run())
+
+    def update(self, server_id: str, state: str, finished: bool = False):
+        self.states[server_id] = state
+        if finished:
+            self.finished.add(server_id)
+        self._dirty.set()
+
+    async def finish(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self._edit(done=True)
+
+    async def _edit(self, done: bool = False):
+        try:
+            await self.message.edit(embed=self.embed(done))
+        except discord.HTTPException as e:
+            if not isinstance(self.message, discord.WebhookMessage) or self.message.channel is None:
+                log.warning(f"Falha ao atualizar o progresso da operação em lote: {e}")
+                return
+            # O token da interação expira em 15 minutos; depois disso a mensagem é editada pelo canal
+            try:
+                self.message = await self.message.channel.fetch_message(self.message.id)
+                await self.message.edit(embed=self.embed(done))
+            except discord.HTTPException as e:
+                log.warning(f"Falha ao atualizar o progresso da operação em lote: {e}")
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            await self._edit()
+            await asyncio.sleep(self.EDIT_INTERVAL)
 
 class ManagementCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    async def notify_status_change(self, server_instance: 'GameServer', online: bool):
-        """Envia uma notificação para o canal apropriado sobre a mudança de status."""
-        channel_id = config.bot.notification_channel_id
-        channel = self.bot.get_channel(channel_id)
-        if not channel:
-            log.warning(f"Canal de notificação com ID {channel_id} não encontrado.")
-            return
+    async def cog_load(self):
+        status_poller.start()
+        resource_sampler.start()
+        crash_recovery.listeners.append(self.notify_admin)
+        idle_monitor.listeners.append(self.notify_idle_shutdown)
+        backup_manager.listeners.append(self.notify_backup_failure)
+        console_relay.start(self.send_to_channel)
+        backup_manager.start()
 
-        role_id = server_instance.config.mention_role_id
-        role = channel.guild.get_role(role_id)
-        
+    async def cog_unload(self):
+        crash_recovery.listeners.remove(self.notify_admin)
+        idle_monitor.listeners.remove(self.notify_idle_shutdown)
+        backup_manager.listeners.remove(self.notify_backup_failure)
+        await backup_manager.close()
+        await status_poller.stop()
+        await resource_sampler.stop()
+        await console_relay.stop()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Marca o início para o histograma de latência; o tempo até aqui é do Discord/gateway
+        interaction.extras["started"] = time.perf_counter()
+        diagnostics.discord_delay.observe(max(0.0, (discord.utils.utcnow() - interaction.created_at).total_seconds()))
+        return True
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command: app_commands.Command):
+        started = interaction.extras.get("started")
+        if started is not None:
+            diagnostics.observe_command(command.qualified_name, time.perf_counter() - started)
+
+    async def send_to_channel(self, channel_id: int, content: str):
+        # Passa pelo limite por canal do dispatcher, mas aguarda o envio (backpressure do relay)
+        await self.bot.notifications.send(channel_id, content=content)
+
+    async def notify_admin(self, server_instance: 'GameServer', message: str):
+        """Enfileira uma mensagem para o canal de administração (crashes, reinícios automáticos)."""
+        self.bot.notifications.enqueue(Notification(
+            channel_id=config.bot.admin_notification_channel_id,
+            kind="admin",
+            title=f"⚠️ {server_instance.config.name}",
+            description=message,
+            color=discord.Color.orange(),
+            group_title="⚠️ {count} avisos de servidores",
+        ))
+
+    async def notify_backup_failure(self, server_id: str, message: str):
+        server_config = config.servers.get(server_id)
+        self.bot.notifications.enqueue(Notification(
+            channel_id=config.bot.admin_notification_channel_id,
+            kind="admin",
+            title=f"💾 Backup falhou: {server_config.name if server_config else server_id}",
+            description=message,
+            color=discord.Color.orange(),
+            group_title="💾 {count} backups falharam",
+        ))
+
+    async def notify_idle_shutdown(self, server_instance: 'GameServer', reason: str):
+        await self.notify_status_change(server_instance, online=False, reason=reason)
+
+    async def notify_status_change(self, server_instance: 'GameServer', online: bool, reason: str | None = None):
+        """Enfileira uma notificação para o canal apropriado sobre a mudança de status."""
+        channel_id = config.bot.notification_channel_id
         if online:
-            embed = discord.Embed(
+            # Só menciona o cargo se ele existir no servidor; senão o aviso mostraria "@deleted-role"
+            guild = self.bot.get_guild(config.bot.guild_id)
+            role = guild.get_role(server_instance.config.mention_role_id) if guild else None
+            notification = Notification(
+                channel_id=channel_id,
+                kind="online",
                 title=f"✅ Servidor Online: {server_instance.config.name}",
                 description="O servidor já está disponível para conexão!",
-                color=discord.Color.green()
+                color=discord.Color.green(),
+                mention=role.mention if role else "",
+                group_title="✅ {count} servidores ficaram online",
             )
-            content = role.mention if role else ""
-            await channel.send(content=content, embed=embed)
         else:
-            embed = discord.Embed(
+            notification = Notification(
+                channel_id=channel_id,
+                kind="offline",
                 title=f"❌ Servidor Offline: {server_instance.config.name}",
-                description="O servidor foi desligado.",
-                color=discord.Color.red()
+                description=reason or "O servidor foi desligado.",
+                color=discord.Color.red(),
+                group_title="❌ {count} servidores foram desligados",
             )
-            await channel.send(embed=embed)
+        self.bot.notifications.enqueue(notification)
+
+    async def launch_server(self, server_id: str, on_queued=None, on_started=None) -> str | None:
+        """
+        Inicia um servidor passando pelo controle de admissão e espera ele ficar pronto.
+        Retorna None quando ele ficou pronto (o aviso público já foi enfileirado) ou uma
+        mensagem para quem pediu explicando por que não ficou.
+        """
+        server_instance = server_manager.get_server(server_id)
+        if server_instance.is_running():
+            return f"⚠️ O servidor **{server_instance.config.name}** já está em execução!"
+        if backup_manager.is_restoring(server_id):
+            return f"⚠️ Um backup de **{server_instance.config.name}** está sendo restaurado; tente quando terminar."
+        # Só aqui o host é escolhido (e, com node: auto, contado na carga do nó)
+        server_instance = server_manager.prepare_start(server_id)
+
+        async with server_manager.admission.boot(server_instance, on_queued=on_queued):
+            # Outro pedido pode ter iniciado o servidor enquanto este esperava na fila
+            server_instance = server_manager.prepare_start(server_id)
+            if server_instance.is_running():
+                return f"⚠️ O servidor **{server_instance.config.name}** já está em execução!"
+
+            message = await server_instance.start()
+            if on_started:
+                await on_started(message)
+
+            # A vaga de boot só é liberada quando o servidor aceitar conexões (marcador no log ou RCON respondendo)
+            ready = await server_instance.wait_until_ready()
+
+        if ready:
+            await self.notify_status_change(server_instance, online=True)
+            return None
+        if server_instance.is_running():
+            log.warning(f"Servidor '{server_instance.server_id}' não ficou pronto em {server_instance.config.ready_timeout:.0f}s.")
+            return f"⚠️ O servidor **{server_instance.config.name}** ainda não confirmou que está pronto."
+        return f"❌ O servidor **{server_instance.config.name}** encerrou durante a inicialização."
+
+    async def halt_server(self, server_id: str, force: bool = False) -> str:
+        """Para um servidor (ou cancela o reinício automático pendente) e retorna o resumo."""
+        server_instance = server_manager.get_server(server_id)
+        if not server_instance.is_running():
+            if crash_recovery.cancel(server_id):
+                return f"🛑 Reinício automático de **{server_instance.config.name}** cancelado."
+            return f"O servidor **{server_instance.config.name}** não está em execução."
+
+        message = await server_instance.stop(force=force)
+        # stop() só retorna depois que o processo terminou (ou foi encerrado à força)
+        if not server_instance.is_running():
+            await self.notify_status_change(server_instance, online=False)
+        return message
 
     @app_commands.command(name="start", description="Inicia um servidor de jogo.")
-    @app_commands.choices(game=get_server_choices())
     @app_commands.checks.has_role(config.bot.authorized_role_id)
-    async def start(self, interaction: discord.Interaction, game: app_commands.Choice[str]):
+    async def start(self, interaction: discord.Interaction, game: ServerParam):
         await interaction.response.defer(ephemeral=True)
-        server_instance = server_manager.get_server(game.value)
-        
-        # A lógica volta a ser simples, pois is_running() é confiável
-        if server_instance.is_running():
-            await interaction.followup.send(f"⚠️ O servidor **{server_instance.config.name}** já está em execução!", ephemeral=True)
-            return
+        server_name = config.servers[game.value].name
 
-        try:
-            message = await server_instance.start()
+        async def report_queue(position: int):
+            await interaction.followup.send(
+                f"⏳ **{server_name}** está na fila de inicialização (posição {position}), aguardando recursos do host.",
+                ephemeral=True,
+            )
+
+        async def report_started(message: str):
             await interaction.followup.send(message)
-            
-            # Pausa para dar tempo ao servidor de iniciar antes de notificar
-            await asyncio.sleep(15) 
-            if server_instance.is_running():
-                await self.notify_status_change(server_instance, online=True)
+
+        try:
+            warning = await self.launch_server(game.value, on_queued=report_queue, on_started=report_started)
         except GameServerError as e:
             await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+        if warning:
+            await interaction.followup.send(warning, ephemeral=True)
 
     @app_commands.command(name="stop", description="Para um servidor de jogo.")
-    @app_commands.choices(game=get_server_choices())
     @app_commands.checks.has_role(config.bot.authorized_role_id)
-    async def stop(self, interaction: discord.Interaction, game: app_commands.Choice[str], force: bool = False):
+    async def stop(self, interaction: discord.Interaction, game: ServerParam, force: bool = False):
         await interaction.response.defer(ephemeral=True)
-        server_instance = server_manager.get_server(game.value)
-        
-        # A verificação síncrona e simples volta a funcionar
-        if not server_instance.is_running():
-            await interaction.followup.send(f"O servidor **{server_instance.config.name}** não está em execução.")
-            return
+        await interaction.followup.send(await self.halt_server(game.value, force=force))
 
-        was_running = server_instance.is_running()
-        message = await server_instance.stop(force=force)
-        await interaction.followup.send(message)
-        
-        # Pausa para o servidor desligar
-        await asyncio.sleep(5)
-        if was_running and not server_instance.is_running():
-            await self.notify_status_change(server_instance, online=False)
+    async def run_bulk(self, interaction: discord.Interaction, title: str, server_ids: list[str], operation, stagger: float | None):
+        """Executa `operation` para cada servidor em lote e acompanha tudo em um único embed."""
+        progress = BulkProgress(title.format(count=len(server_ids)), server_ids)
+        await progress.begin(interaction)
+
+        async def on_result(server_id: str, result: str):
+            progress.update(server_id, result, finished=True)
+
+        try:
+            await server_manager.run_many(server_ids, lambda server_id: operation(server_id, progress), stagger=stagger, on_result=on_result)
+        finally:
+            await progress.finish()
+
+    @app_commands.command(name="start_many", description="Inicia vários servidores, ou um grupo, de uma vez.")
+    @app_commands.describe(targets="IDs de servidores e/ou grupos, separados por vírgula", stagger="Segundos entre o início de cada servidor")
+    @app_commands.autocomplete(targets=targets_autocomplete)
+    @app_commands.checks.has_role(config.bot.authorized_role_id)
+    async def start_many(self, interaction: discord.Interaction, targets: str, stagger: app_commands.Range[float, 0, 600] | None = None):
+        server_ids = server_manager.resolve_targets(targets)
+        await interaction.response.defer()
+
+        async def start_one(server_id: str, progress: BulkProgress) -> str:
+            async def report_queue(position: int):
+                progress.update(server_id, f"⏳ Na fila do host (posição {position})")
+
+            async def report_started(message: str):
+                progress.update(server_id, "🔄 Iniciado, aguardando ficar pronto")
+
+            progress.update(server_id, "🔄 Iniciando")
+            warning = await self.launch_server(server_id, on_queued=report_queue, on_started=report_started)
+            return warning or "✅ Pronto"
+
+        await self.run_bulk(interaction, "🚀 Iniciando {count} servidor(es)", server_ids, start_one, stagger)
+
+    @app_commands.command(name="stop_many", description="Para vários servidores, ou um grupo, de uma vez.")
+    @app_commands.describe(targets="IDs de servidores e/ou grupos, separados por vírgula", stagger="Segundos entre a parada de cada servidor")
+    @app_commands.autocomplete(targets=targets_autocomplete)
+    @app_commands.checks.has_role(config.bot.authorized_role_id)
+    async def stop_many(self, interaction: discord.Interaction, targets: str, force: bool = False,
+                        stagger: app_commands.Range[float, 0, 600] | None = None):
+        # Resolvido antes do defer para que um alvo inválido vire a resposta de erro do handler global
+        server_ids = server_manager.resolve_targets(targets)
+        await interaction.response.defer()
+
+        async def stop_one(server_id: str, progress: BulkProgress) -> str:
+            progress.update(server_id, "🔄 Parando")
+            return await self.halt_server(server_id, force=force)
+
+        await self.run_bulk(interaction, "🛑 Parando {count} servidor(es)", server_ids, stop_one, stagger)
 
     @app_commands.command(name="status", description="Verifica o status dos servidores.")
     async def status(self, interaction: discord.Interaction):
@@ -105,13 +403,137 @@ class ManagementCog(commands.Cog):
             await interaction.followup.send(embed=embed)
             return
         
-        # A lógica do status volta a ser simples e confiável
-        for server in running_servers:
-            status_message = await server.get_status()
-            embed.add_field(name=f"**{server.config.name}**", value=status_message, inline=False)
+        # Lê do cache do poller; consultas necessárias rodam em paralelo e os lentos aparecem como "tempo esgotado"
+        statuses = await server_manager.collect_statuses(running_servers, fetch=status_poller.get_status)
+        for server, status_message in statuses:
+            node = f" · nó `{server.node_id}`" if server.node_id != "local" else ""
+            embed.add_field(name=f"**{server.config.name}**{node}", value=status_message, inline=False)
         
         await interaction.followup.send(embed=embed)
 
+    @app_commands.command(name="metrics", description="Mostra o uso de CPU, memória e disco de um servidor.")
+    async def metrics(self, interaction: discord.Interaction, game: ServerParam):
+        server_name = config.servers[game.value].name
+        current = resource_sampler.latest(game.value)
+        if current is None:
+            await interaction.response.send_message(f"Ainda não há métricas para **{server_name}**.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title=f"Recursos: {server_name}", color=discord.Color.blurple())
+        for metric, (label, fmt) in METRIC_LABELS.items():
+            lines = [f"Atual: **{fmt(current[metric])}**"]
+            for window_name, seconds in METRIC_WINDOWS:
+                stats = resource_sampler.window_stats(game.value, metric, seconds)
+                if stats:
+                    low, avg, high = stats
+                    lines.append(f"{window_name}: {fmt(low)} / {fmt(avg)} / {fmt(high)}")
+            embed.add_field(name=label, value="\n".join(lines), inline=True)
+
+        series = resource_sampler.series[game.value]
+        embed.add_field(name="CPU (histórico)", value=f"`{sparkline(series['cpu_percent'].last())}`", inline=False)
+        embed.add_field(name="RSS (histórico)", value=f"`{sparkline(series['rss_bytes'].last())}`", inline=False)
+
+        overhead = resource_sampler.overhead.last()
+        if overhead:
+            embed.set_footer(text=f"mín / média / máx por janela • custo da coleta: {sum(overhead) / len(overhead) * 1000:.2f} ms por varredura")
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="logs", description="Mostra as últimas linhas do console de um servidor.")
+    @app_commands.rename(contains="filter")
+    @app_commands.checks.has_role(config.bot.authorized_role_id)
+    async def logs(self, interaction: discord.Interaction, game: ServerParam,
+                   lines: app_commands.Range[int, 1, 200] = 20, contains: str | None = None):
+        recent = console_relay.buffer(game.value).tail(lines, contains)
+        if not recent:
+            await interaction.response.send_message(f"Nenhuma linha de console para **{game.name}**.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"```\n{pack_lines(recent)}\n```", ephemeral=True)
+
+    @app_commands.command(name="backup", description="Faz um backup incremental da pasta de um servidor.")
+    @app_commands.checks.has_role(config.bot.authorized_role_id)
+    async def backup(self, interaction: discord.Interaction, game: ServerParam):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            meta = await backup_manager.backup(game.value)
+        except GameServerError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+        if meta.get("unchanged"):
+            await interaction.followup.send(f"Nada mudou em **{game.name}** desde o snapshot `{meta['id']}`.", ephemeral=True)
+            return
+        embed = discord.Embed(title=f"💾 Backup de {game.name}: {meta['id']}", description=describe_backup(meta), color=discord.Color.green())
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="backups", description="Lista os snapshots de um servidor, com a vazão de cada backup.")
+    @app_commands.checks.has_role(config.bot.authorized_role_id)
+    async def backups(self, interaction: discord.Interaction, game: ServerParam):
+        history = await backup_manager.history(game.value, limit=10)
+        if not history:
+            await interaction.response.send_message(f"Nenhum backup de **{game.name}** ainda.", ephemeral=True)
+            return
+        embed = discord.Embed(title=f"💾 Backups de {game.name}", color=discord.Color.blurple())
+        for meta in history:
+            embed.add_field(name=f"`{meta['id']}` • {meta['reason']}", value=describe_backup(meta), inline=False)
+        embed.set_footer(text=f"Retenção: {config.backups.keep_last} mais recentes + 1 por dia nos últimos {config.backups.keep_daily} dias")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="restore", description="Restaura a pasta de um servidor parado para um snapshot (administradores).")
+    @app_commands.autocomplete(snapshot=snapshot_autocomplete)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def restore(self, interaction: discord.Interaction, game: ServerParam, snapshot: str):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            result = await backup_manager.restore(game.value, snapshot)
+        except GameServerError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+        undo = f"\nO estado anterior ficou no snapshot `{result['safety_snapshot']}`." if result["safety_snapshot"] else ""
+        await interaction.followup.send(
+            f"♻️ **{game.name}** restaurado para `{snapshot}`: {result['files_written']} arquivo(s) escritos "
+            f"({format_bytes(result['bytes_written'])} a {result['write_mibps']:.1f} MiB/s), "
+            f"{result['files_deleted']} apagado(s) em {format_seconds(result['duration'])}.{undo}",
+            ephemeral=True,
+        )
+
+    @app_commands.command(name="diag", description="Latência dos comandos, do RCON e do event loop (administradores).")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def diag(self, interaction: discord.Interaction):
+        embed = discord.Embed(title="Diagnóstico do bot", color=discord.Color.dark_grey())
+
+        lines = [
+            f"`/{name}` {histogram.count}× • {format_histogram(histogram)}"
+            + (f" • {diagnostics.command_errors[name]} erro(s)" if diagnostics.command_errors.get(name) else "")
+            for name, histogram in sorted(diagnostics.commands.items())
+        ]
+        embed.add_field(name="Comandos (p50 / p90 / p99 / máx)", value=truncate_lines(lines), inline=False)
+        if diagnostics.discord_delay.count:
+            embed.add_field(name="Atraso do Discord até o handler", value=format_histogram(diagnostics.discord_delay), inline=False)
+
+        lines = []
+        for (server_id, operation), histogram in sorted(diagnostics.rcon.items()):
+            errors = diagnostics.rcon_errors.get((server_id, operation), 0)
+            label = "conexão" if operation == "connect" else "comando"
+            lines.append(f"**{server_id}** {label} {histogram.count}× • {format_histogram(histogram)}" + (f" • {errors} falha(s)" if errors else ""))
+        embed.add_field(name="RCON (p50 / p90 / p99 / máx)", value=truncate_lines(lines), inline=False)
+
+        monitor = diagnostics.loop
+        embed.add_field(
+            name="Event loop",
+            value=f"Atraso: {format_histogram(monitor.lag)}\nTravamentos acima de {format_seconds(monitor.threshold)}: **{monitor.stall_count}**",
+            inline=False,
+        )
+        if monitor.stalls:
+            stall = monitor.stalls[-1]
+            stack = stall.stack[-900:]
+            embed.add_field(
+                name="Último travamento",
+                value=f"{format_seconds(stall.duration)} <t:{int(stall.at)}:R>\n```\n{stack}\n```",
+                inline=False,
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     guild = discord.Object(id=config.bot.guild_id)
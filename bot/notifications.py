@@ -0,0 +1,143 @@
+# bot/notifications.py
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List
+
+import discord
+
+from core.config import config
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class Notification:
+    """Um aviso a ser publicado. Avisos do mesmo `kind` no mesmo canal são agrupados."""
+    channel_id: int
+    kind: str
+    title: str
+    description: str = ""
+    color: discord.Color = field(default_factory=discord.Color.default)
+    mention: str = ""
+    # Título usado quando vários avisos são agrupados; "{count}" é substituído pela quantidade
+    group_title: str | None = None
+
+class _ChannelBucket:
+    """Limite local por canal, abaixo do rate limit do Discord (5 mensagens a cada 5s)."""
+
+    def __init__(self, rate: int = 5, per: float = 5.0):
+        self.rate = rate
+        self.per = per
+        self._sent: Deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            while self._sent and now - self._sent[0] >= self.per:
+                self._sent.popleft()
+            if len(self._sent) >= self.rate:
+                await asyncio.sleep(self.per - (now - self._sent[0]))
+                self._sent.popleft()
+            self._sent.append(time.monotonic())
+
+class NotificationDispatcher:
+    """
+    Fila central de avisos do bot. Os comandos apenas enfileiram e retornam; um worker
+    junta os avisos que chegam dentro de `notifications.window` segundos, agrupa por
+    canal e tipo (p.ex. "3 servidores online" em um embed só), respeita o limite de
+    cada canal e tenta de novo com backoff quando o Discord falha.
+    """
+    def __init__(self, bot: discord.Client):
+        self.bot = bot
+        self._queue: asyncio.Queue[Notification] = asyncio.Queue(maxsize=config.notifications.queue_size)
+        self._buckets: Dict[int, _ChannelBucket] = {}
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def settings(self):
+        return config.notifications
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name="notification-dispatcher")
+
+    async def close(self, timeout: float = 5.0):
+        """Tenta entregar o que ainda está na fila antes de parar o worker."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"{self._queue.qsize()} aviso(s) descartado(s) no desligamento.")
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    def enqueue(self, notification: Notification) -> bool:
+        """Enfileira um aviso sem esperar o envio. Retorna False se a fila estiver cheia."""
+        try:
+            self._queue.put_nowait(notification)
+            return True
+        except asyncio.QueueFull:
+            log.warning(f"Fila de avisos cheia; descartando '{notification.title}'.")
+            return False
+
+    async def send(self, channel_id: int, **kwargs):
+        """
+        Envia uma mensagem imediatamente, passando pelo limite do canal e pelas novas
+        tentativas. Para quem precisa de backpressure (p.ex. o relay de console).
+        """
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            log.warning(f"Canal com ID {channel_id} não encontrado.")
+            return
+        bucket = self._buckets.setdefault(channel_id, _ChannelBucket())
+        for attempt in range(1, self.settings.max_retries + 1):
+            await bucket.acquire()
+            try:
+                await channel.send(**kwargs)
+                return
+            except discord.HTTPException as e:
+                # Erros 4xx (exceto o 429, que o discord.py já trata) não melhoram com nova tentativa
+                if 400 <= e.status < 500 or attempt == self.settings.max_retries:
+                    raise
+                delay = self.settings.retry_backoff * 2 ** (attempt - 1)
+                log.warning(f"Falha ao enviar para o canal {channel_id} ({e.status}); nova tentativa em {delay:.1f}s.")
+                await asyncio.sleep(delay)
+
+    def _build(self, group: List[Notification]) -> dict:
+        first = group[0]
+        mentions = " ".join(dict.fromkeys(n.mention for n in group if n.mention))
+        if len(group) == 1:
+            embed = discord.Embed(title=first.title, description=first.description, color=first.color)
+        else:
+            title = (first.group_title or "{count} avisos").format(count=len(group))
+            lines = [f"**{n.title}**" + (f"\n{n.description}" if n.description else "") for n in group]
+            embed = discord.Embed(title=title, description="\n".join(lines)[:4096], color=first.color)
+        return {"content": mentions or None, "embed": embed}
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Janela de coalescência: avisos que chegam logo em seguida vão juntos
+            deadline = time.monotonic() + self.settings.window
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            groups: Dict[tuple[int, str], List[Notification]] = {}
+            for notification in batch:
+                groups.setdefault((notification.channel_id, notification.kind), []).append(notification)
+
+            for (channel_id, kind), group in groups.items():
+                try:
+                    await self.send(channel_id, **self._build(group))
+                except Exception:
+                    log.exception(f"Falha ao publicar {len(group)} aviso(s) '{kind}' no canal {channel_id}")
+            for _ in batch:
+                self._queue.task_done()
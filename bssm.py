@@ -0,0 +1,13 @@
+# bssm.py
+"""
+Ponto de entrada do bot, a partir da raiz do repositório:
+
+    python bssm.py
+
+Os processos do pool de backups (spawn) reimportam o módulo principal. Por isso este
+arquivo não importa nada fora do bloco abaixo: os workers carregam só o que as
+funções do pool usam (services.backup_store), sem o discord, o .env ou o config.yaml.
+"""
+if __name__ == "__main__":
+    from bot.bot import run
+    run()
@@ -1,6 +1,6 @@
 # core/config.py
 import yaml
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List, Dict, Optional
 
@@ -11,11 +11,34 @@ class AppSecrets(BaseSettings):
     discord_bot_token: str
     minecraft_rcon_password: str
     factorio_rcon_password: str
+    node_token: Optional[str] = None # Segredo compartilhado com os agentes dos nós remotos
+
+class AgentSecrets(BaseSettings):
+    """Segredos do agente de nó (services/node_agent.py), lidos do .env do host do agente."""
+    model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8', extra='ignore')
+
+    node_token: str
 
 class RconConfig(BaseModel):
     host: str
     port: int
     password: Optional[str] = None # Tornamos a senha opcional aqui
+    pool_size: int = 1 # Conexões RCON mantidas abertas por servidor
+    timeout: float = 5.0 # Segundos para conectar/responder a um comando
+    max_idle: float = 300.0 # Conexões ociosas por mais tempo que isso são recriadas
+
+class RestartPolicy(BaseModel):
+    enabled: bool = True
+    max_restarts: int = 3 # Reinícios automáticos permitidos dentro de 'window'
+    window: float = 600.0 # Janela (s) em que os reinícios são contados
+    backoff_base: float = 5.0 # Atraso do primeiro reinício; dobra a cada crash na janela
+    backoff_max: float = 120.0
+    cooldown: float = 1800.0 # Pausa após esgotar max_restarts antes de tentar de novo
+
+class IdlePolicy(BaseModel):
+    enabled: bool = False
+    grace_period: float = 1800.0 # Segundos sem jogadores até desligar
+    warnings: List[float] = [300.0, 60.0] # Avisos no chat do jogo, em segundos antes do desligamento
 
 class ServerConfig(BaseModel):
     name: str
@@ -24,6 +47,20 @@ class ServerConfig(BaseModel):
     start_command: List[str]
     mention_role_id: int
     rcon: RconConfig
+    poll_interval: Optional[float] = None # Sobrescreve status.poll_interval para este servidor
+    log_file: Optional[str] = None # Log do servidor, relativo a 'path'; o padrão depende do jogo
+    console_log: str = "bssm-console.log" # Saída do processo (stdout/stderr), relativa a 'path'
+    console_log_max_mb: int = 64 # Acima disso o console é copiado para '<console_log>.1' e esvaziado (0 = sem limite)
+    console_channel_id: Optional[int] = None # Canal que recebe o console ao vivo (desligado se vazio)
+    ready_timeout: float = 300.0 # Tempo máximo aguardando o servidor ficar pronto após o /start
+    restart: RestartPolicy = RestartPolicy()
+    idle: IdlePolicy = IdlePolicy()
+    memory_mb: int = 0 # Memória esperada do servidor, usada no controle de admissão
+    cpu_cores: float = 0.0 # Núcleos de CPU esperados
+    # Onde o servidor roda: "local", o ID de um nó em 'nodes' ou "auto" (o host menos carregado
+    # a cada início; exige que 'path' e o comando existam em todos os hosts)
+    node: str = "local"
+    scheduled_backups: bool = True # Incluído nos backups agendados (backups.interval)
 
 class BotConfig(BaseModel):
     guild_id: int
@@ -31,14 +68,105 @@ class BotConfig(BaseModel):
     admin_notification_channel_id: int
     authorized_role_id: int
 
+class StatusConfig(BaseModel):
+    concurrency: int = 8 # Máximo de servidores consultados ao mesmo tempo
+    server_timeout: float = 5.0 # Prazo para cada servidor responder
+    deadline: float = 10.0 # Prazo total do comando /status
+    poll_interval: float = 30.0 # Intervalo padrão do poller em segundos
+    max_stale: float = 120.0 # Snapshots mais velhos que isso são consultados na hora pelo /status
+    evict_after: float = 60.0 # Segundos até descartar o snapshot de um servidor parado
+
+class MetricsConfig(BaseModel):
+    interval: float = 5.0 # Segundos entre amostras de CPU/memória/I/O
+    retention: int = 720 # Amostras guardadas por métrica (720 x 5s = 1h)
+
+class ConsoleConfig(BaseModel):
+    buffer_lines: int = 1000 # Linhas recentes guardadas por servidor para o /logs
+    flush_interval: float = 2.0 # Segundos acumulando linhas antes de cada envio ao canal
+    max_pending: int = 500 # Linhas aguardando envio; acima disso as mais antigas são descartadas
+
+class NotificationConfig(BaseModel):
+    window: float = 2.0 # Avisos do mesmo tipo que chegam dentro dessa janela viram uma mensagem só
+    queue_size: int = 200 # Avisos aguardando envio; acima disso novos avisos são descartados
+    max_retries: int = 3
+    retry_backoff: float = 1.0 # Atraso da primeira nova tentativa; dobra a cada falha
+
+class HostConfig(BaseModel):
+    memory_mb: int = 0 # Orçamento de memória para servidores de jogo (0 = sem limite)
+    cpu_cores: float = 0.0 # Orçamento de CPU (0 = sem limite)
+    max_concurrent_boots: int = 1 # Servidores iniciando ao mesmo tempo
+    boot_stagger: float = 15.0 # Intervalo mínimo entre o início de dois boots
+    auto_placement: bool = True # Este host também recebe servidores com node: auto
+
+class NodeConfig(BaseModel):
+    host: str
+    port: int = 7800
+    timeout: float = 10.0 # Prazo das requisições curtas (status, uso de recursos)
+    memory_mb: int = 0 # Orçamento de memória do nó, usado na escolha do host (0 = usa o load average)
+    cpu_cores: float = 0.0
+
+class BulkConfig(BaseModel):
+    concurrency: int = 3 # Servidores iniciados/parados ao mesmo tempo pelos comandos em lote
+    stagger: float = 0.0 # Intervalo padrão (s) entre o disparo de cada servidor do lote
+
+class DiagnosticsConfig(BaseModel):
+    metrics_host: str = "127.0.0.1" # Endpoint de métricas no formato do Prometheus
+    metrics_port: int = 9108 # 0 desativa o endpoint
+    loop_interval: float = 0.5 # Intervalo (s) entre as medições de atraso do event loop
+    stall_threshold: float = 0.25 # Atrasos acima disso são registrados como travamento, com a pilha
+    stall_history: int = 20 # Travamentos guardados para o /diag
+
+class BackupConfig(BaseModel):
+    store: str = "backups" # Repositório deduplicado (chunks e snapshots), compartilhado pelos servidores
+    interval: float = 0.0 # Segundos entre backups agendados (0 = desligado)
+    keep_last: int = 10 # Snapshots mais recentes mantidos por servidor
+    keep_daily: int = 7 # Além deles, o último snapshot de cada um dos N dias mais recentes
+    workers: int = 2 # Processos que leem, calculam os hashes e comprimem os chunks
+    chunk_size: int = 1048576 # Tamanho médio dos chunks, em bytes
+    compression: int = 3 # Nível do zlib (0 = sem compressão)
+    save_timeout: float = 60.0 # Prazo para o jogo concluir o salvamento antes do snapshot
+    exclude: List[str] = ["logs/*", "crash-reports/*", "*.log", "*.tmp"] # Relativos a 'path'
+
 class MainConfig(BaseModel):
     bot: BotConfig
     servers: Dict[str, ServerConfig]
+    status: StatusConfig = StatusConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    host: HostConfig = HostConfig()
+    console: ConsoleConfig = ConsoleConfig()
+    notifications: NotificationConfig = NotificationConfig()
+    nodes: Dict[str, NodeConfig] = {} # Hosts remotos com o agente de nó rodando
+    groups: Dict[str, List[str]] = {} # Nome do grupo -> IDs de servidores, para os comandos em lote
+    bulk: BulkConfig = BulkConfig()
+    diagnostics: DiagnosticsConfig = DiagnosticsConfig()
+    backups: BackupConfig = BackupConfig()
+    state_file: str = "bssm_state.json" # Processos em execução, para readotá-los após reiniciar o bot
+    command_fingerprint_file: str = ".bssm_commands.sha256" # Última árvore de comandos sincronizada
 
-def load_config() -> MainConfig:
+    @model_validator(mode="after")
+    def check_nodes(self):
+        for reserved in ("local", "auto"):
+            if reserved in self.nodes:
+                raise ValueError(f"'{reserved}' é reservado e não pode ser o ID de um nó")
+        for server_id, server in self.servers.items():
+            if server.node not in ("local", "auto") and server.node not in self.nodes:
+                raise ValueError(f"Servidor '{server_id}' usa o nó inexistente '{server.node}'")
+        return self
+
+    @model_validator(mode="after")
+    def check_groups(self):
+        for group, members in self.groups.items():
+            unknown = [server_id for server_id in members if server_id not in self.servers]
+            if unknown:
+                raise ValueError(f"Grupo '{group}' referencia servidores inexistentes: {', '.join(unknown)}")
+        return self
+
+CONFIG_PATH = "config.yaml"
+
+def load_config(path: str = CONFIG_PATH) -> MainConfig:
     """Carrega as configurações do YAML e injeta os segredos."""
     secrets = AppSecrets()
-    with open("config.yaml", "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         config_data = yaml.safe_load(f)
 
     # Injeta as senhas RCON lidas do .env no objeto de configuração
@@ -49,6 +177,41 @@ def load_config() -> MainConfig:
 
     return MainConfig(**config_data)
 
-# Instâncias globais para serem importadas facilmente em outros módulos
-secrets = AppSecrets()
-config = load_config()
\ No newline at end of file
+def update_config(new_config: MainConfig):
+    """
+    Copia `new_config` para a instância global `config`, no lugar, para que todos os
+    módulos que a importaram vejam os novos valores. O dicionário de servidores é
+    atualizado por completo; quem precisa reagir ao diff deve calculá-lo antes. Se a
+    instância global ainda não existe, `new_config` passa a ser ela, sem ler o config.yaml.
+    """
+    global _config
+    current = _config
+    if current is None:
+        _config = new_config
+        return
+    for name in MainConfig.model_fields:
+        if name != "servers":
+            setattr(current, name, getattr(new_config, name))
+    current.servers.clear()
+    current.servers.update(new_config.servers)
+
+# Instâncias globais para serem importadas facilmente em outros módulos.
+# São criadas no primeiro acesso (PEP 562), que no bot acontece já no import de quem faz
+# `from core.config import config`. O adiamento serve a quem só usa os modelos: o agente
+# de nó e o bench (que instala a própria configuração com update_config) não leem o .env
+# nem o config.yaml. Os processos do pool de backups também não, desde que o bot seja
+# iniciado por bssm.py; com `python -m bot.bot` eles reimportam o bot inteiro.
+_secrets: Optional[AppSecrets] = None
+_config: Optional[MainConfig] = None
+
+def __getattr__(name: str):
+    global _secrets, _config
+    if name == "secrets":
+        if _secrets is None:
+            _secrets = AppSecrets()
+        return _secrets
+    if name == "config":
+        if _config is None:
+            _config = load_config()
+        return _config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
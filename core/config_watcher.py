@@ -0,0 +1,117 @@
+# core/config_watcher.py
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from typing import Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+EVENT_HEADER = struct.Struct("iIII")
+
+class ConfigWatcher:
+    """
+    Observa um arquivo de configuração e chama `on_change` quando ele muda.
+    No Linux usa inotify no diretório do arquivo (editores costumam salvar criando um
+    arquivo novo e renomeando); nos demais sistemas, ou se o inotify falhar, compara
+    mtime/tamanho periodicamente. Rajadas de eventos são agrupadas por `debounce`.
+    """
+    def __init__(self, path: str, on_change: Callable[[], Awaitable[None]], debounce: float = 0.5, poll_interval: float = 2.0):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="config-watcher")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _open_inotify(self) -> int | None:
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            return None
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.path.dirname(self.path).encode(), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _read_events(self, fd: int):
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        name = os.path.basename(self.path).encode()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            start = offset + EVENT_HEADER.size
+            if data[start:start + length].rstrip(b"\0") == name:
+                self._changed.set()
+            offset = start + length
+
+    def _signature(self) -> tuple[float, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    async def _poll(self):
+        last = self._signature()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self._signature()
+            if current != last:
+                last = current
+                self._changed.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        fd = self._open_inotify() if hasattr(os, "O_CLOEXEC") else None
+        poller = None
+        if fd is not None:
+            loop.add_reader(fd, self._read_events, fd)
+            log.info(f"Observando '{self.path}' via inotify.")
+        else:
+            poller = asyncio.create_task(self._poll())
+            log.info(f"inotify indisponível; verificando '{self.path}' a cada {self.poll_interval:.0f}s.")
+
+        try:
+            while True:
+                await self._changed.wait()
+                # Agrupa as várias escritas de um único salvamento
+                await asyncio.sleep(self.debounce)
+                self._changed.clear()
+                try:
+                    await self.on_change()
+                except Exception:
+                    log.exception(f"Erro ao aplicar mudanças de '{self.path}'")
+        finally:
+            if fd is not None:
+                loop.remove_reader(fd)
+                os.close(fd)
+            if poller:
+                poller.cancel()
@@ -13,4 +13,12 @@ class RconConnectionError(GameServerError):
 
 class ServerNotFoundError(GameServerError):
     """Lançada quando um ID de servidor não é encontrado na configuração."""
-    pass
\ No newline at end of file
+    pass
+
+class NodeConnectionError(GameServerError):
+    """Lançada quando um nó remoto (agente) não está acessível ou recusa a autenticação."""
+    pass
+
+class BackupError(GameServerError):
+    """Lançada quando um backup ou uma restauração não pode ser feito."""
+    pass
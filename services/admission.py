@@ -0,0 +1,147 @@
+# services/admission.py
+import asyncio
+import contextlib
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+from core.config import HostConfig
+from .game_server import GameServer
+
+log = logging.getLogger(__name__)
+
+# Recebe a posição na fila (1 = próximo a iniciar)
+QueueListener = Callable[[int], Awaitable[None]]
+
+class _Waiter:
+    __slots__ = ("server", "future", "on_queued", "position")
+
+    def __init__(self, server: GameServer, on_queued: QueueListener | None):
+        self.server = server
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.on_queued = on_queued
+        self.position = 0
+
+class AdmissionController:
+    """
+    Controla quando cada servidor pode iniciar, respeitando o orçamento do host
+    (memória e CPU declarados em config.yaml), um limite de boots simultâneos e um
+    intervalo mínimo entre boots. Pedidos que não cabem esperam em uma fila FIFO.
+    Servidores em nós remotos não entram no orçamento, que é só deste host, mas os
+    boots de cada um são serializados para que dois pedidos não o iniciem em dobro.
+    """
+    def __init__(self, host: HostConfig, running_servers: Callable[[], List[GameServer]]):
+        self.host = host
+        self._running_servers = running_servers
+        self._queue: List[_Waiter] = []
+        self._booting: Dict[str, GameServer] = {}
+        # Um lock por servidor remoto; ocupado enquanto há um boot dele em andamento ou esperando
+        self._remote_boots: Dict[str, asyncio.Lock] = {}
+        self._last_boot = float("-inf")
+        self._timer: asyncio.TimerHandle | None = None
+        # Avisos de posição na fila em andamento; a referência evita que sejam coletados no meio
+        self._notifications: set[asyncio.Task] = set()
+
+    def usage(self) -> tuple[int, float]:
+        """Memória e CPU declaradas dos servidores rodando ou iniciando neste host."""
+        servers = {server.server_id: server for server in self._running_servers() if server.node_id == "local"}
+        servers.update(self._booting)
+        memory = sum(server.config.memory_mb for server in servers.values())
+        cpu = sum(server.config.cpu_cores for server in servers.values())
+        return memory, cpu
+
+    def _fits(self, server: GameServer) -> bool:
+        memory, cpu = self.usage()
+        if memory == 0 and cpu == 0:
+            return True # Host vazio: sempre admite, mesmo que o servidor sozinho estoure o orçamento
+        if self.host.memory_mb and memory + server.config.memory_mb > self.host.memory_mb:
+            return False
+        if self.host.cpu_cores and cpu + server.config.cpu_cores > self.host.cpu_cores:
+            return False
+        return True
+
+    def _pump(self):
+        """Admite o início da fila enquanto houver orçamento, vaga de boot e o intervalo permitir."""
+        self._timer = None
+        while self._queue:
+            waiter = self._queue[0]
+            if waiter.future.done(): # Pedido cancelado enquanto esperava
+                self._queue.pop(0)
+                continue
+            if len(self._booting) >= self.host.max_concurrent_boots or not self._fits(waiter.server):
+                break
+            wait = self._last_boot + self.host.boot_stagger - time.monotonic()
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._pump)
+                break
+            self._queue.pop(0)
+            self._booting[waiter.server.server_id] = waiter.server
+            self._last_boot = time.monotonic()
+            waiter.future.set_result(None)
+        self._report_positions()
+
+    def _report_positions(self):
+        for position, waiter in enumerate(self._queue, start=1):
+            if waiter.position != position and waiter.on_queued:
+                waiter.position = position
+                task = asyncio.create_task(waiter.on_queued(position))
+                self._notifications.add(task)
+                task.add_done_callback(self._notification_done)
+
+    def _notification_done(self, task: asyncio.Task):
+        self._notifications.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Erro ao avisar a posição na fila de admissão", exc_info=task.exception())
+
+    def notify_capacity_changed(self):
+        """Deve ser chamado quando um servidor para, liberando orçamento."""
+        if self._timer is None:
+            self._pump()
+
+    def is_pending(self, server_id: str) -> bool:
+        """Indica se o servidor está na fila ou iniciando."""
+        remote = self._remote_boots.get(server_id)
+        if remote is not None and remote.locked():
+            return True
+        return server_id in self._booting or any(
+            waiter.server.server_id == server_id and not waiter.future.done() for waiter in self._queue
+        )
+
+    @contextlib.asynccontextmanager
+    async def boot(self, server: GameServer, on_queued: QueueListener | None = None) -> AsyncIterator[None]:
+        """
+        Reserva uma vaga de boot para o servidor, esperando na fila se necessário.
+        A vaga é liberada ao sair do bloco; o orçamento de memória/CPU continua
+        contado enquanto o processo estiver rodando.
+        """
+        if server.node_id != "local":
+            lock = self._remote_boots.setdefault(server.server_id, asyncio.Lock())
+            async with lock:
+                yield
+            return
+
+        waiter = _Waiter(server, on_queued)
+        self._queue.append(waiter)
+        if self._timer is None:
+            self._pump()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                self._report_positions()
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Admitido no mesmo instante em que foi cancelado: devolve a vaga
+                self._booting.pop(server.server_id, None)
+                self.notify_capacity_changed()
+            raise
+
+        try:
+            yield
+        finally:
+            self._booting.pop(server.server_id, None)
+            if self._timer is None:
+                self._pump()
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._queue)
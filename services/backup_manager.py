@@ -0,0 +1,349 @@
+# services/backup_manager.py
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, List
+from core.config import ServerConfig, config
+from core.errors import BackupError, GameServerError, RconConnectionError, ServerNotFoundError
+from .backup_store import BackupStore, FileEntry, FileStat, restore_files, scan_tree, store_files
+from .game_server import GameServer
+from .server_manager import ServerManager, server_manager
+
+log = logging.getLogger(__name__)
+
+# Recebe o ID do servidor e a mensagem de erro de um backup agendado
+BackupFailureListener = Callable[[str, str], Awaitable[None]]
+# Recebe o ID do servidor que vai ser restaurado, já marcado como em restauração
+RestoreListener = Callable[[str], None]
+
+# Arquivos pequenos vão em lotes para o pool, para não pagar uma ida e volta por arquivo
+BATCH_BYTES = 64 * 1024 * 1024
+BATCH_FILES = 512
+
+def _batches(paths: List[str], sizes: Dict[str, int]) -> List[List[str]]:
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_bytes = 0
+    # Maiores primeiro: os lotes longos começam cedo e o pool termina mais junto
+    for path in sorted(paths, key=lambda p: sizes[p], reverse=True):
+        if current and (current_bytes + sizes[path] > BATCH_BYTES or len(current) >= BATCH_FILES):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(path)
+        current_bytes += sizes[path]
+    if current:
+        batches.append(current)
+    return batches
+
+def _rate(size: int, seconds: float) -> float:
+    """MiB/s, arredondado para as estatísticas."""
+    return round(size / 1048576 / seconds, 1) if seconds > 0 else 0.0
+
+class BackupManager:
+    """
+    Backups incrementais e deduplicados da pasta de cada servidor (ServerConfig.path).
+    Com o servidor rodando, os salvamentos são suspensos via RCON durante a leitura
+    para que o mundo não seja copiado no meio de uma gravação. Arquivos com o mesmo
+    tamanho e mtime do snapshot anterior reaproveitam seus chunks sem serem lidos; os
+    demais são cortados, hasheados e comprimidos em um pool de processos, fora do
+    event loop. Uma operação por vez mexe no repositório, para que a coleta de chunks
+    nunca veja um snapshot pela metade.
+    """
+    def __init__(self, manager: ServerManager):
+        self._manager = manager
+        self._lock = asyncio.Lock()
+        self._restoring: set[str] = set()
+        self._task: asyncio.Task | None = None
+        # Criado no primeiro backup e mantido: cada processo novo (spawn) reimporta o módulo principal
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_workers = 0
+        self.listeners: list[BackupFailureListener] = []
+        # Avisados no início de cada restauração, p.ex. para cancelar um reinício automático agendado
+        self.restore_listeners: list[RestoreListener] = []
+
+    @property
+    def store(self) -> BackupStore:
+        return BackupStore(config.backups.store)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="backup-scheduler")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._shutdown_pool()
+
+    def is_restoring(self, server_id: str) -> bool:
+        return server_id in self._restoring
+
+    def snapshots(self, server_id: str) -> List[str]:
+        """IDs dos snapshots do servidor, do mais antigo para o mais novo (só lista um diretório)."""
+        return self.store.snapshots(server_id)
+
+    async def history(self, server_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Metadados e estatísticas dos snapshots mais recentes, do mais novo para o mais antigo."""
+        def load() -> List[Dict[str, Any]]:
+            store = self.store
+            return [store.load_meta(server_id, snapshot_id) for snapshot_id in reversed(store.snapshots(server_id)[-limit:])]
+        return await asyncio.to_thread(load)
+
+    def _local_target(self, server_id: str) -> tuple[ServerConfig, GameServer | None]:
+        """Retorna a configuração e a instância em execução; só a pasta deste host pode ser copiada."""
+        server_config = config.servers.get(server_id)
+        if server_config is None:
+            raise ServerNotFoundError(f"Servidor '{server_id}' não encontrado na configuração.")
+        running = next((s for s in self._manager.get_all_running_servers() if s.server_id == server_id), None)
+        node_id = running.node_id if running else server_config.node
+        if node_id not in ("local", "auto"):
+            raise BackupError(f"**{server_config.name}** roda no nó '{node_id}'; backups só cobrem servidores deste host.")
+        return server_config, running
+
+    async def _resume(self, server: GameServer):
+        try:
+            await server.resume_saves()
+        except RconConnectionError as e:
+            log.error(f"Não foi possível retomar os salvamentos de '{server.server_id}'; eles continuam DESLIGADOS: {e}")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        workers = max(1, config.backups.workers)
+        if self._pool is not None and self._pool_workers != workers:
+            # backups.workers mudou em um recarregamento; os processos atuais terminam o que têm
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._pool is None:
+            # spawn: o bot tem threads (logging, vigia do loop) que um fork copiaria pela metade
+            self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            self._pool_workers = workers
+        return self._pool
+
+    async def _shutdown_pool(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+    async def _run_pool(self, function, jobs: List[tuple]) -> List[Any]:
+        pool = self._get_pool()
+        futures = [pool.submit(function, *job) for job in jobs]
+        try:
+            return await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        except BaseException as e:
+            # Os lotes que ainda não começaram são descartados e os que estão rodando
+            # terminam antes de a operação liberar o repositório
+            for future in futures:
+                future.cancel()
+            await asyncio.to_thread(concurrent.futures.wait, futures)
+            if isinstance(e, BrokenProcessPool) and self._pool is pool:
+                # Um processo morreu (p.ex. pelo OOM killer); o próximo backup cria um pool novo
+                self._pool = None
+            raise
+
+    async def _snapshot(self, server_id: str, reason: str) -> Dict[str, Any]:
+        settings = config.backups
+        server_config, server = self._local_target(server_id)
+        if not os.path.isdir(server_config.path):
+            raise BackupError(f"Pasta de **{server_config.name}** não encontrada: {server_config.path}")
+
+        store = self.store
+        snapshots = await asyncio.to_thread(store.snapshots, server_id)
+        previous: Dict[str, FileEntry] = {}
+        if snapshots:
+            try:
+                previous = await asyncio.to_thread(store.load_files, server_id, snapshots[-1])
+            except (OSError, ValueError) as e:
+                log.warning(f"Snapshot anterior de '{server_id}' ilegível ({e}); o backup lerá todos os arquivos.")
+
+        started = time.perf_counter()
+        if server is not None:
+            try:
+                await server.pause_saves(settings.save_timeout)
+            except (RconConnectionError, asyncio.TimeoutError) as e:
+                await self._resume(server)
+                reason_text = str(e) or f"o jogo não confirmou o salvamento em {settings.save_timeout:.0f}s"
+                raise BackupError(f"Não foi possível pausar os salvamentos de **{server_config.name}**: {reason_text}")
+        try:
+            scan_started = time.perf_counter()
+            current = await asyncio.to_thread(scan_tree, server_config.path, settings.exclude, [settings.store])
+            scan_seconds = time.perf_counter() - scan_started
+
+            files: Dict[str, FileEntry] = {}
+            changed: List[str] = []
+            for relpath, (size, mtime_ns, mode) in current.items():
+                old = previous.get(relpath)
+                if old is not None and old[0] == size and old[1] == mtime_ns:
+                    files[relpath] = [size, mtime_ns, mode, old[3]]
+                else:
+                    changed.append(relpath)
+
+            sizes = {relpath: stat[0] for relpath, stat in current.items()}
+            jobs = [
+                (store.path, server_config.path, batch, settings.chunk_size, settings.compression)
+                for batch in _batches(changed, sizes)
+            ]
+            store_started = time.perf_counter()
+            counters = {"bytes_read": 0, "bytes_new": 0, "bytes_stored": 0, "chunks": 0, "chunks_new": 0}
+            for entries, batch_counters in (await self._run_pool(store_files, jobs) if jobs else []):
+                files.update(entries)
+                for key, value in batch_counters.items():
+                    counters[key] += value
+            store_seconds = time.perf_counter() - store_started
+        finally:
+            if server is not None:
+                await self._resume(server)
+        duration = time.perf_counter() - started
+
+        if snapshots and files == previous:
+            log.info(f"Backup de '{server_id}': nada mudou desde {snapshots[-1]}.")
+            return {**await asyncio.to_thread(store.load_meta, server_id, snapshots[-1]), "unchanged": True}
+
+        stats = {
+            "files": len(files),
+            "files_read": len(changed),
+            "bytes_total": sum(sizes.values()),
+            **counters,
+            "scan_seconds": round(scan_seconds, 3),
+            "store_seconds": round(store_seconds, 3),
+            "paused_seconds": round(duration, 3) if server is not None else 0.0,
+            "duration": round(duration, 3),
+            "read_mibps": _rate(counters["bytes_read"], store_seconds),
+        }
+        meta = {"server_id": server_id, "created_at": time.time(), "reason": reason, "stats": stats}
+        meta["id"] = await asyncio.to_thread(store.write_snapshot, server_id, meta, files)
+        log.info(
+            f"Backup {meta['id']} de '{server_id}': {stats['files_read']}/{stats['files']} arquivos lidos, "
+            f"{stats['bytes_read']} B lidos a {stats['read_mibps']} MiB/s, {stats['bytes_stored']} B novos no repositório, "
+            f"{duration:.1f}s no total."
+        )
+        return meta
+
+    async def _prune(self, server_id: str):
+        settings = config.backups
+        store = self.store
+        removed = await asyncio.to_thread(store.prune, server_id, settings.keep_last, settings.keep_daily)
+        if removed:
+            chunks, freed = await asyncio.to_thread(store.collect_garbage)
+            log.info(f"Retenção de '{server_id}': {len(removed)} snapshot(s) e {chunks} chunk(s) removidos ({freed} B).")
+
+    async def backup(self, server_id: str, reason: str = "manual") -> Dict[str, Any]:
+        """
+        Cria um snapshot e aplica a retenção. Retorna os metadados, com as estatísticas
+        de vazão; se nada mudou desde o último, retorna o último com "unchanged".
+        Lança BackupError.
+        """
+        async with self._lock:
+            meta = await self._snapshot(server_id, reason)
+            await self._prune(server_id)
+        return meta
+
+    async def restore(self, server_id: str, snapshot_id: str) -> Dict[str, Any]:
+        """
+        Restaura a pasta do servidor (que precisa estar parado) para um snapshot.
+        Antes, o estado atual vira um snapshot, então uma restauração pode ser desfeita.
+        Só os arquivos diferentes são reescritos; os que não existem no snapshot são
+        apagados (exceto os excluídos dos backups). Lança BackupError.
+        """
+        async with self._lock:
+            server_config, server = self._local_target(server_id)
+            if server is not None or self._manager.admission.is_pending(server_id):
+                raise BackupError(f"Pare **{server_config.name}** antes de restaurar um backup.")
+            # Marcado antes de qualquer await: um /start que chegue agora já é recusado
+            self._restoring.add(server_id)
+            for listener in self.restore_listeners:
+                try:
+                    listener(server_id)
+                except Exception:
+                    log.exception(f"Erro em um listener de restauração de '{server_id}'")
+            try:
+                store = self.store
+                if snapshot_id not in await asyncio.to_thread(store.snapshots, server_id):
+                    raise BackupError(f"Snapshot '{snapshot_id}' de **{server_config.name}** não encontrado.")
+
+                target = await asyncio.to_thread(store.load_files, server_id, snapshot_id)
+                missing = await asyncio.to_thread(store.missing_chunks, target)
+                if missing:
+                    raise BackupError(f"O snapshot '{snapshot_id}' está incompleto: faltam {missing} chunk(s) no repositório.")
+
+                safety = None
+                if os.path.isdir(server_config.path):
+                    safety = await self._snapshot(server_id, f"antes de restaurar {snapshot_id}")
+
+                started = time.perf_counter()
+                settings = config.backups
+                current: Dict[str, FileStat] = await asyncio.to_thread(
+                    scan_tree, server_config.path, settings.exclude, [settings.store]
+                )
+                to_write = {
+                    relpath: entry for relpath, entry in target.items()
+                    if relpath not in current or tuple(current[relpath][:2]) != (entry[0], entry[1])
+                }
+                to_delete = [relpath for relpath in current if relpath not in target]
+
+                sizes = {relpath: entry[0] for relpath, entry in to_write.items()}
+                jobs = [
+                    (store.path, server_config.path, {relpath: to_write[relpath] for relpath in batch})
+                    for batch in _batches(list(to_write), sizes)
+                ]
+                written = sum(await self._run_pool(restore_files, jobs)) if jobs else 0
+
+                def delete():
+                    for relpath in to_delete:
+                        try:
+                            os.remove(os.path.join(server_config.path, relpath))
+                        except FileNotFoundError:
+                            pass
+                await asyncio.to_thread(delete)
+                duration = time.perf_counter() - started
+            finally:
+                self._restoring.discard(server_id)
+            await self._prune(server_id)
+
+        log.info(
+            f"'{server_id}' restaurado para {snapshot_id}: {len(to_write)} arquivo(s) escritos "
+            f"({written} B a {_rate(written, duration)} MiB/s), {len(to_delete)} apagado(s)."
+        )
+        return {
+            "snapshot": snapshot_id,
+            "safety_snapshot": safety["id"] if safety else None,
+            "files_written": len(to_write),
+            "files_deleted": len(to_delete),
+            "bytes_written": written,
+            "duration": round(duration, 3),
+            "write_mibps": _rate(written, duration),
+        }
+
+    async def _run(self):
+        while True:
+            interval = config.backups.interval
+            await asyncio.sleep(interval if interval > 0 else 60)
+            if config.backups.interval <= 0:
+                continue
+            remote = {server.server_id for server in self._manager.get_all_running_servers() if server.node_id != "local"}
+            for server_id, server_config in list(config.servers.items()):
+                if (not server_config.scheduled_backups or server_id in remote
+                        or server_config.node not in ("local", "auto") or not os.path.isdir(server_config.path)):
+                    continue
+                try:
+                    await self.backup(server_id, reason="agendado")
+                except GameServerError as e:
+                    await self._notify_failure(server_id, str(e))
+                except Exception as e:
+                    log.exception(f"Erro inesperado no backup agendado de '{server_id}'")
+                    await self._notify_failure(server_id, f"Erro inesperado: {type(e).__name__}")
+
+    async def _notify_failure(self, server_id: str, message: str):
+        log.error(f"Backup agendado de '{server_id}' falhou: {message}")
+        for listener in self.listeners:
+            try:
+                await listener(server_id, message)
+            except Exception:
+                log.exception(f"Erro ao notificar a falha do backup de '{server_id}'")
+
+# Instância única para ser usada em toda a aplicação
+backup_manager = BackupManager(server_manager)
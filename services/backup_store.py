@@ -0,0 +1,249 @@
+# services/backup_store.py
+"""
+Repositório deduplicado de backups. Os arquivos são cortados em chunks definidos pelo
+conteúdo (os cortes caem em sequências de bytes escolhidas, não em posições fixas),
+então um trecho inserido no meio de um arquivo só muda os chunks ao redor dele. Cada chunk é guardado uma única
+vez, comprimido, com o SHA-256 do conteúdo como nome:
+
+    <store>/chunks/ab/ab12...          chunks, compartilhados por todos os servidores
+    <store>/snapshots/<server>/<id>.json        metadados e estatísticas do snapshot
+    <store>/snapshots/<server>/<id>.files.gz    lista de arquivos com seus chunks
+
+As funções de hash, compressão e restauração rodam nos processos do pool do
+BackupManager, por isso este módulo só usa a biblioteca padrão.
+"""
+import fnmatch
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import stat
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Tuple
+
+READ_BLOCK = 8 * 1024 * 1024
+RAW, ZLIB = b"r", b"z" # Primeiro byte de cada chunk gravado
+
+# Arquivo escaneado: caminho relativo (com "/") -> (tamanho, mtime_ns, modo)
+FileStat = Tuple[int, int, int]
+# Arquivo em um snapshot: [tamanho, mtime_ns, modo, [[sha256, tamanho], ...]]
+FileEntry = List[Any]
+
+def anchor_pattern(avg_size: int) -> re.Pattern:
+    """
+    Padrão de 3 bytes que marca os pontos de corte: um byte fixo seguido de um byte de
+    cada um de dois conjuntos, dimensionados para aparecer em média a cada
+    3/4 * avg_size bytes de dados aleatórios. O byte inicial literal deixa o `re`
+    procurar em velocidade de memchr, bem mais rápido que um hash rolante em Python.
+    """
+    # Permutação fixa dos bytes, para que os cortes sejam os mesmos entre execuções
+    order = sorted(range(256), key=lambda i: hashlib.sha256(b"bssm-cdc" + bytes([i])).digest())
+    combos = max(1, round(2 ** 24 / max(1, avg_size - avg_size // 4)))
+    second = min(256, max(1, math.isqrt(combos)))
+    third = min(256, max(1, round(combos / second)))
+    return re.compile(
+        re.escape(bytes([order[0]]))
+        + b"[" + re.escape(bytes(order[1:1 + second])) + b"]"
+        + b"[" + re.escape(bytes(order[-third:])) + b"]"
+    )
+
+def iter_chunks(f, avg_size: int) -> Iterator[bytes]:
+    """
+    Divide um arquivo aberto em chunks definidos pelo conteúdo, de avg_size/4 a
+    4*avg_size bytes: o corte fica logo depois da primeira âncora após o tamanho mínimo.
+    """
+    min_size, max_size = avg_size // 4, avg_size * 4
+    anchor = anchor_pattern(avg_size)
+    buffer, offset, eof = b"", 0, False
+    while True:
+        if not eof and len(buffer) - offset < max_size:
+            block = f.read(max(READ_BLOCK, max_size))
+            eof = not block
+            buffer = buffer[offset:] + block
+            offset = 0
+        if offset >= len(buffer):
+            return
+        end = min(len(buffer), offset + max_size)
+        match = anchor.search(buffer, offset + min_size, end)
+        cut = match.end() if match else end
+        yield buffer[offset:cut]
+        offset = cut
+
+def chunk_path(store: str, digest: str) -> str:
+    return os.path.join(store, "chunks", digest[:2], digest)
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def store_files(store: str, root: str, paths: List[str], avg_size: int, level: int) -> Tuple[Dict[str, FileEntry], Dict[str, int]]:
+    """
+    Lê os arquivos, grava no repositório os chunks que ainda não existem e retorna a
+    entrada de cada arquivo e os contadores (bytes lidos, novos e gravados após a
+    compressão). Roda em um processo do pool.
+    """
+    entries: Dict[str, FileEntry] = {}
+    counters = {"bytes_read": 0, "bytes_new": 0, "bytes_stored": 0, "chunks": 0, "chunks_new": 0}
+    for relpath in paths:
+        path = os.path.join(root, relpath)
+        chunks = []
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                for data in iter_chunks(f, avg_size):
+                    digest = hashlib.sha256(data).hexdigest()
+                    chunks.append([digest, len(data)])
+                    counters["bytes_read"] += len(data)
+                    counters["chunks"] += 1
+                    target = chunk_path(store, digest)
+                    if os.path.exists(target):
+                        continue
+                    packed = zlib.compress(data, level) if level else data
+                    packed = ZLIB + packed if len(packed) < len(data) else RAW + data
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    _write_atomic(target, packed)
+                    counters["bytes_new"] += len(data)
+                    counters["bytes_stored"] += len(packed)
+                    counters["chunks_new"] += 1
+        except FileNotFoundError:
+            continue # Apagado entre a varredura e a leitura
+        entries[relpath] = [st.st_size, st.st_mtime_ns, st.st_mode & 0o7777, chunks]
+    return entries, counters
+
+def read_chunk(store: str, digest: str) -> bytes:
+    with open(chunk_path(store, digest), "rb") as f:
+        packed = f.read()
+    data = zlib.decompress(packed[1:]) if packed[:1] == ZLIB else packed[1:]
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Chunk {digest} corrompido no repositório de backups.")
+    return data
+
+def restore_files(store: str, root: str, entries: Dict[str, FileEntry]) -> int:
+    """Recria os arquivos a partir dos chunks, cada um de forma atômica. Retorna os bytes escritos."""
+    written = 0
+    for relpath, (size, mtime_ns, mode, chunks) in entries.items():
+        path = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.restore"
+        with open(tmp, "wb") as f:
+            for digest, _ in chunks:
+                written += f.write(read_chunk(store, digest))
+        os.chmod(tmp, mode)
+        os.utime(tmp, ns=(mtime_ns, mtime_ns))
+        os.replace(tmp, path)
+    return written
+
+def scan_tree(root: str, exclude: List[str], skip_dirs: List[str]) -> Dict[str, FileStat]:
+    """Lista os arquivos regulares sob `root` (sem seguir links), exceto os que casam com `exclude`."""
+    skip = {os.path.realpath(path) for path in skip_dirs}
+    files: Dict[str, FileStat] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if os.path.realpath(os.path.join(dirpath, name)) not in skip]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            relpath = os.path.relpath(path, root).replace(os.sep, "/")
+            if any(fnmatch.fnmatch(relpath, pattern) for pattern in exclude):
+                continue
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                files[relpath] = (st.st_size, st.st_mtime_ns, st.st_mode & 0o7777)
+    return files
+
+class BackupStore:
+    """Acesso aos snapshots e à coleta de chunks sem referência. Operações de disco: chame fora do event loop."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _snapshot_dir(self, server_id: str) -> str:
+        return os.path.join(self.path, "snapshots", server_id)
+
+    def snapshots(self, server_id: str) -> List[str]:
+        """IDs dos snapshots do servidor, do mais antigo para o mais novo."""
+        try:
+            names = os.listdir(self._snapshot_dir(server_id))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json"))
+
+    def load_meta(self, server_id: str, snapshot_id: str) -> Dict[str, Any]:
+        with open(os.path.join(self._snapshot_dir(server_id), f"{snapshot_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load_files(self, server_id: str, snapshot_id: str) -> Dict[str, FileEntry]:
+        with gzip.open(os.path.join(self._snapshot_dir(server_id), f"{snapshot_id}.files.gz"), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_snapshot(self, server_id: str, meta: Dict[str, Any], files: Dict[str, FileEntry]) -> str:
+        """Grava um novo snapshot e retorna seu ID (data e hora UTC). A lista de arquivos vai antes dos metadados."""
+        directory = self._snapshot_dir(server_id)
+        os.makedirs(directory, exist_ok=True)
+        base = time.strftime("%Y%m%d-%H%M%S", time.gmtime(meta["created_at"]))
+        snapshot_id, n = base, 1
+        while os.path.exists(os.path.join(directory, f"{snapshot_id}.json")):
+            n += 1
+            snapshot_id = f"{base}-{n}"
+        meta = {**meta, "id": snapshot_id}
+        _write_atomic(os.path.join(directory, f"{snapshot_id}.files.gz"),
+                      gzip.compress(json.dumps(files, separators=(",", ":")).encode("utf-8"), 6))
+        _write_atomic(os.path.join(directory, f"{snapshot_id}.json"), json.dumps(meta, indent=2).encode("utf-8"))
+        return snapshot_id
+
+    def prune(self, server_id: str, keep_last: int, keep_daily: int) -> List[str]:
+        """
+        Apaga os snapshots fora da retenção: os `keep_last` mais recentes ficam, e também
+        o último de cada um dos `keep_daily` dias mais recentes. Retorna os IDs apagados.
+        """
+        snapshots = self.snapshots(server_id)
+        keep = set(snapshots[-keep_last:]) if keep_last > 0 else set()
+        days: Dict[str, str] = {}
+        for snapshot_id in snapshots:
+            days[snapshot_id[:8]] = snapshot_id # IDs ordenados: fica o último de cada dia
+        keep.update(sorted(days.values())[-keep_daily:] if keep_daily > 0 else [])
+
+        removed = []
+        directory = self._snapshot_dir(server_id)
+        for snapshot_id in snapshots:
+            if snapshot_id in keep:
+                continue
+            # Metadados primeiro: um snapshot sem eles já não aparece em lugar nenhum
+            for suffix in (".json", ".files.gz"):
+                try:
+                    os.remove(os.path.join(directory, snapshot_id + suffix))
+                except FileNotFoundError:
+                    pass
+            removed.append(snapshot_id)
+        return removed
+
+    def collect_garbage(self) -> Tuple[int, int]:
+        """Remove os chunks que nenhum snapshot referencia. Retorna (chunks, bytes) liberados."""
+        referenced = set()
+        snapshots_root = os.path.join(self.path, "snapshots")
+        for server_id in os.listdir(snapshots_root) if os.path.isdir(snapshots_root) else []:
+            for snapshot_id in self.snapshots(server_id):
+                for _, _, _, chunks in self.load_files(server_id, snapshot_id).values():
+                    referenced.update(digest for digest, _ in chunks)
+
+        removed = freed = 0
+        chunks_root = os.path.join(self.path, "chunks")
+        for dirpath, _, filenames in os.walk(chunks_root):
+            for name in filenames:
+                if name in referenced:
+                    continue
+                path = os.path.join(dirpath, name)
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+        return removed, freed
+
+    def missing_chunks(self, files: Dict[str, FileEntry]) -> int:
+        digests = {digest for _, _, _, chunks in files.values() for digest, _ in chunks}
+        return sum(not os.path.exists(chunk_path(self.path, digest)) for digest in digests)
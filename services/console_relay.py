@@ -0,0 +1,126 @@
+# services/console_relay.py
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict
+from core.config import config
+from .game_server import GameServer
+from .server_manager import ServerManager, server_manager
+
+log = logging.getLogger(__name__)
+
+# Envia um texto ao canal com o ID informado
+ChannelSender = Callable[[int, str], Awaitable[None]]
+
+MESSAGE_LIMIT = 1900 # Margem abaixo do limite de 2000 caracteres do Discord, contando o bloco de código
+
+class ConsoleBuffer:
+    """Últimas linhas do console de um servidor, em um buffer circular."""
+
+    def __init__(self, max_lines: int):
+        self._lines: Deque[str] = deque(maxlen=max_lines)
+
+    def append(self, line: str):
+        self._lines.append(line)
+
+    def tail(self, count: int, text_filter: str | None = None) -> list[str]:
+        """Retorna as últimas `count` linhas, opcionalmente só as que contêm `text_filter`."""
+        if text_filter:
+            needle = text_filter.lower()
+            lines = [line for line in self._lines if needle in line.lower()]
+        else:
+            lines = list(self._lines)
+        return lines[-count:] if count > 0 else []
+
+def pack_lines(lines: list[str], limit: int = MESSAGE_LIMIT) -> str:
+    """
+    Junta as linhas mais recentes que couberem em `limit` caracteres. Crases triplas são
+    quebradas com um caractere invisível para não fechar o bloco de código da mensagem.
+    """
+    packed: list[str] = []
+    size = 0
+    for line in reversed(lines):
+        line = line.replace("```", "`\u200b`\u200b`")[:limit]
+        if size + len(line) + 1 > limit:
+            break
+        packed.append(line)
+        size += len(line) + 1
+    return "\n".join(reversed(packed))
+
+class _RelayQueue:
+    __slots__ = ("lines", "dropped", "wakeup", "task")
+
+    def __init__(self, max_pending: int):
+        self.lines: Deque[str] = deque(maxlen=max_pending)
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+class ConsoleRelay:
+    """
+    Guarda o console recente de cada servidor e, quando `console_channel_id` está
+    configurado, retransmite-o ao Discord. As linhas são agrupadas em mensagens a cada
+    `console.flush_interval`; enquanto um envio espera (p.ex. pelo rate limit) novas
+    linhas se acumulam na fila, que é limitada e descarta as mais antigas em picos.
+    """
+    def __init__(self, manager: ServerManager):
+        self._buffers: Dict[str, ConsoleBuffer] = {}
+        self._queues: Dict[str, _RelayQueue] = {}
+        self._send: ChannelSender | None = None
+        manager.output_listeners.append(self._on_output)
+
+    def buffer(self, server_id: str) -> ConsoleBuffer:
+        buffer = self._buffers.get(server_id)
+        if buffer is None:
+            buffer = self._buffers[server_id] = ConsoleBuffer(config.console.buffer_lines)
+        return buffer
+
+    def start(self, send: ChannelSender):
+        """Ativa a retransmissão ao vivo usando `send` para publicar as mensagens."""
+        self._send = send
+
+    async def stop(self):
+        self._send = None
+        tasks = [queue.task for queue in self._queues.values() if queue.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queues.clear()
+
+    def _on_output(self, server: GameServer, line: str):
+        self.buffer(server.server_id).append(line)
+
+        channel_id = server.config.console_channel_id
+        if self._send is None or channel_id is None:
+            return
+        queue = self._queues.get(server.server_id)
+        if queue is None:
+            queue = self._queues[server.server_id] = _RelayQueue(config.console.max_pending)
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._flush_loop(server.server_id, channel_id, queue))
+        if len(queue.lines) == queue.lines.maxlen:
+            queue.dropped += 1
+        queue.lines.append(line)
+        queue.wakeup.set()
+
+    async def _flush_loop(self, server_id: str, channel_id: int, queue: _RelayQueue):
+        while True:
+            await queue.wakeup.wait()
+            # Janela de agrupamento: tudo que chegar nesse intervalo vai na mesma mensagem
+            await asyncio.sleep(config.console.flush_interval)
+            queue.wakeup.clear()
+
+            lines = list(queue.lines)
+            queue.lines.clear()
+            dropped, queue.dropped = queue.dropped, 0
+            body = pack_lines(lines)
+            dropped += len(lines) - (body.count("\n") + 1 if body else 0)
+            if dropped:
+                body = f"… {dropped} linha(s) omitida(s) por excesso de saída\n{body}"
+            try:
+                await self._send(channel_id, f"```\n{body}\n```")
+            except Exception as e:
+                log.warning(f"Falha ao retransmitir o console de '{server_id}': {e}")
+
+# Instância única para ser usada em toda a aplicação
+console_relay = ConsoleRelay(server_manager)
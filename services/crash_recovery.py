@@ -0,0 +1,128 @@
+# services/crash_recovery.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict
+from core.errors import GameServerError
+from .backup_manager import BackupManager, backup_manager
+from .game_server import GameServer
+from .server_manager import ServerManager, server_manager
+
+log = logging.getLogger(__name__)
+
+# Recebe o servidor afetado e a mensagem a ser enviada aos administradores
+RecoveryListener = Callable[[GameServer, str], Awaitable[None]]
+
+class CrashRecovery:
+    """
+    Reinicia automaticamente servidores que terminaram sem um /stop, seguindo a
+    política de cada servidor (config.restart): no máximo `max_restarts` dentro de
+    `window` segundos, com backoff exponencial entre as tentativas e uma pausa de
+    `cooldown` quando o limite é atingido. Uma restauração de backup cancela o
+    reinício agendado do servidor.
+    """
+    # Intervalo entre as verificações enquanto um reinício espera uma restauração acabar
+    RESTORE_POLL_INTERVAL = 15.0
+
+    def __init__(self, manager: ServerManager, backups: BackupManager):
+        self._manager = manager
+        self._backups = backups
+        self._history: Dict[str, Deque[float]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.listeners: list[RecoveryListener] = []
+        manager.exit_listeners.append(self._on_exit)
+        backups.restore_listeners.append(self._on_restore)
+
+    def cancel(self, server_id: str) -> bool:
+        """Cancela um reinício agendado. Retorna True se havia um pendente."""
+        task = self._pending.pop(server_id, None)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def _on_restore(self, server_id: str):
+        # O jogo não pode subir com os arquivos pela metade; quem restaura inicia depois
+        if self.cancel(server_id):
+            log.info(f"Reinício automático de '{server_id}' cancelado: uma restauração de backup começou.")
+
+    async def close(self):
+        tasks = list(self._pending.values())
+        self._pending.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _on_exit(self, server: GameServer, returncode: int, crashed: bool):
+        if not crashed or not server.config.restart.enabled:
+            return
+        if server.server_id in self._pending and not self._pending[server.server_id].done():
+            return
+        self._pending[server.server_id] = asyncio.create_task(self._recover(server, returncode))
+
+    def _next_delay(self, server: GameServer) -> tuple[float, int]:
+        """Retorna (atraso, tentativa) para o próximo reinício; tentativa 0 indica cool-down."""
+        policy = server.config.restart
+        history = self._history.setdefault(server.server_id, deque())
+        now = time.monotonic()
+        while history and now - history[0] > policy.window:
+            history.popleft()
+        if len(history) >= policy.max_restarts:
+            history.clear()
+            return policy.cooldown, 0
+        attempt = len(history) + 1
+        return min(policy.backoff_max, policy.backoff_base * 2 ** (attempt - 1)), attempt
+
+    async def _notify(self, server: GameServer, message: str):
+        for listener in self.listeners:
+            try:
+                await listener(server, message)
+            except Exception:
+                log.exception(f"Erro ao notificar a recuperação do servidor '{server.server_id}'")
+
+    async def _recover(self, server: GameServer, returncode: int):
+        policy = server.config.restart
+        delay, attempt = self._next_delay(server)
+        if attempt:
+            message = (
+                f"💥 **{server.config.name}** caiu (código {returncode}). "
+                f"Reiniciando em {delay:.0f}s (tentativa {attempt}/{policy.max_restarts})."
+            )
+        else:
+            message = (
+                f"💥 **{server.config.name}** caiu (código {returncode}) e atingiu o limite de "
+                f"{policy.max_restarts} reinícios em {policy.window:.0f}s. Nova tentativa em {delay / 60:.0f} min."
+            )
+        log.warning(message)
+        await self._notify(server, message)
+
+        try:
+            await asyncio.sleep(delay)
+            while True:
+                async with self._manager.admission.boot(server):
+                    instance = self._manager.prepare_start(server.server_id)
+                    if instance.is_running():
+                        return
+                    if not self._backups.is_restoring(server.server_id):
+                        self._history.setdefault(server.server_id, deque()).append(time.monotonic())
+                        await instance.start()
+                        log.info(f"Servidor '{server.server_id}' reiniciado automaticamente.")
+                        # A partir daqui um novo crash deve agendar outro reinício
+                        self._release(server.server_id)
+                        await instance.wait_until_ready()
+                        return
+                log.info(f"Reinício de '{server.server_id}' adiado: uma restauração de backup está em andamento.")
+                await asyncio.sleep(self.RESTORE_POLL_INTERVAL)
+        except GameServerError as e:
+            log.error(f"Falha ao reiniciar '{server.server_id}': {e}")
+            await self._notify(server, f"❌ Falha ao reiniciar **{server.config.name}**: {e}")
+        finally:
+            self._release(server.server_id)
+
+    def _release(self, server_id: str):
+        if self._pending.get(server_id) is asyncio.current_task():
+            del self._pending[server_id]
+
+# Instância única para ser usada em toda a aplicação
+crash_recovery = CrashRecovery(server_manager, backup_manager)
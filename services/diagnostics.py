@@ -0,0 +1,230 @@
+# services/diagnostics.py
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List
+
+log = logging.getLogger(__name__)
+
+# Limites superiores dos buckets, em segundos
+COMMAND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+RCON_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus, com custo O(log buckets) por amostra."""
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1) # O último é o +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimativa por interpolação linear dentro do bucket, como o histogram_quantile."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= target and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                # O maior valor observado limita o bucket: a estimativa nunca passa do máximo
+                upper = min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (target - cumulative) / bucket_count, self.max)
+            cumulative += bucket_count
+        return self.max
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+@dataclass
+class Stall:
+    """Um travamento do event loop, com a pilha da thread do loop amostrada durante ele."""
+    at: float # time.time() do início
+    duration: float
+    stack: str
+
+class LoopLagMonitor:
+    """
+    Mede o atraso do event loop agendando um tick a cada `interval` e comparando com o
+    horário esperado. Uma thread de vigia confere o último tick: se o loop ficar mais de
+    `threshold` sem rodar, amostra a pilha da thread do loop (o código que está
+    bloqueando) e registra o travamento quando o loop volta.
+    """
+    def __init__(self):
+        self.lag = Histogram(LAG_BUCKETS)
+        self.stalls: Deque[Stall] = deque(maxlen=20)
+        self.stall_count = 0
+        self.interval = 0.5
+        self.threshold = 0.25
+        self._heartbeat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._sample: str | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self, interval: float, threshold: float, history: int):
+        if self._task and not self._task.done():
+            return
+        self.interval, self.threshold = interval, threshold
+        self.stalls = deque(self.stalls, maxlen=max(1, history))
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - expected)
+            self.lag.observe(lag)
+
+            sample, self._sample = self._sample, None
+            if lag >= self.threshold:
+                self.stall_count += 1
+                stack = sample or "(pilha não amostrada)"
+                self.stalls.append(Stall(time.time() - lag, lag, stack))
+                log.warning(f"Event loop travado por {lag * 1000:.0f} ms. Pilha durante o travamento:\n{stack}")
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            stalled_for = time.monotonic() - self._heartbeat - self.interval
+            if stalled_for < self.threshold or self._sample is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._sample = "".join(traceback.format_stack(frame, limit=15))
+
+class Diagnostics:
+    """
+    Instrumentação dos caminhos quentes: latência por comando do Discord, tempos de
+    conexão e ida e volta do RCON por servidor e o atraso do event loop. Tudo fica em
+    memória em histogramas de tamanho fixo e pode ser lido pelo /diag ou exportado no
+    formato texto do Prometheus por um endpoint HTTP local.
+    """
+    def __init__(self):
+        self.commands: Dict[str, Histogram] = {}
+        self.command_errors: Dict[str, int] = {}
+        self.discord_delay = Histogram(COMMAND_BUCKETS) # Criação da interação no Discord até o handler começar
+        self.rcon: Dict[tuple[str, str], Histogram] = {} # (servidor, "connect" | "command")
+        self.rcon_errors: Dict[tuple[str, str], int] = {}
+        self.loop = LoopLagMonitor()
+        self._server: asyncio.AbstractServer | None = None
+
+    def observe_command(self, command: str, seconds: float, ok: bool = True):
+        histogram = self.commands.get(command)
+        if histogram is None:
+            histogram = self.commands[command] = Histogram(COMMAND_BUCKETS)
+        histogram.observe(seconds)
+        if not ok:
+            self.command_errors[command] = self.command_errors.get(command, 0) + 1
+
+    def observe_rcon(self, server: str, operation: str, seconds: float, ok: bool = True):
+        key = (server, operation)
+        histogram = self.rcon.get(key)
+        if histogram is None:
+            histogram = self.rcon[key] = Histogram(RCON_BUCKETS)
+        histogram.observe(seconds)
+        if not ok:
+            self.rcon_errors[key] = self.rcon_errors.get(key, 0) + 1
+
+    async def start(self, settings):
+        """Inicia o monitor do event loop e, se `settings.metrics_port` for diferente de 0, o endpoint."""
+        self.loop.start(settings.loop_interval, settings.stall_threshold, settings.stall_history)
+        if settings.metrics_port and self._server is None:
+            try:
+                self._server = await asyncio.start_server(self._serve, settings.metrics_host, settings.metrics_port)
+                log.info(f"Métricas disponíveis em http://{settings.metrics_host}:{settings.metrics_port}/metrics")
+            except OSError as e:
+                log.warning(f"Não foi possível abrir o endpoint de métricas: {e}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.loop.stop()
+
+    def render(self) -> str:
+        """Exporta tudo no formato texto do Prometheus (versão 0.0.4)."""
+        lines = ["# TYPE bssm_command_duration_seconds histogram"]
+        for command, histogram in sorted(self.commands.items()):
+            lines += histogram.render("bssm_command_duration_seconds", f'command="{command}"')
+        lines.append("# TYPE bssm_command_errors_total counter")
+        for command, errors in sorted(self.command_errors.items()):
+            lines.append(f'bssm_command_errors_total{{command="{command}"}} {errors}')
+        lines.append("# TYPE bssm_discord_delay_seconds histogram")
+        lines += self.discord_delay.render("bssm_discord_delay_seconds")
+
+        lines.append("# TYPE bssm_rcon_duration_seconds histogram")
+        for (server, operation), histogram in sorted(self.rcon.items()):
+            lines += histogram.render("bssm_rcon_duration_seconds", f'server="{server}",operation="{operation}"')
+        lines.append("# TYPE bssm_rcon_errors_total counter")
+        for (server, operation), errors in sorted(self.rcon_errors.items()):
+            lines.append(f'bssm_rcon_errors_total{{server="{server}",operation="{operation}"}} {errors}')
+
+        lines.append("# TYPE bssm_event_loop_lag_seconds histogram")
+        lines += self.loop.lag.render("bssm_event_loop_lag_seconds")
+        lines.append("# TYPE bssm_event_loop_stalls_total counter")
+        lines.append(f"bssm_event_loop_stalls_total {self.loop.stall_count}")
+        return "\n".join(lines) + "\n"
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+            method, path, *_ = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ")
+            if method == "GET" and path.split("?")[0] in ("/", "/metrics"):
+                status, body = "200 OK", self.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+# Instância única para ser usada em toda a aplicação
+diagnostics = Diagnostics()
@@ -1,70 +1,70 @@
-import subprocess
-from .game_server import GameServer
-from core.errors import ServerStartError
-from aiomcrcon import Client, RCONConnectionError, IncorrectPasswordError
+import re
+import time
+from .game_server import GameServer, ServerStatus
+from core.errors import ServerStartError, RconConnectionError
 
-# SUBSTITUA A CLASSE INTEIRA PELA VERSÃO ABAIXO
 class FactorioServer(GameServer):
     """Implementação de GameServer para servidores Factorio, com controle de processo robusto."""
+    READY_PATTERN = re.compile(r"changing state from\(CreatingGame\) to\(InGame\)")
+    DEFAULT_LOG_FILE = "factorio-current.log"
+    # Texto enviado pelo RCON sem barra vira mensagem no chat
+    BROADCAST_COMMAND = "{message}"
+    # O Factorio não tem como suspender o autosave; o /server-save grava em segundo plano
+    SAVE_PAUSE_COMMANDS = ("/server-save",)
+    SAVE_DONE_PATTERN = re.compile(r"Saving finished")
 
     async def start(self) -> str:
         if self.is_running():
             raise ServerStartError(f"O servidor **{self.config.name}** já parece estar em execução!")
 
+        await self.rcon.reset()
         try:
-            # A MÁGICA FINAL ESTÁ AQUI: Usamos DETACHED_PROCESS
-            # Isso cria um processo totalmente novo e independente, forçando a criação de uma nova janela de console.
-            self.process = subprocess.Popen(
-                self.config.start_command,
-                cwd=self.config.path,
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
+            await self._spawn()
             return f"O servidor **{self.config.name}** foi iniciado!"
         except (FileNotFoundError, OSError) as e:
             raise ServerStartError(f"Falha ao iniciar o processo do Factorio: Verifique o 'path' e o comando. Erro: {e}")
 
-    def is_running(self) -> bool:
-        """
-        Com DETACHED_PROCESS, o self.process é confiável.
-        Voltamos à verificação de processo simples e síncrona.
-        """
-        # Se não temos um processo, não está rodando.
-        if not self.process:
-            return False
-        # poll() retorna None se o processo ainda está rodando.
-        return self.process.poll() is None
-
-    # O método stop continua o mesmo, pois o RCON é o caminho certo.
     async def stop(self, force: bool = False) -> str:
         if not self.is_running():
             return f"O servidor **{self.config.name}** não está em execução."
 
-        # A lógica de 'force kill' agora volta a funcionar
+        self.stop_requested = True
         if force:
-            self.process.kill()
-            self.process = None # Limpamos o processo
+            await self.process.kill()
             return f"O servidor **{self.config.name}** foi forçadamente encerrado."
 
         try:
-            async with Client(self.config.rcon.host, self.config.rcon.port, self.config.rcon.password) as client:
-                await client.send_cmd("/quit")
-            return f"O servidor **{self.config.name}** foi instruído a parar."
-        except (RCONConnectionError, IncorrectPasswordError) as e:
-            raise ServerStartError(f"Falha ao conectar via RCON para parar o servidor. Talvez ele já tenha sido fechado? Erro: {e}")
+            if await self._shutdown("/quit", timeout=60):
+                return f"O servidor **{self.config.name}** foi parado com sucesso."
+            return f"O servidor **{self.config.name}** demorou a responder e foi forçado a fechar."
+        except RconConnectionError as e:
+            # Como no Minecraft: sem RCON o processo é encerrado à força, para não ficar
+            # rodando com stop_requested marcado (um crash depois não seria reiniciado)
+            await self.process.kill()
+            raise RconConnectionError(f"Não foi possível conectar via RCON para parar. O processo foi encerrado à força. Erro: {e}")
 
-    # O método get_status também continua o mesmo.
-    async def get_status(self) -> str:
+    async def query_status(self) -> ServerStatus:
+        started = time.perf_counter()
         try:
-            async with Client(self.config.rcon.host, self.config.rcon.port, self.config.rcon.password) as client:
-                players_resp, _ = await client.send_cmd("/players online")
-            
-            player_list = [line.strip() for line in players_resp.split('\n') if "online" not in line and line.strip()]
-            player_count = len(player_list)
-            player_names = ", ".join(player_list) if player_list else "Nenhum"
-            return f"🟢 **Online** | Jogadores: **{player_count}**\n`{player_names}`"
-        except Exception:
+            players_resp = await self.rcon.send("/players online")
+        except RconConnectionError:
             # Se a verificação de status falhar, usamos nosso is_running() confiável para dar o status correto.
             if self.is_running():
-                return "🟡 **Online** (RCON não está respondendo)"
-            else:
-                return "🔴 **Offline**"
\ No newline at end of file
+                return ServerStatus(online=True, error="RCON não está respondendo")
+            return ServerStatus(online=False)
+        latency = time.perf_counter() - started
+
+        # "Online players (2):\n  alice (online)\n  bob (online)"
+        player_list = []
+        for line in players_resp.split('\n'):
+            line = line.strip()
+            if not line or line.lower().startswith("online players"):
+                continue
+            player_list.append(line.removesuffix("(online)").strip())
+        return ServerStatus(
+            online=True,
+            rcon_ok=True,
+            player_count=len(player_list),
+            player_names=player_list,
+            rcon_latency=latency,
+        )
\ No newline at end of file
@@ -1,16 +1,163 @@
 # services/game_server.py
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
 from core.config import ServerConfig
-import subprocess
+from core.errors import RconConnectionError
+from .rcon_pool import RconPool
+from .log_tail import LogFollower
+from .process_supervisor import ProcessSupervisor
+import asyncio
+import importlib
+import logging
+import os
+import re
+import time
+from typing import Callable, Dict, List, Type
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class ServerStatus:
+    """Retrato estruturado do estado de um servidor em um dado momento."""
+    online: bool
+    rcon_ok: bool = False
+    player_count: int = 0
+    max_players: int | None = None
+    player_names: list[str] = field(default_factory=list)
+    rcon_latency: float | None = None # Segundos gastos na consulta RCON
+    error: str | None = None
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.checked_at
+
+    def format(self) -> str:
+        """Formata o status para exibição em um embed do Discord."""
+        if not self.online:
+            return "🔴 **Offline**"
+        if not self.rcon_ok:
+            return f"🟡 **Online** ({self.error or 'RCON não está respondendo'})"
+        count = f"{self.player_count}/{self.max_players}" if self.max_players is not None else f"{self.player_count}"
+        names = ", ".join(self.player_names) if self.player_names else "Nenhum"
+        return f"🟢 **Online** | Jogadores: **{count}**\n`{names}`"
+
+# Recebe o servidor, o código de saída e se o término foi inesperado (crash)
+ServerExitListener = Callable[["GameServer", int | None, bool], None]
+# Recebe o servidor cujo processo acabou de ser iniciado
+ServerSpawnListener = Callable[["GameServer"], None]
+# Recebe o servidor e uma linha da saída do console
+ServerOutputListener = Callable[["GameServer", str], None]
 
 class GameServer(ABC):
     """
     Interface abstrata que define o contrato para um servidor de jogo gerenciável.
     """
-    def __init__(self, server_id: str, config: ServerConfig):
+    # Linha de log que indica que o servidor aceita conexões; definida por cada jogo
+    READY_PATTERN: re.Pattern | None = None
+    # Log padrão do jogo, relativo a config.path (pode ser sobrescrito por config.log_file)
+    DEFAULT_LOG_FILE: str | None = None
+    # Intervalo entre as sondagens RCON usadas como alternativa ao log
+    READY_PROBE_INTERVAL = 5.0
+    # Comando RCON que envia uma mensagem no chat do jogo
+    BROADCAST_COMMAND = "say {message}"
+    # Comandos RCON que suspendem o salvamento automático e gravam o mundo antes de um backup, e os que o retomam
+    SAVE_PAUSE_COMMANDS: tuple[str, ...] = ()
+    SAVE_RESUME_COMMANDS: tuple[str, ...] = ()
+    # Linha do console que confirma o fim do salvamento, para jogos que salvam em segundo plano
+    SAVE_DONE_PATTERN: re.Pattern | None = None
+    # Host onde o processo roda; servidores em nós remotos (RemoteGameServer) usam o ID do nó
+    node_id = "local"
+
+    def __init__(self, server_id: str, config: ServerConfig, rcon: RconPool | None = None):
         self.server_id = server_id
         self.config = config
-        self.process: subprocess.Popen | None = None
+        self.rcon = rcon or RconPool(config.rcon, name=server_id)
+        self.process: ProcessSupervisor | None = None
+        self._log_follower: LogFollower | None = None
+        self._ready_event = asyncio.Event()
+        # Marcado pelo stop(); um término sem ele é tratado como crash
+        self.stop_requested = False
+        self.exit_listeners: List[ServerExitListener] = []
+        self.spawn_listeners: List[ServerSpawnListener] = []
+        self.output_listeners: List[ServerOutputListener] = []
+
+    @property
+    def log_path(self) -> str | None:
+        log_file = self.config.log_file or self.DEFAULT_LOG_FILE
+        return os.path.join(self.config.path, log_file) if log_file else None
+
+    @property
+    def console_log_path(self) -> str:
+        return os.path.join(self.config.path, self.config.console_log)
+
+    def _prepare_readiness(self):
+        """Marca a posição atual do log; deve ser chamado logo antes de iniciar o processo."""
+        self._ready_event = asyncio.Event()
+        self._log_follower = LogFollower(self.log_path) if self.log_path else None
+        if self._log_follower:
+            self._log_follower.mark()
+
+    def _on_output(self, line: str):
+        if self.READY_PATTERN and not self._ready_event.is_set() and self.READY_PATTERN.search(line):
+            self._ready_event.set()
+        for listener in self.output_listeners:
+            listener(self, line)
+
+    async def _spawn(self):
+        """Inicia o processo do servidor sob um ProcessSupervisor. Propaga FileNotFoundError/OSError."""
+        self._prepare_readiness()
+        self.stop_requested = False
+        self.process = await ProcessSupervisor.spawn(
+            self.config.start_command, cwd=self.config.path, console_log=self.console_log_path,
+            max_console_bytes=self.config.console_log_max_mb * 1024 * 1024,
+        )
+        self._attach()
+        for listener in self.spawn_listeners:
+            try:
+                listener(self)
+            except Exception:
+                log.exception(f"Erro em um listener de início do servidor '{self.server_id}'")
+
+    def adopt(self, pid: int, console_log: str):
+        """Assume o controle de um processo deste servidor que já estava rodando."""
+        self.process = ProcessSupervisor.adopt(pid, console_log, self.config.console_log_max_mb * 1024 * 1024)
+        self.stop_requested = False
+        self._ready_event.set()
+        self._attach()
+
+    def _attach(self):
+        self.process.output_listeners.append(self._on_output)
+        self.process.exit_listeners.append(self._on_exit)
+
+    def _on_exit(self, returncode: int | None):
+        crashed = not self.stop_requested
+        if crashed:
+            log.warning(f"Servidor '{self.server_id}' terminou inesperadamente (código {returncode}).")
+        for listener in self.exit_listeners:
+            try:
+                listener(self, returncode, crashed)
+            except Exception:
+                log.exception(f"Erro em um listener de término do servidor '{self.server_id}'")
+
+    async def _shutdown(self, rcon_command: str, timeout: float) -> bool:
+        """
+        Pede ao servidor para salvar e sair via RCON e aguarda o processo terminar sem
+        bloquear o event loop. Se ele não sair no prazo, encerra o grupo de processos
+        (SIGTERM e depois SIGKILL). Retorna True se o servidor saiu sozinho.
+        Propaga RconConnectionError se o comando não puder ser enviado.
+        """
+        try:
+            await self.rcon.send(rcon_command)
+        except RconConnectionError:
+            # O servidor pode fechar o RCON antes de responder ao comando de parada
+            if not await self.process.wait(5):
+                raise
+            return True
+        if await self.process.wait(timeout):
+            return True
+        await self.process.terminate()
+        return False
 
     @abstractmethod
     async def start(self) -> str:
@@ -23,10 +170,105 @@ class GameServer(ABC):
         pass
 
     @abstractmethod
+    async def query_status(self) -> ServerStatus:
+        """Consulta o servidor (via RCON) e retorna um ServerStatus estruturado."""
+        pass
+
     async def get_status(self) -> str:
         """Retorna uma string formatada com o status detalhado do servidor."""
-        pass
+        return (await self.query_status()).format()
+
+    async def broadcast(self, message: str):
+        """Envia uma mensagem a todos os jogadores conectados. Propaga RconConnectionError."""
+        # Uma barra no início seria interpretada como comando por alguns jogos
+        await self.rcon.send(self.BROADCAST_COMMAND.format(message=message.lstrip("/")))
+
+    async def pause_saves(self, timeout: float):
+        """
+        Deixa os arquivos do mundo consistentes para um backup: suspende os salvamentos
+        automáticos e força um salvamento completo. `timeout` também é o prazo de resposta
+        dos comandos, já que um save-all pode demorar bem mais que o RCON comum. Propaga
+        RconConnectionError e asyncio.TimeoutError (o jogo não confirmou o salvamento em `timeout`).
+        """
+        saved = asyncio.Event()
+
+        def on_output(server: GameServer, line: str):
+            if self.SAVE_DONE_PATTERN.search(line):
+                saved.set()
+
+        if self.SAVE_DONE_PATTERN:
+            self.output_listeners.append(on_output)
+        try:
+            for command in self.SAVE_PAUSE_COMMANDS:
+                await self.rcon.send(command, timeout=timeout)
+            if self.SAVE_DONE_PATTERN:
+                await asyncio.wait_for(saved.wait(), timeout)
+        finally:
+            if on_output in self.output_listeners:
+                self.output_listeners.remove(on_output)
+
+    async def resume_saves(self):
+        """Retoma os salvamentos automáticos. Propaga RconConnectionError."""
+        for command in self.SAVE_RESUME_COMMANDS:
+            await self.rcon.send(command)
+
+    async def _wait_for_log_marker(self):
+        if not self._log_follower or not self.READY_PATTERN:
+            # Sem log para acompanhar, apenas a sondagem RCON decide
+            await asyncio.Event().wait()
+        async for line in self._log_follower.lines():
+            if self.READY_PATTERN.search(line):
+                return
+
+    async def _wait_for_rcon(self):
+        while True:
+            await asyncio.sleep(self.READY_PROBE_INTERVAL)
+            if (await self.query_status()).rcon_ok:
+                return
+
+    async def _wait_for_exit(self):
+        if self.process:
+            await self.process.wait()
+
+    async def wait_until_ready(self, timeout: float | None = None) -> bool:
+        """
+        Aguarda até o servidor aceitar conexões: o que vier primeiro entre o marcador
+        de pronto na saída do processo ou no log e uma resposta RCON bem-sucedida.
+        Retorna False se o processo morrer ou o prazo (config.ready_timeout) acabar.
+        """
+        timeout = timeout if timeout is not None else self.config.ready_timeout
+        exit_task = asyncio.create_task(self._wait_for_exit())
+        ready_tasks = [
+            asyncio.create_task(self._ready_event.wait()),
+            asyncio.create_task(self._wait_for_log_marker()),
+            asyncio.create_task(self._wait_for_rcon()),
+        ]
+        try:
+            done, _ = await asyncio.wait([exit_task, *ready_tasks], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            return any(task in done and task.exception() is None for task in ready_tasks)
+        finally:
+            for task in [exit_task, *ready_tasks]:
+                task.cancel()
+            await asyncio.gather(exit_task, *ready_tasks, return_exceptions=True)
 
     def is_running(self) -> bool:
         """Verifica se o processo do servidor está ativo."""
-        return self.process is not None and self.process.poll() is None
\ No newline at end of file
+        return self.process is not None and self.process.is_running()
+
+# Implementação de cada tipo de jogo; o módulo só é importado quando o primeiro servidor daquele tipo é usado
+GAME_TYPES: Dict[str, str] = {
+    "minecraft": "services.minecraft_server:MinecraftServer",
+    "factorio": "services.factorio_server:FactorioServer",
+}
+_loaded_types: Dict[str, Type[GameServer]] = {}
+
+def load_game_type(game_type: str) -> Type[GameServer]:
+    """Retorna a classe de GameServer de um tipo de jogo, importando-a na primeira vez."""
+    server_class = _loaded_types.get(game_type)
+    if server_class is None:
+        target = GAME_TYPES.get(game_type)
+        if not target:
+            raise NotImplementedError(f"Tipo de jogo '{game_type}' não suportado.")
+        module_name, class_name = target.split(":")
+        server_class = _loaded_types[game_type] = getattr(importlib.import_module(module_name), class_name)
+    return server_class
@@ -0,0 +1,81 @@
+# services/idle_monitor.py
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+from core.errors import GameServerError
+from .game_server import GameServer, ServerStatus
+from .status_poller import StatusPoller, status_poller
+
+log = logging.getLogger(__name__)
+
+# Recebe o servidor desligado e o motivo, para avisar no canal de notificações
+IdleShutdownListener = Callable[[GameServer, str], Awaitable[None]]
+
+class _IdleState:
+    __slots__ = ("since", "warned")
+
+    def __init__(self, since: float):
+        self.since = since
+        self.warned: set[float] = set()
+
+class IdleMonitor:
+    """
+    Desliga servidores que ficam sem jogadores por mais que `idle.grace_period`.
+    Não faz consultas próprias: reage aos snapshots do StatusPoller, então o custo
+    não cresce com o número de servidores além do polling que já existe.
+    """
+    def __init__(self, poller: StatusPoller):
+        self._idle: Dict[str, _IdleState] = {}
+        self._stopping: Dict[str, asyncio.Task] = {}
+        self.listeners: list[IdleShutdownListener] = []
+        poller.subscribe(self._on_status)
+
+    async def _on_status(self, server: GameServer, status: ServerStatus):
+        policy = server.config.idle
+        if not policy.enabled or server.server_id in self._stopping:
+            return
+        if not status.online or status.player_count > 0:
+            self._idle.pop(server.server_id, None)
+            return
+        if not status.rcon_ok:
+            # Sem resposta do RCON não sabemos se há jogadores; mantemos o contador como está
+            return
+
+        now = time.monotonic()
+        state = self._idle.setdefault(server.server_id, _IdleState(now))
+        remaining = policy.grace_period - (now - state.since)
+
+        if remaining <= 0:
+            self._idle.pop(server.server_id, None)
+            self._stopping[server.server_id] = asyncio.create_task(self._shutdown(server))
+            return
+
+        pending = [w for w in policy.warnings if remaining <= w and w not in state.warned]
+        if pending:
+            state.warned.update(pending)
+            try:
+                await server.broadcast(f"Servidor vazio: desligando em {remaining / 60:.0f} min se ninguém entrar.")
+            except GameServerError as e:
+                log.warning(f"Não foi possível avisar os jogadores de '{server.server_id}': {e}")
+
+    async def _shutdown(self, server: GameServer):
+        minutes = server.config.idle.grace_period / 60
+        reason = f"Sem jogadores por {minutes:.0f} min; desligado automaticamente para liberar recursos."
+        log.info(f"Servidor '{server.server_id}' ocioso: {reason}")
+        try:
+            await server.stop()
+        except GameServerError as e:
+            log.error(f"Falha ao desligar o servidor ocioso '{server.server_id}': {e}")
+            return
+        finally:
+            del self._stopping[server.server_id]
+
+        for listener in self.listeners:
+            try:
+                await listener(server, reason)
+            except Exception:
+                log.exception(f"Erro ao notificar o desligamento por ociosidade de '{server.server_id}'")
+
+# Instância única para ser usada em toda a aplicação
+idle_monitor = IdleMonitor(status_poller)
@@ -0,0 +1,79 @@
+# services/log_tail.py
+import asyncio
+import os
+import shutil
+from typing import AsyncIterator
+
+class LogFollower:
+    """
+    Acompanha um arquivo de log de forma incremental (como `tail -F`), lendo apenas
+    os bytes novos e reabrindo o arquivo quando ele é rotacionado ou truncado.
+    Com `max_bytes`, o próprio leitor rotaciona o arquivo ao passar desse tamanho; o
+    processo que escreve nele deve tê-lo aberto em modo append.
+    """
+    def __init__(self, path: str, poll_interval: float = 0.5, max_bytes: int = 0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_bytes = max_bytes
+        self._inode: int | None = None
+        self._offset = 0
+
+    def mark(self):
+        """Registra o fim atual do arquivo; só linhas escritas depois disso serão lidas."""
+        try:
+            stat = os.stat(self.path)
+            self._inode, self._offset = stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            self._inode, self._offset = None, 0
+
+    def _read_new(self) -> bytes:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return b""
+        # Arquivo novo (rotacionado no boot) ou truncado: recomeça do início
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._inode, self._offset = stat.st_ino, 0
+        if stat.st_size == self._offset:
+            return b""
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        self._offset += len(data)
+        if self.max_bytes and self._offset > self.max_bytes:
+            try:
+                data += self._rotate()
+            except OSError:
+                pass # Tenta de novo na próxima leitura
+        return data
+
+    def _rotate(self) -> bytes:
+        """
+        Copia o arquivo para '<path>.1' e o esvazia, como o copytruncate do logrotate.
+        Retorna o que foi escrito depois da última leitura. O que chega durante a cópia é
+        relido logo antes do truncamento; só uma escrita entre essa releitura e o
+        truncamento se perderia.
+        """
+        rotated = f"{self.path}.1"
+        with open(self.path, "rb") as src, open(rotated, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+            dst.write(src.read())
+            os.truncate(self.path, 0)
+        with open(rotated, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        self._offset = 0
+        return data
+
+    async def lines(self) -> AsyncIterator[str]:
+        """Gera as linhas novas do arquivo indefinidamente."""
+        pending = b""
+        while True:
+            data = await asyncio.to_thread(self._read_new)
+            if not data:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            pending += data
+            *complete, pending = pending.split(b"\n")
+            for raw in complete:
+                yield raw.decode("utf-8", errors="replace").rstrip("\r")
@@ -1,22 +1,27 @@
 # services/minecraft_server.py
-import subprocess
-from aiomcrcon import Client, RCONConnectionError
-from .game_server import GameServer
+import re
+import time
+from .game_server import GameServer, ServerStatus
 from core.errors import ServerStartError, RconConnectionError as CustomRconError
 
+LIST_PATTERN = re.compile(r"There are (\d+) of a max(?: of)? (\d+) players online:?(.*)", re.DOTALL)
+
 class MinecraftServer(GameServer):
     """Implementação de GameServer para servidores Minecraft."""
+    # [12:00:00] [Server thread/INFO]: Done (12.345s)! For help, type "help"
+    READY_PATTERN = re.compile(r"Done \([\d.,]+s\)!")
+    DEFAULT_LOG_FILE = "logs/latest.log"
+    # "save-all flush" só responde depois de gravar tudo em disco
+    SAVE_PAUSE_COMMANDS = ("save-off", "save-all flush")
+    SAVE_RESUME_COMMANDS = ("save-on",)
 
     async def start(self) -> str:
         if self.is_running():
             raise ServerStartError(f"O servidor **{self.config.name}** já parece estar em execução!")
 
+        await self.rcon.reset()
         try:
-            self.process = subprocess.Popen(
-                self.config.start_command,
-                cwd=self.config.path,
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
+            await self._spawn()
             return f"O servidor **{self.config.name}** foi iniciado com sucesso!"
         except (FileNotFoundError, OSError) as e:
             raise ServerStartError(f"Falha ao iniciar o processo do Minecraft: Verifique o 'path' e o comando 'java'. Erro: {e}")
@@ -25,34 +30,40 @@ class MinecraftServer(GameServer):
         if not self.is_running():
             return f"O servidor **{self.config.name}** não está em execução."
 
+        self.stop_requested = True
         if force:
-            self.process.kill()
-            await self.process.wait()
+            await self.process.kill()
             return f"O servidor **{self.config.name}** foi forçadamente encerrado."
 
         try:
-            async with Client(self.config.rcon.host, self.config.rcon.port, self.config.rcon.password) as client:
-                await client.send_cmd("stop")
-            
-            self.process.wait(timeout=60)
-            return f"O servidor **{self.config.name}** foi parado com sucesso."
-        except RCONConnectionError:
-            self.process.kill()
-            raise CustomRconError("Não foi possível conectar via RCON para parar. O processo foi encerrado à força.")
-        except subprocess.TimeoutExpired:
-            self.process.kill()
+            if await self._shutdown("stop", timeout=60):
+                return f"O servidor **{self.config.name}** foi parado com sucesso."
             return f"O servidor **{self.config.name}** demorou a responder e foi forçado a fechar."
+        except CustomRconError:
+            await self.process.kill()
+            raise CustomRconError("Não foi possível conectar via RCON para parar. O processo foi encerrado à força.")
 
-    async def get_status(self) -> str:
+    async def query_status(self) -> ServerStatus:
+        if not self.is_running():
+            return ServerStatus(online=False)
+
+        started = time.perf_counter()
         try:
-            async with Client(self.config.rcon.host, self.config.rcon.port, self.config.rcon.password) as client:
-                list_resp, _ = await client.send_cmd("list")
-            
-            parts = list_resp.split()
-            player_count = f"{parts[2]}/{parts[7]}"
-            players = " ".join(parts[10:]) if len(parts) > 10 else "Nenhum"
-            return f"🟢 **Online** | Jogadores: **{player_count}**\n`{players}`"
-        except RCONConnectionError:
-            return "🟡 **Online** (Falha na conexão RCON)"
-        except Exception:
-            return "🟡 **Online** (RCON respondeu de forma inesperada)"
\ No newline at end of file
+            list_resp = await self.rcon.send("list")
+        except CustomRconError:
+            return ServerStatus(online=True, error="Falha na conexão RCON")
+        latency = time.perf_counter() - started
+
+        # "There are 2 of a max of 20 players online: Steve, Alex"
+        match = LIST_PATTERN.search(list_resp)
+        if not match:
+            return ServerStatus(online=True, rcon_latency=latency, error="RCON respondeu de forma inesperada")
+        names = [name.strip() for name in match.group(3).split(",") if name.strip()]
+        return ServerStatus(
+            online=True,
+            rcon_ok=True,
+            player_count=int(match.group(1)),
+            max_players=int(match.group(2)),
+            player_names=names,
+            rcon_latency=latency,
+        )
\ No newline at end of file
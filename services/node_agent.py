@@ -0,0 +1,295 @@
+# services/node_agent.py
+"""
+Agente de nó: roda em cada host remoto e expõe ao bot as operações dos servidores de
+jogo daquele host (iniciar, parar, status, se está rodando, uso de recursos). O bot
+envia a ServerConfig de cada servidor; o agente só precisa do segredo compartilhado
+(NODE_TOKEN no ambiente ou no .env). A partir da raiz do repositório:
+
+    NODE_TOKEN=... python -m services.node_agent --listen 0.0.0.0 --port 7800
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from dataclasses import asdict
+from typing import Any, Dict, Set
+
+from core.config import AgentSecrets, ServerConfig
+from core.errors import GameServerError, NodeConnectionError, ServerNotFoundError, ServerStartError
+from .game_server import GameServer, load_game_type
+from .node_protocol import accept_handshake, encode_frame, read_frame
+from .proc_stats import ProcessTreeSampler
+from .rcon_pool import RconPool
+from .state_store import StateStore, describe_process, is_same_process
+
+log = logging.getLogger(__name__)
+
+OUTPUT_FLUSH_INTERVAL = 0.25 # Linhas de console são enviadas ao bot em lotes
+MAX_WRITE_BUFFER = 1024 * 1024 # Acima disso, lotes de console para uma conexão lenta são descartados
+
+class _Connection:
+    """Uma conexão autenticada com o bot."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.dropped_output = 0
+
+    def send(self, message: Dict[str, Any], droppable: bool = False):
+        if self.writer.is_closing():
+            return
+        if droppable:
+            if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                if not self.dropped_output:
+                    log.warning("Conexão com o bot está lenta; descartando a saída de console até o buffer esvaziar.")
+                self.dropped_output += 1
+                return
+            if self.dropped_output:
+                log.warning(f"{self.dropped_output} lote(s) de saída de console descartado(s) para a conexão lenta.")
+                self.dropped_output = 0
+        self.writer.write(encode_frame(message))
+
+class NodeAgent:
+    """
+    Mantém as instâncias de GameServer deste host e atende as requisições do bot, cada
+    uma em sua própria task (uma parada demorada não segura um /status). Saída de
+    console e términos de processo são enviados como eventos a todas as conexões.
+    Os processos são gravados em `state_file` e readotados quando o bot sincroniza
+    depois de um reinício do agente.
+    """
+    def __init__(self, token: str, state_file: str):
+        self._token = token
+        self.servers: Dict[str, GameServer] = {}
+        self._rcon_pools: Dict[str, RconPool] = {}
+        self._state = StateStore(state_file)
+        self._sampler = ProcessTreeSampler()
+        self._connections: Set[_Connection] = set()
+        self._output: Dict[str, list[str]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._requests: Set[asyncio.Task] = set()
+        # Servidores com um op_start em andamento; suas instâncias não podem ser trocadas
+        self._starting: Set[str] = set()
+        # Fechamentos de pools RCON substituídos, que rodam em segundo plano
+        self._closing: Set[asyncio.Task] = set()
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def close(self):
+        """Fecha as conexões RCON. Os processos dos jogos continuam rodando."""
+        await asyncio.gather(*(pool.close() for pool in self._rcon_pools.values()))
+        await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def _broadcast(self, message: Dict[str, Any], droppable: bool = False):
+        for connection in list(self._connections):
+            connection.send(message, droppable)
+
+    def _on_output(self, server: GameServer, line: str):
+        self._output.setdefault(server.server_id, []).append(line)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(OUTPUT_FLUSH_INTERVAL, self._flush_output)
+
+    def _flush_output(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        self._flush_handle = None
+        output, self._output = self._output, {}
+        for server_id, lines in output.items():
+            self._broadcast({"event": "output", "server_id": server_id, "lines": lines}, droppable=True)
+
+    def _on_spawn(self, server: GameServer):
+        record = describe_process(server.process.pid, server.config.start_command, server.process.console_log)
+        if record is None:
+            return
+        try:
+            self._state.put(server.server_id, record)
+        except OSError as e:
+            log.warning(f"Não foi possível gravar o estado de '{server.server_id}': {e}")
+
+    def _on_exit(self, server: GameServer, returncode: int | None, crashed: bool):
+        self._flush_output() # O console final chega ao bot antes do término
+        try:
+            self._state.remove(server.server_id)
+        except OSError as e:
+            log.warning(f"Não foi possível atualizar o estado de '{server.server_id}': {e}")
+        self._broadcast({"event": "exit", "server_id": server.server_id, "returncode": returncode, "crashed": crashed})
+
+    def _instance(self, server_id: str, config: Dict[str, Any] | None = None) -> GameServer:
+        """Retorna a instância do servidor, criando-a (ou atualizando a config) quando o bot a envia."""
+        server = self.servers.get(server_id)
+        if config is None:
+            if server is None:
+                raise ServerNotFoundError(f"Servidor '{server_id}' desconhecido neste nó.")
+            return server
+
+        server_config = ServerConfig(**config)
+        if server is not None and (server.is_running() or server_id in self._starting):
+            server.config = server_config # Vale a partir do próximo início, como no bot
+            return server
+
+        pool = self._rcon_pools.get(server_id)
+        if pool is None or pool.config != server_config.rcon:
+            if pool is not None:
+                task = asyncio.create_task(pool.close())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            pool = self._rcon_pools[server_id] = RconPool(server_config.rcon, name=server_id)
+        server = load_game_type(server_config.game_type)(server_id, server_config, rcon=pool)
+        server.spawn_listeners.append(self._on_spawn)
+        server.output_listeners.append(self._on_output)
+        server.exit_listeners.append(self._on_exit)
+        self.servers[server_id] = server
+        return server
+
+    def _running(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            server_id: {"pid": server.process.pid}
+            for server_id, server in self.servers.items()
+            if server.is_running()
+        }
+
+    # Operações expostas ao bot; cada `op_<nome>` recebe os "args" da requisição
+
+    async def op_sync(self, configs: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Recebe as configurações dos servidores que o bot pode rodar neste nó e readota os
+        processos que continuaram vivos desde um reinício do agente. Retorna os que estão rodando.
+        """
+        records = self._state.load()
+        for server_id, config in configs.items():
+            server = self._instance(server_id, config)
+            record = records.get(server_id)
+            if record is None or server.is_running():
+                continue
+            if is_same_process(record):
+                server.adopt(record.pid, record.console_log)
+                log.info(f"Servidor '{server_id}' readotado (pid {record.pid}).")
+            else:
+                self._state.remove(server_id)
+        return self._running()
+
+    async def op_start(self, server_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        # Dois pedidos simultâneos (p.ex. de conexões diferentes) não podem iniciar o jogo em dobro
+        if server_id in self._starting:
+            raise ServerStartError(f"O servidor '{server_id}' já está sendo iniciado neste nó.")
+        server = self._instance(server_id, config)
+        self._starting.add(server_id)
+        try:
+            message = await server.start()
+        finally:
+            self._starting.discard(server_id)
+        return {"message": message, "pid": server.process.pid}
+
+    async def op_stop(self, server_id: str, force: bool = False) -> str:
+        return await self._instance(server_id).stop(force=force)
+
+    async def op_status(self, server_id: str) -> Dict[str, Any]:
+        status = asdict(await self._instance(server_id).query_status())
+        del status["checked_at"] # Relógio monotônico deste host; o bot usa o seu
+        return status
+
+    async def op_is_running(self, server_id: str) -> bool:
+        server = self.servers.get(server_id)
+        return server is not None and server.is_running()
+
+    async def op_wait_ready(self, server_id: str, ready_timeout: float | None = None) -> bool:
+        return await self._instance(server_id).wait_until_ready(ready_timeout)
+
+    async def op_broadcast(self, server_id: str, message: str):
+        await self._instance(server_id).broadcast(message)
+
+    async def op_list(self) -> Dict[str, Dict[str, Any]]:
+        return self._running()
+
+    async def op_usage(self) -> Dict[str, list[float]]:
+        """Métricas de recursos de cada servidor em execução, na ordem de proc_stats.METRICS."""
+        leaders = {server_id: info["pid"] for server_id, info in self._running().items()}
+        self._sampler.forget(leaders)
+        if not leaders or not ProcessTreeSampler.available():
+            return {}
+        results, _ = await asyncio.to_thread(self._sampler.sample, leaders)
+        return {server_id: list(values) for server_id, values in results.items()}
+
+    async def op_load(self) -> Dict[str, Any]:
+        """Carga do host, usada pelo bot para escolher onde iniciar servidores com node: auto."""
+        running = [server for server in self.servers.values() if server.is_running()]
+        try:
+            loadavg = os.getloadavg()[0]
+        except OSError:
+            loadavg = 0.0
+        return {
+            "running": len(running),
+            "memory_mb": sum(server.config.memory_mb for server in running),
+            "cpu_cores": sum(server.config.cpu_cores for server in running),
+            "loadavg": loadavg,
+            "cpus": os.cpu_count() or 1,
+        }
+
+    async def _dispatch(self, connection: _Connection, message: Dict[str, Any]):
+        request_id = message.get("id")
+        op = message.get("op")
+        handler = getattr(self, f"op_{op}", None) if isinstance(op, str) else None
+        try:
+            if handler is None:
+                raise GameServerError(f"Operação desconhecida: {op!r}")
+            reply = {"id": request_id, "result": await handler(**(message.get("args") or {}))}
+        except GameServerError as e:
+            reply = {"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}}
+        except Exception as e:
+            log.exception(f"Erro ao executar a operação '{op}'")
+            reply = {"id": request_id, "error": {"type": "Exception", "message": f"{type(e).__name__}: {e}"}}
+        connection.send(reply)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        if not await accept_handshake(reader, writer, self._token):
+            log.warning(f"Conexão de {peer} recusada: autenticação falhou.")
+            writer.close()
+            return
+
+        log.info(f"Bot conectado a partir de {peer}.")
+        connection = _Connection(writer)
+        self._connections.add(connection)
+        try:
+            while True:
+                message = await read_frame(reader)
+                # Requisições em andamento não são canceladas se a conexão cair: uma parada
+                # interrompida no meio deixaria o servidor em um estado pior
+                task = asyncio.create_task(self._dispatch(connection, message))
+                self._requests.add(task)
+                task.add_done_callback(self._requests.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, NodeConnectionError, ValueError):
+            pass
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+            log.info(f"Bot em {peer} desconectado.")
+
+async def run_agent(host: str, port: int, state_file: str):
+    agent = NodeAgent(AgentSecrets().node_token, state_file)
+    server = await agent.serve(host, port)
+    log.info(f"Agente de nó ouvindo em {host}:{port}.")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    # Os jogos rodam em sessões próprias e seguem vivos; o próximo agente os readota
+    server.close()
+    await server.wait_closed()
+    await agent.close()
+    log.info("Agente de nó encerrado.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Agente de nó do BSSM.")
+    parser.add_argument("--listen", default="0.0.0.0", help="Endereço em que o agente aceita conexões do bot")
+    parser.add_argument("--port", type=int, default=7800)
+    parser.add_argument("--state-file", default="bssm_agent_state.json", help="Processos em execução, para readotá-los")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(name)s: %(message)s')
+    asyncio.run(run_agent(args.listen, args.port, args.state_file))
+
+if __name__ == "__main__":
+    main()
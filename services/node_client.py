@@ -0,0 +1,167 @@
+# services/node_client.py
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from core.config import NodeConfig
+from core import errors
+from core.errors import GameServerError, NodeConnectionError
+from .node_protocol import encode_frame, open_handshake, read_frame
+
+log = logging.getLogger(__name__)
+
+# Recebe o cliente do nó e o evento enviado pelo agente ("output", "exit")
+NodeEventListener = Callable[["NodeClient", Dict[str, Any]], None]
+# Chamado a cada (re)conexão autenticada, antes de qualquer outra requisição
+NodeConnectListener = Callable[["NodeClient"], Awaitable[None]]
+
+class NodeClient:
+    """
+    Conexão do bot com o agente de um nó remoto. Mantém uma única conexão TCP
+    autenticada, reconectando com backoff exponencial, e multiplexa nela as
+    requisições: cada uma recebe um id e espera a própria resposta, em qualquer ordem.
+    A carga do nó é consultada periodicamente para a escolha do host menos carregado.
+    """
+    RECONNECT_BASE = 1.0
+    RECONNECT_MAX = 30.0
+    LOAD_INTERVAL = 10.0
+
+    def __init__(self, node_id: str, node_config: NodeConfig, token: str):
+        self.node_id = node_id
+        self.config = node_config
+        self._token = token
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._connected = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        # Última resposta de "load" e quando chegou
+        self.load: Dict[str, Any] | None = None
+        self.load_at = 0.0
+        self.event_listeners: List[NodeEventListener] = []
+        self.connect_listeners: List[NodeConnectListener] = []
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"node-{self.node_id}")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def wait_connected(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def call(self, op: str, timeout: float | None = None, **args) -> Any:
+        """
+        Executa uma operação no agente e retorna o resultado. `timeout` padrão é o do
+        nó; operações longas (start, stop, wait_ready) passam 0 para esperar sem prazo.
+        Erros do jogo voltam como a mesma exceção de core.errors lançada no agente.
+        """
+        if self._writer is None:
+            raise NodeConnectionError(f"Nó '{self.node_id}' ({self.config.host}:{self.config.port}) indisponível.")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(encode_frame({"id": request_id, "op": op, "args": args}))
+            timeout = self.config.timeout if timeout is None else timeout
+            reply = await (asyncio.wait_for(future, timeout) if timeout else future)
+        except asyncio.TimeoutError:
+            raise NodeConnectionError(f"Nó '{self.node_id}' não respondeu a '{op}' em {timeout:.0f}s.")
+        finally:
+            self._pending.pop(request_id, None)
+
+        if "error" in reply:
+            error = reply["error"]
+            error_class = getattr(errors, str(error.get("type")), None)
+            if not (isinstance(error_class, type) and issubclass(error_class, GameServerError)):
+                error_class = GameServerError
+            raise error_class(error.get("message") or f"Erro no nó '{self.node_id}'.")
+        return reply.get("result")
+
+    async def refresh_load(self) -> Dict[str, Any] | None:
+        try:
+            self.load = await self.call("load")
+            self.load_at = time.monotonic()
+        except GameServerError as e:
+            log.debug(f"Falha ao consultar a carga do nó '{self.node_id}': {e}")
+        return self.load
+
+    def _fail_pending(self, reason: str):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(NodeConnectionError(reason))
+        self._pending.clear()
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        while True:
+            message = await read_frame(reader)
+            request_id = message.get("id")
+            if request_id is not None:
+                future = self._pending.get(request_id)
+                if future and not future.done():
+                    future.set_result(message)
+                continue
+            for listener in self.event_listeners:
+                try:
+                    listener(self, message)
+                except Exception:
+                    log.exception(f"Erro ao tratar o evento '{message.get('event')}' do nó '{self.node_id}'")
+
+    async def _load_loop(self):
+        while True:
+            await self.refresh_load()
+            await asyncio.sleep(self.LOAD_INTERVAL)
+
+    async def _run(self):
+        failures = 0
+        while True:
+            writer = None
+            tasks: List[asyncio.Task] = []
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.config.host, self.config.port), self.config.timeout
+                )
+                await open_handshake(reader, writer, self._token)
+                self._writer = writer
+                failures = 0
+                log.info(f"Conectado ao nó '{self.node_id}' em {self.config.host}:{self.config.port}.")
+
+                tasks.append(asyncio.create_task(self._read_loop(reader)))
+                # O nó só conta como conectado (e recebe servidores) depois da sincronização
+                for listener in self.connect_listeners:
+                    await listener(self)
+                self._connected.set()
+                tasks.append(asyncio.create_task(self._load_loop()))
+                # O loop de leitura só termina quando a conexão cai
+                await tasks[0]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                if failures == 1 or self._writer is not None:
+                    log.warning(f"Conexão com o nó '{self.node_id}' perdida ou recusada: {e!r}")
+            finally:
+                self._connected.clear()
+                self._writer = None
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self._fail_pending(f"Conexão com o nó '{self.node_id}' perdida.")
+                if writer is not None:
+                    writer.close()
+                self.load = None
+            await asyncio.sleep(min(self.RECONNECT_MAX, self.RECONNECT_BASE * 2 ** max(0, failures - 1)))
@@ -0,0 +1,82 @@
+# services/node_protocol.py
+"""
+Protocolo entre o bot e os agentes de nó. Cada mensagem é um quadro com 4 bytes de
+tamanho (big-endian) seguidos de um objeto JSON em UTF-8. Sobre uma única conexão
+TCP correm várias requisições ao mesmo tempo, casadas pelo campo "id":
+
+    bot -> agente    {"id": 7, "op": "status", "args": {"server_id": "minecraft"}}
+    agente -> bot    {"id": 7, "result": {...}}  ou  {"id": 7, "error": {"type": ..., "message": ...}}
+    agente -> bot    {"event": "output" | "exit", ...}  (sem "id", a qualquer momento)
+
+A conexão começa com um desafio-resposta HMAC-SHA256 sobre um segredo compartilhado
+(`node_token`), nos dois sentidos; o segredo nunca trafega. O conteúdo não é cifrado:
+use o agente em uma rede privada ou através de um túnel.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import secrets
+import struct
+from typing import Any, Dict
+
+from core.errors import NodeConnectionError
+
+PROTOCOL_VERSION = 1
+MAX_FRAME = 4 * 1024 * 1024
+HANDSHAKE_TIMEOUT = 10.0
+FRAME_HEADER = struct.Struct(">I")
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """Lê um quadro. Propaga asyncio.IncompleteReadError quando a conexão fecha."""
+    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if length > MAX_FRAME:
+        raise NodeConnectionError(f"Quadro de {length} bytes excede o limite do protocolo.")
+    message = json.loads(await reader.readexactly(length))
+    if not isinstance(message, dict):
+        raise NodeConnectionError("Quadro inválido no protocolo de nós.")
+    return message
+
+def _sign(token: str, role: str, first_nonce: str, second_nonce: str) -> str:
+    return hmac.new(token.encode("utf-8"), f"{role}:{first_nonce}:{second_nonce}".encode(), hashlib.sha256).hexdigest()
+
+async def accept_handshake(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, token: str) -> bool:
+    """Lado do agente: desafia o cliente e prova que conhece o mesmo segredo."""
+    server_nonce = secrets.token_hex(16)
+    writer.write(encode_frame({"type": "challenge", "nonce": server_nonce, "version": PROTOCOL_VERSION}))
+    await writer.drain()
+    try:
+        reply = await asyncio.wait_for(read_frame(reader), HANDSHAKE_TIMEOUT)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, NodeConnectionError, ValueError):
+        return False
+    client_nonce = str(reply.get("nonce", ""))
+    expected = _sign(token, "client", server_nonce, client_nonce)
+    if reply.get("type") != "auth" or not client_nonce or not hmac.compare_digest(str(reply.get("mac", "")), expected):
+        writer.write(encode_frame({"type": "denied"}))
+        await writer.drain()
+        return False
+    writer.write(encode_frame({"type": "welcome", "mac": _sign(token, "server", client_nonce, server_nonce)}))
+    await writer.drain()
+    return True
+
+async def open_handshake(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, token: str):
+    """Lado do bot: responde ao desafio e confere a prova do agente. Lança NodeConnectionError."""
+    try:
+        challenge = await asyncio.wait_for(read_frame(reader), HANDSHAKE_TIMEOUT)
+        if challenge.get("type") != "challenge" or challenge.get("version") != PROTOCOL_VERSION:
+            raise NodeConnectionError(f"Agente fala outra versão do protocolo ({challenge.get('version')}).")
+        server_nonce = str(challenge["nonce"])
+        client_nonce = secrets.token_hex(16)
+        writer.write(encode_frame({"type": "auth", "nonce": client_nonce, "mac": _sign(token, "client", server_nonce, client_nonce)}))
+        await writer.drain()
+        welcome = await asyncio.wait_for(read_frame(reader), HANDSHAKE_TIMEOUT)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, KeyError, ValueError) as e:
+        raise NodeConnectionError(f"Falha no handshake com o agente: {e!r}") from e
+    if welcome.get("type") != "welcome":
+        raise NodeConnectionError("O agente recusou a autenticação (node_token diferente?).")
+    if not hmac.compare_digest(str(welcome.get("mac", "")), _sign(token, "server", client_nonce, server_nonce)):
+        raise NodeConnectionError("O agente não provou conhecer o node_token.")
@@ -0,0 +1,115 @@
+# services/proc_stats.py
+import os
+import time
+from typing import Dict, Iterable
+
+PROC = "/proc"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Ordem dos valores devolvidos por ProcessTreeSampler.sample
+METRICS = ("cpu_percent", "rss_bytes", "threads", "open_fds", "read_bps", "write_bps")
+
+class _TreeCounters:
+    """Contadores acumulados de uma árvore de processos, usados para calcular taxas."""
+    __slots__ = ("cpu_ticks", "read_bytes", "write_bytes", "timestamp")
+
+    def __init__(self, cpu_ticks: int, read_bytes: int, write_bytes: int, timestamp: float):
+        self.cpu_ticks = cpu_ticks
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+        self.timestamp = timestamp
+
+def _read_stat(pid: str) -> tuple[int, int, int, int] | None:
+    """Retorna (sessão, ticks de CPU, threads, páginas RSS) de /proc/<pid>/stat."""
+    try:
+        with open(f"{PROC}/{pid}/stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # O nome do processo pode conter espaços; os campos começam após o último ')'
+    fields = raw[raw.rfind(b")") + 2:].split()
+    return int(fields[3]), int(fields[11]) + int(fields[12]), int(fields[17]), int(fields[21])
+
+def _read_io(pid: str) -> tuple[int, int]:
+    read_bytes = write_bytes = 0
+    try:
+        with open(f"{PROC}/{pid}/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"read_bytes:"):
+                    read_bytes = int(line.split()[1])
+                elif line.startswith(b"write_bytes:"):
+                    write_bytes = int(line.split()[1])
+    except OSError:
+        pass
+    return read_bytes, write_bytes
+
+def _count_fds(pid: str) -> int:
+    try:
+        return len(os.listdir(f"{PROC}/{pid}/fd"))
+    except OSError:
+        return 0
+
+class ProcessTreeSampler:
+    """
+    Mede a árvore de processos de cada servidor lendo /proc. Cada servidor roda em sua
+    própria sessão (ver ProcessSupervisor), então a árvore é o conjunto de processos
+    com a sessão do líder. Guarda os contadores da amostra anterior para calcular as
+    taxas; usado pelo ResourceSampler do bot e pelo agente dos nós remotos.
+    """
+    def __init__(self):
+        self._counters: Dict[str, _TreeCounters] = {}
+
+    @staticmethod
+    def available() -> bool:
+        return os.path.isdir(f"{PROC}/self")
+
+    def forget(self, active: Iterable[str]):
+        """Descarta os contadores de servidores que não estão mais em `active`."""
+        active = set(active)
+        for server_id in list(self._counters):
+            if server_id not in active:
+                del self._counters[server_id]
+
+    def sample(self, leaders: Dict[str, int]) -> tuple[Dict[str, tuple[float, ...]], float]:
+        """
+        Varre /proc uma única vez e agrega as métricas de cada sessão monitorada.
+        Retorna também o tempo de CPU gasto na varredura.
+        """
+        cpu_before = time.thread_time()
+        sessions = {pid: server_id for server_id, pid in leaders.items()}
+        totals: Dict[str, list[int]] = {server_id: [0, 0, 0, 0, 0, 0] for server_id in leaders}
+
+        for pid in os.listdir(PROC):
+            if not pid.isdigit():
+                continue
+            stat = _read_stat(pid)
+            if stat is None or stat[0] not in sessions:
+                continue
+            session, cpu_ticks, threads, rss_pages = stat
+            read_bytes, write_bytes = _read_io(pid)
+            total = totals[sessions[session]]
+            total[0] += cpu_ticks
+            total[1] += rss_pages * PAGE_SIZE
+            total[2] += threads
+            total[3] += _count_fds(pid)
+            total[4] += read_bytes
+            total[5] += write_bytes
+
+        now = time.monotonic()
+        results = {}
+        for server_id, (cpu_ticks, rss, threads, fds, read_bytes, write_bytes) in totals.items():
+            previous = self._counters.get(server_id)
+            self._counters[server_id] = _TreeCounters(cpu_ticks, read_bytes, write_bytes, now)
+            if previous is None:
+                continue # Primeira amostra serve apenas de base para as taxas
+            elapsed = max(now - previous.timestamp, 1e-6)
+            results[server_id] = (
+                max(0, cpu_ticks - previous.cpu_ticks) / CLOCK_TICKS / elapsed * 100,
+                rss,
+                threads,
+                fds,
+                max(0, read_bytes - previous.read_bytes) / elapsed,
+                max(0, write_bytes - previous.write_bytes) / elapsed,
+            )
+        return results, time.thread_time() - cpu_before
@@ -0,0 +1,174 @@
+# services/process_supervisor.py
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+from typing import Callable, List
+from .log_tail import LogFollower
+
+log = logging.getLogger(__name__)
+
+OutputListener = Callable[[str], None]
+ExitListener = Callable[[int | None], None]
+
+class ProcessSupervisor:
+    """
+    Controla o processo de um servidor de jogo sem bloquear o event loop.
+    O processo roda em seu próprio grupo (sessão, no Linux) para que filhos como JVMs
+    auxiliares ou instâncias headless sejam encerrados junto. A saída vai para um
+    arquivo de console, acompanhado de forma incremental; assim o processo sobrevive
+    a um reinício do bot e pode ser readotado depois (ver `adopt`). Com `max_console_bytes`,
+    o console é rotacionado quando passa desse tamanho.
+    """
+    def __init__(self, pid: int, console_log: str, process: asyncio.subprocess.Process | None = None,
+                 max_console_bytes: int = 0):
+        self._pid = pid
+        self._process = process
+        self._returncode: int | None = None
+        self.console_log = console_log
+        self.output_listeners: List[OutputListener] = []
+        self.exit_listeners: List[ExitListener] = []
+        self._exited = asyncio.Event()
+        self._follower = LogFollower(console_log, max_bytes=max_console_bytes)
+        if process is None:
+            # Readotado: o que já está no console foi visto pela instância anterior do bot
+            self._follower.mark()
+        self._reader_task = asyncio.create_task(self._drain_output())
+        self._watch_task = asyncio.create_task(self._watch_exit())
+
+    @classmethod
+    async def spawn(cls, command: List[str], cwd: str, console_log: str, max_console_bytes: int = 0) -> "ProcessSupervisor":
+        """Inicia o comando em um novo grupo de processos. Propaga FileNotFoundError/OSError."""
+        if sys.platform == "win32":
+            group_kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group_kwargs = {"start_new_session": True}
+
+        # Cada boot começa um console novo; o arquivo (e não um pipe) mantém o processo
+        # independente do bot, que pode reiniciar sem derrubar o jogo. Em modo append cada
+        # escrita vai para o fim atual, então o arquivo pode ser truncado na rotação
+        open(console_log, "wb").close()
+        with open(console_log, "ab") as console:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=cwd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=console,
+                stderr=subprocess.STDOUT,
+                **group_kwargs,
+            )
+        return cls(process.pid, console_log, process, max_console_bytes)
+
+    @classmethod
+    def adopt(cls, pid: int, console_log: str, max_console_bytes: int = 0) -> "ProcessSupervisor":
+        """Passa a supervisionar um processo que já estava rodando (p.ex. iniciado antes de um reinício do bot)."""
+        return cls(pid, console_log, max_console_bytes=max_console_bytes)
+
+    @property
+    def pid(self) -> int:
+        return self._pid
+
+    @property
+    def returncode(self) -> int | None:
+        """Código de saída; processos readotados não são filhos do bot e terminam com None."""
+        return self._returncode
+
+    def is_running(self) -> bool:
+        return not self._exited.is_set()
+
+    async def _drain_output(self):
+        async for line in self._follower.lines():
+            for listener in self.output_listeners:
+                try:
+                    listener(line)
+                except Exception:
+                    log.exception(f"Erro em um listener de saída do processo {self.pid}")
+
+    async def _wait_for_foreign_exit(self):
+        # O pidfd fica legível quando o processo termina, mesmo não sendo filho do bot
+        loop = asyncio.get_running_loop()
+        try:
+            pidfd = os.pidfd_open(self._pid)
+        except (AttributeError, OSError):
+            # Kernel sem pidfd: verificação periódica como último recurso
+            while _pid_alive(self._pid):
+                await asyncio.sleep(2)
+            return
+        exited = loop.create_future()
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+        try:
+            await exited
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+    async def _watch_exit(self):
+        if self._process is not None:
+            self._returncode = await self._process.wait()
+        else:
+            await self._wait_for_foreign_exit()
+        if sys.platform != "win32":
+            # O líder saiu; garante que nenhum filho do grupo ficou para trás
+            self._signal_group(signal.SIGKILL)
+        self._exited.set()
+        log.info(f"Processo {self.pid} terminou com código {self._returncode}.")
+        for listener in self.exit_listeners:
+            try:
+                listener(self._returncode)
+            except Exception:
+                log.exception(f"Erro em um listener de término do processo {self.pid}")
+        # Dá ao leitor a chance de entregar as últimas linhas do console antes de parar
+        await asyncio.sleep(self._follower.poll_interval * 2)
+        self._reader_task.cancel()
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """Aguarda o término do processo. Retorna False se o prazo acabar antes."""
+        try:
+            await asyncio.wait_for(self._exited.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _signal_group(self, sig: int):
+        try:
+            if sys.platform == "win32":
+                if self._process is None:
+                    return
+                if sig == signal.SIGTERM:
+                    self._process.terminate()
+                else:
+                    self._process.kill()
+            else:
+                os.killpg(self._pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def kill(self):
+        """Encerra o grupo inteiro imediatamente (SIGKILL) e aguarda o término."""
+        self._signal_group(getattr(signal, "SIGKILL", signal.SIGTERM))
+        await self.wait()
+
+    async def terminate(self, timeout: float = 30.0) -> bool:
+        """
+        Pede o encerramento do grupo (SIGTERM) e, se o processo não terminar dentro
+        do prazo, força com SIGKILL. Retorna True se o encerramento foi gracioso.
+        """
+        if not self.is_running():
+            return True
+        self._signal_group(signal.SIGTERM)
+        if await self.wait(timeout):
+            return True
+        log.warning(f"Processo {self.pid} ignorou o SIGTERM por {timeout:.0f}s; forçando o encerramento.")
+        await self.kill()
+        return False
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
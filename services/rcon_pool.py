@@ -0,0 +1,144 @@
+# services/rcon_pool.py
+import asyncio
+import logging
+import time
+from aiomcrcon import Client, RCONConnectionError, IncorrectPasswordError
+from core.config import RconConfig
+from core.errors import RconConnectionError
+from .diagnostics import diagnostics
+
+log = logging.getLogger(__name__)
+
+
+class _PooledClient:
+    """Uma conexão RCON autenticada mantida viva entre comandos."""
+
+    def __init__(self, rcon_config: RconConfig):
+        self._rcon_config = rcon_config
+        self._client: Client | None = None
+        self.last_used = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    def is_healthy(self, max_idle: float) -> bool:
+        """Verificação barata: o socket ainda está aberto e a conexão não ficou ociosa demais."""
+        if self._client is None:
+            return False
+        writer = getattr(self._client, "_writer", None)
+        if writer is not None and writer.is_closing():
+            return False
+        return time.monotonic() - self.last_used < max_idle
+
+    async def connect(self):
+        client = Client(self._rcon_config.host, self._rcon_config.port, self._rcon_config.password)
+        await client.connect(timeout=self._rcon_config.timeout)
+        self._client = client
+        self.last_used = time.monotonic()
+
+    async def send(self, command: str, timeout: float | None = None) -> str:
+        response, _ = await self._client.send_cmd(command, timeout=timeout or self._rcon_config.timeout)
+        self.last_used = time.monotonic()
+        return response
+
+    async def close(self):
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+
+class RconPool:
+    """
+    Pool de conexões RCON de um único servidor.
+    Mantém conexões autenticadas abertas, serializa os comandos em cada conexão
+    e reconecta com backoff exponencial quando o servidor não responde.
+    """
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+
+    def __init__(self, rcon_config: RconConfig, name: str | None = None):
+        self.config = rcon_config
+        # Rótulo das métricas de RCON; normalmente o ID do servidor
+        self.name = name or f"{rcon_config.host}:{rcon_config.port}"
+        self._clients = [_PooledClient(rcon_config) for _ in range(max(1, rcon_config.pool_size))]
+        self._idle: asyncio.Queue[_PooledClient] = asyncio.Queue()
+        for pooled in self._clients:
+            self._idle.put_nowait(pooled)
+        self._failures = 0
+        self._retry_at = 0.0
+        self._closed = False
+
+    def _register_failure(self):
+        self._failures += 1
+        delay = min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** (self._failures - 1)))
+        self._retry_at = time.monotonic() + delay
+
+    async def _ensure_connected(self, pooled: _PooledClient):
+        if pooled.is_healthy(self.config.max_idle):
+            return
+        await pooled.close()
+
+        remaining = self._retry_at - time.monotonic()
+        if remaining > 0:
+            raise RconConnectionError(
+                f"RCON em {self.config.host}:{self.config.port} indisponível; nova tentativa em {remaining:.1f}s."
+            )
+
+        started = time.perf_counter()
+        try:
+            await pooled.connect()
+        except (RCONConnectionError, IncorrectPasswordError, OSError, asyncio.TimeoutError) as e:
+            diagnostics.observe_rcon(self.name, "connect", time.perf_counter() - started, ok=False)
+            self._register_failure()
+            raise RconConnectionError(f"Falha ao conectar via RCON em {self.config.host}:{self.config.port}: {e}") from e
+        diagnostics.observe_rcon(self.name, "connect", time.perf_counter() - started)
+        self._failures = 0
+        log.debug(f"Conexão RCON estabelecida com {self.config.host}:{self.config.port}.")
+
+    async def send(self, command: str, timeout: float | None = None) -> str:
+        """
+        Executa um comando em uma conexão do pool e retorna a resposta. `timeout`
+        substitui o prazo de resposta da configuração, para comandos demorados.
+        """
+        if self._closed:
+            raise RconConnectionError("O pool RCON já foi encerrado.")
+
+        pooled = await self._idle.get()
+        try:
+            # Uma conexão reaproveitada pode ter caído sem aviso: tentamos de novo uma vez com uma conexão nova.
+            for attempt in range(2):
+                reused = pooled.connected
+                await self._ensure_connected(pooled)
+                started = time.perf_counter()
+                try:
+                    response = await pooled.send(command, timeout)
+                    diagnostics.observe_rcon(self.name, "command", time.perf_counter() - started)
+                    return response
+                except asyncio.CancelledError:
+                    # Uma resposta pela metade deixaria a conexão dessincronizada
+                    await pooled.close()
+                    raise
+                except Exception as e:
+                    diagnostics.observe_rcon(self.name, "command", time.perf_counter() - started, ok=False)
+                    await pooled.close()
+                    if reused and attempt == 0:
+                        continue
+                    self._register_failure()
+                    raise RconConnectionError(f"Comando RCON '{command}' falhou: {e}") from e
+        finally:
+            self._idle.put_nowait(pooled)
+
+    async def reset(self):
+        """Descarta as conexões atuais e o backoff, p.ex. quando o servidor é reiniciado."""
+        self._failures = 0
+        self._retry_at = 0.0
+        await asyncio.gather(*(pooled.close() for pooled in self._clients))
+
+    async def close(self):
+        """Fecha todas as conexões do pool."""
+        self._closed = True
+        await asyncio.gather(*(pooled.close() for pooled in self._clients))
@@ -0,0 +1,92 @@
+# services/remote_server.py
+import logging
+from typing import Any, Dict
+from core.config import ServerConfig
+from core.errors import GameServerError, RconConnectionError
+from .game_server import GameServer, ServerStatus
+from .node_client import NodeClient
+
+log = logging.getLogger(__name__)
+
+class _AgentRcon:
+    """
+    Ocupa o lugar do RconPool em um servidor remoto: o RCON é aberto pelo agente, no
+    host do jogo, e nenhuma conexão é criada a partir do bot.
+    """
+    async def send(self, command: str, timeout: float | None = None) -> str:
+        raise RconConnectionError("O RCON de um servidor remoto é acessado pelo agente do nó.")
+
+    async def reset(self):
+        pass
+
+    async def close(self):
+        pass
+
+class RemoteGameServer(GameServer):
+    """
+    Servidor de jogo rodando em um nó remoto. Cada operação vira uma requisição ao
+    agente do nó, que executa a implementação real do jogo (MinecraftServer,
+    FactorioServer...) naquele host. A saída do console e o término do processo chegam
+    como eventos e alimentam os mesmos listeners de um servidor local.
+    """
+    def __init__(self, server_id: str, config: ServerConfig, node: NodeClient):
+        super().__init__(server_id, config, rcon=_AgentRcon())
+        self.node = node
+        self.node_id = node.node_id
+        self.remote_pid: int | None = None
+        self._running = False
+
+    def mark_running(self, pid: int):
+        """Registra um processo que já está rodando no nó (p.ex. depois de uma reconexão)."""
+        self._running = True
+        self.remote_pid = pid
+        self.stop_requested = False
+
+    def handle_event(self, event: Dict[str, Any]):
+        kind = event.get("event")
+        if kind == "output":
+            for line in event.get("lines", []):
+                self._on_output(line)
+        elif kind == "exit" and self._running:
+            self._running = False
+            # O agente já sabe se a parada foi pedida, inclusive por outra conexão
+            self.stop_requested = not event.get("crashed", True)
+            self._on_exit(event.get("returncode"))
+
+    async def start(self) -> str:
+        self.stop_requested = False
+        result = await self.node.call(
+            "start", timeout=0, server_id=self.server_id, config=self.config.model_dump()
+        )
+        self.mark_running(result["pid"])
+        return result["message"]
+
+    async def stop(self, force: bool = False) -> str:
+        if not self.is_running():
+            return f"O servidor **{self.config.name}** não está em execução."
+        self.stop_requested = True
+        return await self.node.call("stop", timeout=0, server_id=self.server_id, force=force)
+
+    async def query_status(self) -> ServerStatus:
+        if not self.is_running():
+            return ServerStatus(online=False)
+        try:
+            return ServerStatus(**await self.node.call("status", server_id=self.server_id))
+        except GameServerError as e:
+            return ServerStatus(online=True, error=str(e))
+
+    async def broadcast(self, message: str):
+        await self.node.call("broadcast", server_id=self.server_id, message=message)
+
+    async def wait_until_ready(self, timeout: float | None = None) -> bool:
+        """O log e o RCON são acompanhados pelo agente, no host do servidor."""
+        timeout = timeout if timeout is not None else self.config.ready_timeout
+        try:
+            return await self.node.call("wait_ready", timeout=timeout + self.node.config.timeout,
+                                        server_id=self.server_id, ready_timeout=timeout)
+        except GameServerError as e:
+            log.warning(f"Falha ao aguardar '{self.server_id}' no nó '{self.node_id}': {e}")
+            return False
+
+    def is_running(self) -> bool:
+        return self._running
@@ -0,0 +1,129 @@
+# services/resource_sampler.py
+import asyncio
+import logging
+from array import array
+from typing import Dict, Iterable
+from core.config import config
+from .proc_stats import METRICS, ProcessTreeSampler
+from .server_manager import ServerManager, server_manager
+
+log = logging.getLogger(__name__)
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+class RingBuffer:
+    """Série temporal de tamanho fixo sobre um array de doubles; a memória não cresce."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def last(self, n: int | None = None) -> list[float]:
+        """Retorna as últimas `n` amostras (todas, se omitido), da mais antiga para a mais nova."""
+        n = self._count if n is None else min(n, self._count)
+        start = (self._next - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[start:start + n].tolist()
+        return self._data[start:].tolist() + self._data[:self._next].tolist()
+
+def sparkline(values: Iterable[float], width: int = 30) -> str:
+    values = list(values)
+    if not values:
+        return ""
+    # Reduz para `width` colunas pegando a média de cada bloco
+    if len(values) > width:
+        step = len(values) / width
+        values = [
+            sum(block) / len(block)
+            for block in (values[int(i * step):max(int(i * step) + 1, int((i + 1) * step))] for i in range(width))
+        ]
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    return "".join(SPARK_CHARS[int((v - low) / span * (len(SPARK_CHARS) - 1))] for v in values)
+
+class ResourceSampler:
+    """
+    Amostra periodicamente CPU, RSS, threads, FDs abertos e I/O de disco da árvore de
+    processos de cada servidor em execução, lendo /proc diretamente. Como cada servidor
+    roda em sua própria sessão (ver ProcessSupervisor), a árvore é o conjunto de
+    processos com a sessão do líder. As séries ficam em RingBuffers de tamanho fixo.
+    """
+    def __init__(self, manager: ServerManager):
+        self._manager = manager
+        self.series: Dict[str, Dict[str, RingBuffer]] = {}
+        self._tree = ProcessTreeSampler()
+        # Custo de cada varredura (segundos de CPU do bot), para manter o sampler barato
+        self.overhead = RingBuffer(config.metrics.retention)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def interval(self) -> float:
+        return config.metrics.interval
+
+    def start(self):
+        if not ProcessTreeSampler.available():
+            log.info("/proc não disponível; o coletor de recursos ficará desativado.")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="resource-sampler")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _record(self, results: Dict[str, tuple[float, ...]]):
+        capacity = config.metrics.retention
+        for server_id, values in results.items():
+            buffers = self.series.setdefault(server_id, {name: RingBuffer(capacity) for name in METRICS})
+            for name, value in zip(METRICS, values):
+                buffers[name].append(value)
+
+    async def _run(self):
+        while True:
+            try:
+                running = self._manager.get_all_running_servers()
+                leaders = {server.server_id: server.process.pid for server in running if server.process is not None}
+                # Descarta contadores de servidores que pararam; as séries ficam para consulta
+                self._tree.forget(leaders)
+                if leaders:
+                    results, cost = await asyncio.to_thread(self._tree.sample, leaders)
+                    self.overhead.append(cost)
+                    self._record(results)
+                # Servidores em nós remotos são medidos pelo agente de cada nó
+                remote = [server for server in running if server.node_id != "local"]
+                if remote:
+                    self._record(await self._manager.remote_usage(remote))
+            except Exception:
+                log.exception("Erro ao coletar métricas de recursos")
+            await asyncio.sleep(self.interval)
+
+    def latest(self, server_id: str) -> Dict[str, float] | None:
+        buffers = self.series.get(server_id)
+        if not buffers or not len(buffers["cpu_percent"]):
+            return None
+        return {name: buffer.last(1)[0] for name, buffer in buffers.items()}
+
+    def window_stats(self, server_id: str, metric: str, seconds: float) -> tuple[float, float, float] | None:
+        """Retorna (mín, média, máx) de uma métrica nos últimos `seconds` segundos."""
+        buffers = self.series.get(server_id)
+        if not buffers:
+            return None
+        values = buffers[metric].last(max(1, int(seconds / self.interval)))
+        if not values:
+            return None
+        return min(values), sum(values) / len(values), max(values)
+
+# Instância única para ser usada em toda a aplicação
+resource_sampler = ResourceSampler(server_manager)
@@ -1,10 +1,33 @@
 # services/server_manager.py
-from typing import Dict, Type
-from core.config import config
-from core.errors import ServerNotFoundError
-from .game_server import GameServer
-from .minecraft_server import MinecraftServer
-from .factorio_server import FactorioServer
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict
+from core.config import MainConfig, ServerConfig, config, update_config
+from core.errors import GameServerError, NodeConnectionError, ServerNotFoundError
+from .game_server import GameServer, ServerExitListener, ServerOutputListener, load_game_type
+from .rcon_pool import RconPool
+from .admission import AdmissionController
+from .node_client import NodeClient
+from .remote_server import RemoteGameServer
+from .state_store import StateStore, describe_process, is_same_process
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class ConfigDiff:
+    """Resultado da aplicação de uma nova configuração ao gerenciador."""
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+TIMED_OUT_STATUS = "⏱️ **Tempo esgotado** (o servidor não respondeu a tempo)"
+
+# Chamado quando um servidor de uma operação em lote termina, com o resumo do resultado
+BulkResultListener = Callable[[str, str], Awaitable[None]]
 
 class ServerManager:
     """
@@ -12,38 +35,430 @@ class ServerManager:
     Atua como uma Fábrica para criar a instância de servidor correta.
     """
     def __init__(self):
-        self._server_factories: Dict[str, Type[GameServer]] = {
-            "minecraft": MinecraftServer,
-            "factorio": FactorioServer,
-        }
         self._running_servers: Dict[str, GameServer] = {}
+        # Um pool RCON por servidor, reaproveitado entre instâncias para manter as conexões vivas
+        self._rcon_pools: Dict[str, RconPool] = {}
+        # Notificados quando o processo de qualquer servidor gerenciado termina
+        self.exit_listeners: list[ServerExitListener] = []
+        # Notificados a cada linha do console de qualquer servidor gerenciado
+        self.output_listeners: list[ServerOutputListener] = []
+        # Decide quando cada servidor pode iniciar, conforme o orçamento do host
+        self.admission = AdmissionController(config.host, self.get_all_running_servers)
+        # Processos em execução gravados em disco, para sobreviver a reinícios do bot
+        self._state = StateStore(config.state_file)
+        # Conexões com os agentes dos nós remotos (seção `nodes`), criadas por start_nodes()
+        self.nodes: Dict[str, NodeClient] = {}
+        self._node_token: str | None = None
+        # Fechamentos de conexões substituídas, que rodam em segundo plano
+        self._closing: set[asyncio.Task] = set()
 
     def get_server(self, server_id: str) -> GameServer:
-        """Obtém uma instância de servidor, criando uma nova se necessário."""
-        if server_id in self._running_servers and self._running_servers[server_id].is_running():
-            return self._running_servers[server_id]
+        """
+        Obtém a instância atual do servidor, criando uma nova se necessário. Não escolhe
+        host: um servidor parado com `node: auto` fica no host local até o próximo início.
+        Quem vai iniciar o servidor deve usar prepare_start().
+        """
+        instance = self._running_servers.get(server_id)
+        if instance is None:
+            server_config = self._server_config(server_id)
+            node_id = server_config.node if server_config.node in self.nodes else "local"
+            instance = self._running_servers[server_id] = self._create_instance(server_id, server_config, node_id)
+        return instance
 
+    def prepare_start(self, server_id: str) -> GameServer:
+        """
+        Instância a ser iniciada: a atual, se já estiver rodando ou iniciando, ou uma nova
+        no host escolhido por _place, que com `node: auto` já conta o servidor na carga do nó.
+        """
+        instance = self._running_servers.get(server_id)
+        # Enquanto espera na fila de admissão, o servidor mantém o host escolhido
+        if instance and (instance.is_running() or self.admission.is_pending(server_id)):
+            return instance
+
+        server_config = self._server_config(server_id)
+        instance = self._create_instance(server_id, server_config, self._place(server_config))
+        self._running_servers[server_id] = instance
+        return instance
+
+    def _server_config(self, server_id: str) -> ServerConfig:
         server_config = config.servers.get(server_id)
         if not server_config:
             raise ServerNotFoundError(f"Servidor '{server_id}' não encontrado na configuração.")
+        return server_config
 
-        factory = self._server_factories.get(server_config.game_type)
-        if not factory:
-            raise NotImplementedError(f"Tipo de jogo '{server_config.game_type}' não suportado.")
+    def _create_instance(self, server_id: str, server_config: ServerConfig, node_id: str) -> GameServer:
+        if node_id != "local":
+            instance = RemoteGameServer(server_id, server_config, self.nodes[node_id])
+            instance.exit_listeners.append(self._dispatch_exit)
+            instance.output_listeners.append(self._dispatch_output)
+            return instance
 
-        instance = factory(server_id, server_config)
-        self._running_servers[server_id] = instance
+        factory = load_game_type(server_config.game_type)
+        rcon_pool = self._rcon_pools.get(server_id)
+        if rcon_pool is None:
+            rcon_pool = self._rcon_pools[server_id] = RconPool(server_config.rcon, name=server_id)
+
+        instance = factory(server_id, server_config, rcon=rcon_pool)
+        instance.spawn_listeners.append(self._record_spawn)
+        instance.exit_listeners.append(self._dispatch_exit)
+        instance.output_listeners.append(self._dispatch_output)
         return instance
 
+    def _place(self, server_config: ServerConfig) -> str:
+        """
+        Decide em qual host o servidor vai rodar. Com `node: auto`, escolhe o host com
+        maior folga: a fração do orçamento (memory_mb/cpu_cores) que ficaria ocupada com
+        o novo servidor ou, sem orçamento configurado, o load average por núcleo.
+        """
+        if server_config.node != "auto":
+            if server_config.node != "local" and server_config.node not in self.nodes:
+                raise NodeConnectionError(
+                    f"Nó '{server_config.node}' indisponível: as conexões com os nós não foram iniciadas (node_token)."
+                )
+            return server_config.node
+
+        candidates: list[tuple[tuple[float, int], str]] = []
+        if config.host.auto_placement:
+            memory, cpu = self.admission.usage()
+            try:
+                loadavg = os.getloadavg()[0]
+            except OSError:
+                loadavg = 0.0
+            local = {
+                "running": sum(1 for server in self.get_all_running_servers() if server.node_id == "local"),
+                "memory_mb": memory, "cpu_cores": cpu, "loadavg": loadavg, "cpus": os.cpu_count() or 1,
+            }
+            candidates.append((_placement_score(local, config.host.memory_mb, config.host.cpu_cores, server_config), "local"))
+        for node_id, node in self.nodes.items():
+            if node.connected and node.load is not None:
+                candidates.append((_placement_score(node.load, node.config.memory_mb, node.config.cpu_cores, server_config), node_id))
+        if not candidates:
+            raise NodeConnectionError("Nenhum host disponível para iniciar o servidor (todos os nós estão desconectados).")
+
+        # min() é estável: em caso de empate vence o host local, depois a ordem do config.yaml
+        _, node_id = min(candidates, key=lambda candidate: candidate[0])
+        if node_id != "local":
+            # Conta o novo servidor até a próxima leitura de carga, para que vários
+            # inícios seguidos não caiam todos no mesmo nó
+            load = self.nodes[node_id].load
+            load["running"] += 1
+            load["memory_mb"] += server_config.memory_mb
+            load["cpu_cores"] += server_config.cpu_cores
+            load["loadavg"] += server_config.cpu_cores or 1.0
+        return node_id
+
+    def start_nodes(self, token: str | None):
+        """Conecta aos agentes dos nós configurados. Deve ser chamado com o event loop rodando."""
+        self._node_token = token
+        if config.nodes and not token:
+            log.warning("Há nós configurados mas NODE_TOKEN não foi definido; servidores remotos ficarão indisponíveis.")
+            return
+        self._sync_nodes()
+
+    def _sync_nodes(self):
+        """Cria, recria ou fecha os clientes dos nós conforme a seção `nodes` atual."""
+        for node_id in list(self.nodes):
+            node = self.nodes[node_id]
+            if config.nodes.get(node_id) != node.config:
+                del self.nodes[node_id]
+                self._close_in_background(node)
+        for node_id, node_config in config.nodes.items():
+            if node_id not in self.nodes:
+                node = self.nodes[node_id] = NodeClient(node_id, node_config, self._node_token)
+                node.connect_listeners.append(self._on_node_connect)
+                node.event_listeners.append(self._on_node_event)
+                node.start()
+
+    def _remote_instances(self, node: NodeClient) -> list[RemoteGameServer]:
+        return [
+            server for server in self._running_servers.values()
+            if isinstance(server, RemoteGameServer) and server.node is node
+        ]
+
+    async def _on_node_connect(self, node: NodeClient):
+        """
+        Envia ao agente as configurações que ele pode rodar e reconcilia os servidores:
+        os que continuam rodando no nó voltam a ser gerenciados (mesmo depois de um
+        reinício do bot) e os que pararam enquanto a conexão estava caída são
+        notificados como término.
+        """
+        configs = {
+            server_id: server_config.model_dump()
+            for server_id, server_config in config.servers.items()
+            if server_config.node in (node.node_id, "auto")
+        }
+        running: Dict[str, Dict[str, Any]] = await node.call("sync", configs=configs)
+
+        for server in self._remote_instances(node):
+            if server.is_running() and server.server_id not in running:
+                server.handle_event({"event": "exit", "returncode": None, "crashed": not server.stop_requested})
+        for server_id, info in running.items():
+            server = self._running_servers.get(server_id)
+            if isinstance(server, RemoteGameServer) and server.node is node:
+                server.mark_running(info["pid"])
+                continue
+            if server is not None and server.is_running():
+                log.warning(f"Servidor '{server_id}' está rodando no nó '{node.node_id}' e em outro host.")
+                continue
+            if server_id not in config.servers:
+                continue
+            server = RemoteGameServer(server_id, config.servers[server_id], node)
+            server.exit_listeners.append(self._dispatch_exit)
+            server.output_listeners.append(self._dispatch_output)
+            server.mark_running(info["pid"])
+            self._running_servers[server_id] = server
+            log.info(f"Servidor '{server_id}' rodando no nó '{node.node_id}' (pid {info['pid']}).")
+
+    def _on_node_event(self, node: NodeClient, event: Dict[str, Any]):
+        server = self._running_servers.get(event.get("server_id"))
+        if isinstance(server, RemoteGameServer) and server.node is node:
+            server.handle_event(event)
+
+    async def remote_usage(self, servers: list[GameServer]) -> Dict[str, tuple[float, ...]]:
+        """Uso de recursos de servidores em nós remotos, medido pelo agente de cada nó."""
+        wanted = {server.server_id for server in servers}
+        node_ids = {server.node_id for server in servers if server.node_id in self.nodes}
+        replies = await asyncio.gather(
+            *(self.nodes[node_id].call("usage") for node_id in node_ids), return_exceptions=True
+        )
+        usage: Dict[str, tuple[float, ...]] = {}
+        for node_id, reply in zip(node_ids, replies):
+            if isinstance(reply, BaseException):
+                log.debug(f"Falha ao coletar recursos do nó '{node_id}': {reply}")
+                continue
+            usage.update((server_id, tuple(values)) for server_id, values in reply.items() if server_id in wanted)
+        return usage
+
+    def rehydrate(self) -> list[GameServer]:
+        """
+        Readota os processos registrados no arquivo de estado que continuam vivos,
+        conferindo-os em /proc para não confundir um pid reutilizado com o servidor.
+        Deve ser chamado uma vez na inicialização do bot, já com o event loop rodando.
+        """
+        started = time.perf_counter()
+        adopted = []
+        for server_id, record in self._state.load().items():
+            if server_id not in config.servers or not is_same_process(record):
+                log.info(f"Registro de '{server_id}' (pid {record.pid}) não corresponde a um processo vivo; descartando.")
+                self._state.remove(server_id)
+                continue
+            # O registro é de um processo deste host, mesmo com `node: auto`
+            instance = self._create_instance(server_id, config.servers[server_id], "local")
+            instance.adopt(record.pid, record.console_log)
+            self._running_servers[server_id] = instance
+            adopted.append(instance)
+            log.info(f"Servidor '{server_id}' readotado (pid {record.pid}).")
+        log.info(f"{len(adopted)} servidor(es) readotado(s) em {(time.perf_counter() - started) * 1000:.1f} ms.")
+        return adopted
+
+    def apply_config(self, new_config: MainConfig) -> ConfigDiff:
+        """
+        Aplica uma configuração recarregada: calcula o diff dos servidores, atualiza a
+        configuração global e repassa a nova ServerConfig às instâncias existentes.
+        Processos em execução não são tocados; mudanças como o comando de início valem
+        a partir do próximo /start. Servidores removidos que estejam rodando continuam
+        gerenciados até pararem.
+        """
+        old_servers = dict(config.servers)
+        diff = ConfigDiff(
+            added=[sid for sid in new_config.servers if sid not in old_servers],
+            removed=[sid for sid in old_servers if sid not in new_config.servers],
+            updated=[sid for sid, cfg in new_config.servers.items() if sid in old_servers and old_servers[sid] != cfg],
+        )
+
+        update_config(new_config)
+        self.admission.host = config.host
+        if self._node_token:
+            self._sync_nodes()
+
+        for server_id in diff.updated:
+            server_config = config.servers[server_id]
+            instance = self._running_servers.get(server_id)
+            if server_config.rcon != old_servers[server_id].rcon and server_id in self._rcon_pools:
+                # Conexões antigas apontam para o endereço/senha anteriores
+                old_pool = self._rcon_pools.pop(server_id)
+                self._close_in_background(old_pool)
+                self._rcon_pools[server_id] = RconPool(server_config.rcon, name=server_id)
+                if instance:
+                    instance.rcon = self._rcon_pools[server_id]
+            if instance:
+                instance.config = server_config
+                if instance.is_running() and server_config.node not in (instance.node_id, "auto"):
+                    log.warning(f"Servidor '{server_id}' mudou de nó; a mudança vale a partir do próximo início.")
+
+        for server_id in diff.removed:
+            instance = self._running_servers.get(server_id)
+            if instance and instance.is_running():
+                log.warning(f"Servidor '{server_id}' saiu da configuração mas continua rodando; ele será esquecido ao parar.")
+            elif server_id in self._rcon_pools:
+                self._close_in_background(self._rcon_pools.pop(server_id))
+
+        return diff
+
+    def _close_in_background(self, resource: RconPool | NodeClient):
+        """Fecha uma conexão sem esperar, mantendo a referência da tarefa até ela acabar."""
+        task = asyncio.create_task(resource.close())
+        self._closing.add(task)
+        task.add_done_callback(self._close_done)
+
+    def _close_done(self, task: asyncio.Task):
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.warning("Erro ao fechar uma conexão substituída", exc_info=task.exception())
+
+    def _record_spawn(self, server: GameServer):
+        record = describe_process(server.process.pid, server.config.start_command, server.process.console_log)
+        if record is None:
+            return # Sem /proc não há como verificar o processo depois; não persistimos
+        try:
+            self._state.put(server.server_id, record)
+        except OSError as e:
+            log.warning(f"Não foi possível gravar o estado de '{server.server_id}': {e}")
+
+    def _dispatch_output(self, server: GameServer, line: str):
+        for listener in self.output_listeners:
+            listener(server, line)
+
+    def _dispatch_exit(self, server: GameServer, returncode: int | None, crashed: bool):
+        try:
+            self._state.remove(server.server_id)
+        except OSError as e:
+            log.warning(f"Não foi possível atualizar o estado de '{server.server_id}': {e}")
+        self.admission.notify_capacity_changed()
+        for listener in self.exit_listeners:
+            listener(server, returncode, crashed)
+
     def get_all_running_servers(self) -> list[GameServer]:
         """Retorna uma lista de todas as instâncias de servidor ativas."""
         active_servers = []
         for server_id, server in list(self._running_servers.items()):
             if server.is_running():
                 active_servers.append(server)
-            else:
+            elif not self.admission.is_pending(server_id):
+                # Uma instância na fila de admissão guarda o host escolhido para o início
                 del self._running_servers[server_id]
         return active_servers
 
+    async def collect_statuses(
+        self,
+        servers: list[GameServer],
+        fetch: Callable[[GameServer], Awaitable[str]] | None = None,
+    ) -> list[tuple[GameServer, str]]:
+        """
+        Consulta o status de vários servidores em paralelo, com concorrência limitada.
+        Cada servidor tem seu próprio prazo e a coleta inteira respeita um prazo global;
+        quem não responder a tempo aparece como "tempo esgotado" em vez de travar a resposta.
+        `fetch` permite trocar a consulta direta por outra fonte (p.ex. o cache do poller).
+        """
+        settings = config.status
+        fetch_status = fetch or (lambda server: server.get_status())
+        semaphore = asyncio.Semaphore(max(1, settings.concurrency))
+
+        async def bounded_fetch(server: GameServer) -> str:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(fetch_status(server), settings.server_timeout)
+                except asyncio.TimeoutError:
+                    return TIMED_OUT_STATUS
+
+        tasks = [asyncio.create_task(bounded_fetch(server)) for server in servers]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=settings.deadline)
+            for task in pending:
+                task.cancel()
+
+        results = []
+        for server, task in zip(servers, tasks):
+            if task.cancelled() or not task.done():
+                results.append((server, TIMED_OUT_STATUS))
+            elif task.exception() is not None:
+                results.append((server, f"⚠️ Erro ao consultar status: {task.exception()}"))
+            else:
+                results.append((server, task.result()))
+        return results
+
+    def resolve_targets(self, targets: str) -> list[str]:
+        """
+        Converte uma lista de IDs de servidores e nomes de grupos (seção `groups` do
+        config.yaml), separados por vírgula ou espaço, nos IDs dos servidores, na ordem
+        informada e sem repetições.
+        """
+        resolved: Dict[str, None] = {}
+        for token in re.split(r"[,\s]+", targets.strip()):
+            if not token:
+                continue
+            for server_id in config.groups.get(token, [token]):
+                if server_id not in config.servers:
+                    raise ServerNotFoundError(f"Servidor ou grupo '{token}' não encontrado na configuração.")
+                resolved[server_id] = None
+        if not resolved:
+            raise ServerNotFoundError("Nenhum servidor informado.")
+        return list(resolved)
+
+    async def run_many(
+        self,
+        server_ids: list[str],
+        operation: Callable[[str], Awaitable[str]],
+        concurrency: int | None = None,
+        stagger: float | None = None,
+        on_result: BulkResultListener | None = None,
+    ) -> Dict[str, str]:
+        """
+        Executa `operation` para vários servidores em paralelo, com no máximo `concurrency`
+        ao mesmo tempo e pelo menos `stagger` segundos entre o disparo de dois deles (os
+        padrões vêm de `bulk` no config.yaml). Erros de um servidor não interrompem os
+        demais: viram o resumo daquele servidor. `on_result` é chamado a cada conclusão.
+        """
+        settings = config.bulk
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.concurrency))
+        stagger = settings.stagger if stagger is None else stagger
+        launch_lock = asyncio.Lock()
+        next_launch = 0.0
+        results: Dict[str, str] = {}
+
+        async def run(server_id: str):
+            nonlocal next_launch
+            async with semaphore:
+                if stagger > 0:
+                    async with launch_lock:
+                        delay = next_launch - time.monotonic()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        next_launch = time.monotonic() + stagger
+                try:
+                    result = await operation(server_id)
+                except GameServerError as e:
+                    result = f"❌ {e}"
+                except Exception as e:
+                    log.exception(f"Erro inesperado na operação em lote de '{server_id}'")
+                    result = f"❌ Erro inesperado: {type(e).__name__}"
+            results[server_id] = result
+            if on_result:
+                await on_result(server_id, result)
+
+        await asyncio.gather(*(run(server_id) for server_id in server_ids))
+        return results
+
+    async def close(self):
+        """Fecha todas as conexões RCON e com os nós mantidas pelo gerenciador."""
+        pools = list(self._rcon_pools.values())
+        nodes = list(self.nodes.values())
+        self._rcon_pools.clear()
+        self.nodes.clear()
+        await asyncio.gather(*(pool.close() for pool in pools), *(node.close() for node in nodes))
+        # Os erros destas já são registrados por _close_done
+        await asyncio.gather(*self._closing, return_exceptions=True)
+
+def _placement_score(load: Dict[str, Any], memory_budget: float, cpu_budget: float, server_config: ServerConfig) -> tuple[float, int]:
+    """Ocupação do host se o servidor for iniciado nele (menor é melhor), com o número de servidores como desempate."""
+    ratios = []
+    if memory_budget:
+        ratios.append((load["memory_mb"] + server_config.memory_mb) / memory_budget)
+    if cpu_budget:
+        ratios.append((load["cpu_cores"] + server_config.cpu_cores) / cpu_budget)
+    if not ratios:
+        ratios.append(load["loadavg"] / max(1, load["cpus"]))
+    return max(ratios), load["running"]
+
 # Instância única para ser usada em toda a aplicação
 server_manager = ServerManager()
\ No newline at end of file
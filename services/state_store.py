@@ -0,0 +1,104 @@
+# services/state_store.py
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+log = logging.getLogger(__name__)
+
+PROC = "/proc"
+
+@dataclass
+class ProcessRecord:
+    """O suficiente para reencontrar um processo depois de um reinício do bot."""
+    pid: int
+    start_ticks: int # Campo 'starttime' de /proc/<pid>/stat; distingue reúso de pid
+    cmdline: List[str]
+    console_log: str
+    started_at: float # Horário de parede (time.time()) do início, para exibição
+
+def _read_stat_fields(pid: int) -> List[bytes] | None:
+    try:
+        with open(f"{PROC}/{pid}/stat", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    # O nome do processo pode conter espaços; os campos começam após o último ')'
+    return raw[raw.rfind(b")") + 2:].split()
+
+def read_start_ticks(pid: int) -> int | None:
+    fields = _read_stat_fields(pid)
+    return int(fields[19]) if fields else None
+
+def read_cmdline(pid: int) -> List[str] | None:
+    try:
+        with open(f"{PROC}/{pid}/cmdline", "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    return [part.decode("utf-8", errors="replace") for part in raw.split(b"\0") if part]
+
+def describe_process(pid: int, cmdline: List[str], console_log: str) -> ProcessRecord | None:
+    """Monta o registro de um processo recém-iniciado (None se /proc não estiver disponível)."""
+    start_ticks = read_start_ticks(pid)
+    if start_ticks is None:
+        return None
+    return ProcessRecord(pid, start_ticks, read_cmdline(pid) or list(cmdline), console_log, time.time())
+
+def is_same_process(record: ProcessRecord) -> bool:
+    """
+    Confere em /proc se o pid ainda é o mesmo processo que registramos: o instante de
+    início precisa bater (um pid reutilizado teria outro) e ele deve continuar líder
+    da própria sessão, como o ProcessSupervisor o inicia. A linha de comando só gera
+    um aviso: um script de início que faz `exec` do java ou do binário a troca.
+    """
+    fields = _read_stat_fields(record.pid)
+    if not fields:
+        return False
+    if int(fields[19]) != record.start_ticks or int(fields[3]) != record.pid:
+        return False
+    cmdline = read_cmdline(record.pid)
+    if cmdline is not None and cmdline != record.cmdline:
+        log.warning(f"Processo {record.pid} mudou de linha de comando desde o registro ({' '.join(cmdline)[:200]}); readotando mesmo assim.")
+    return True
+
+class StateStore:
+    """
+    Persiste em um pequeno arquivo JSON os processos dos servidores em execução,
+    para que o bot possa readotá-los após um reinício. As escritas são atômicas.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._records: Dict[str, ProcessRecord] = {}
+        self._loaded = False
+
+    def load(self) -> Dict[str, ProcessRecord]:
+        if not self._loaded:
+            self._loaded = True
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._records = {server_id: ProcessRecord(**record) for server_id, record in data.items()}
+            except FileNotFoundError:
+                pass
+            except (ValueError, TypeError) as e:
+                log.warning(f"Arquivo de estado '{self.path}' inválido; ignorando. Erro: {e}")
+        return dict(self._records)
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({server_id: asdict(record) for server_id, record in self._records.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def put(self, server_id: str, record: ProcessRecord):
+        self.load()
+        self._records[server_id] = record
+        self._save()
+
+    def remove(self, server_id: str):
+        self.load()
+        if self._records.pop(server_id, None) is not None:
+            self._save()
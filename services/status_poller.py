@@ -0,0 +1,121 @@
+# services/status_poller.py
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+from core.config import config
+from .game_server import GameServer, ServerStatus
+from .server_manager import ServerManager, server_manager
+
+log = logging.getLogger(__name__)
+
+StatusListener = Callable[[GameServer, ServerStatus], Awaitable[None]]
+
+class StatusPoller:
+    """
+    Atualiza em segundo plano um snapshot de status de cada servidor em execução.
+    O /status lê deste cache (stale-while-revalidate) e outros componentes podem
+    se inscrever para receber cada snapshot novo.
+    """
+    TICK = 1.0 # Resolução do laço de agendamento, em segundos
+
+    def __init__(self, manager: ServerManager):
+        self._manager = manager
+        self._snapshots: Dict[str, ServerStatus] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._stopped_at: Dict[str, float] = {}
+        self._listeners: list[StatusListener] = []
+        self._semaphore = asyncio.Semaphore(max(1, config.status.concurrency))
+        self._task: asyncio.Task | None = None
+
+    def interval_for(self, server: GameServer) -> float:
+        return server.config.poll_interval or config.status.poll_interval
+
+    def subscribe(self, listener: StatusListener):
+        """Registra uma corrotina chamada a cada snapshot novo."""
+        self._listeners.append(listener)
+
+    def snapshot(self, server_id: str) -> ServerStatus | None:
+        """Retorna o último snapshot conhecido, sem consultar o servidor."""
+        return self._snapshots.get(server_id)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="status-poller")
+
+    async def stop(self):
+        tasks = [t for t in [self._task, *self._refreshing.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._refreshing.clear()
+
+    def refresh(self, server: GameServer) -> asyncio.Task:
+        """Agenda uma consulta ao servidor, reaproveitando uma que já esteja em andamento."""
+        task = self._refreshing.get(server.server_id)
+        if task is None or task.done():
+            task = asyncio.create_task(self._poll(server))
+            self._refreshing[server.server_id] = task
+        return task
+
+    async def get_status(self, server: GameServer) -> str:
+        """
+        Status formatado seguindo stale-while-revalidate: snapshots dentro do intervalo
+        são servidos direto; snapshots velhos (até status.max_stale) são servidos enquanto
+        uma atualização roda em segundo plano; sem snapshot utilizável, aguarda a consulta.
+        """
+        snapshot = self._snapshots.get(server.server_id)
+        if snapshot is not None:
+            if snapshot.age < self.interval_for(server):
+                return snapshot.format()
+            if snapshot.age < config.status.max_stale:
+                self.refresh(server)
+                return snapshot.format()
+        # O shield evita que o prazo do /status cancele uma consulta compartilhada
+        return (await asyncio.shield(self.refresh(server))).format()
+
+    async def _poll(self, server: GameServer) -> ServerStatus:
+        async with self._semaphore:
+            try:
+                status = await asyncio.wait_for(server.query_status(), config.status.server_timeout)
+            except asyncio.TimeoutError:
+                status = ServerStatus(online=server.is_running(), error="RCON não respondeu a tempo")
+            except Exception as e:
+                log.warning(f"Falha ao consultar o status de '{server.server_id}': {e}")
+                status = ServerStatus(online=server.is_running(), error=str(e))
+
+        self._snapshots[server.server_id] = status
+        for listener in self._listeners:
+            try:
+                await listener(server, status)
+            except Exception:
+                log.exception(f"Erro em um listener do poller de status para '{server.server_id}'")
+        return status
+
+    def _evict(self, running_ids: set[str]):
+        now = time.monotonic()
+        for server_id in list(self._snapshots):
+            if server_id in running_ids:
+                self._stopped_at.pop(server_id, None)
+                continue
+            stopped_at = self._stopped_at.setdefault(server_id, now)
+            if now - stopped_at >= config.status.evict_after:
+                del self._snapshots[server_id]
+                del self._stopped_at[server_id]
+
+    async def _run(self):
+        while True:
+            try:
+                running = self._manager.get_all_running_servers()
+                for server in running:
+                    snapshot = self._snapshots.get(server.server_id)
+                    if snapshot is None or snapshot.age >= self.interval_for(server):
+                        self.refresh(server)
+                self._evict({server.server_id for server in running})
+            except Exception:
+                log.exception("Erro no laço do poller de status")
+            await asyncio.sleep(self.TICK)
+
+# Instância única para ser usada em toda a aplicação
+status_poller = StatusPoller(server_manager)